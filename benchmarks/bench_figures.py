@@ -0,0 +1,115 @@
+"""
+Taille et temps de construction des figures envoyées au navigateur
+
+Construit les graphiques des pages (courbes et barres de la vue
+d'ensemble, timeline double axe et barres du transport, donut des
+réclamations) sur une série journalière synthétique de ``--years`` ans
+et mesure, pour chacun, le JSON que ``st.plotly_chart`` envoie à chaque
+rerun (``plotly.io.to_json``) et le temps de construction de la figure,
+cache de figures vide puis rempli (rerun sans changement de l'agrégat).
+
+Usage :
+    python -m benchmarks.bench_figures [--years 3] [--repeat 5]
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.io as pio
+import streamlit  # noqa: F401  (template plotly 'streamlit', comme dans l'application)
+
+from utils.charts import create_bar_chart, create_comparison_chart, create_line_chart, create_pie_chart
+from utils.figure_cache import FIGURE_CACHE
+from utils.visualizations import create_dual_axis_timeline
+
+TRANSPORTS = ['road', 'train', 'plane', 'last_mile']
+
+
+def daily_series(years, seed=0):
+    """Série journalière au format de ``cube_timeseries``"""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2022-01-01', periods=int(years * 365), freq='D')
+    n = len(dates)
+    return pd.DataFrame({
+        'date': dates,
+        'ca_daily': rng.gamma(2.0, 5000.0, n).round(2),
+        'nb_orders': rng.poisson(80, n),
+        'claim_rate': rng.uniform(4, 12, n),
+        'delivery_rate': rng.uniform(80, 98, n),
+    })
+
+
+def monthly_series(daily):
+    """Agrégat mensuel de la timeline du transport"""
+    monthly = daily.resample('MS', on='date').agg(orders=('nb_orders', 'sum')).reset_index()
+    monthly['theft_rate'] = np.linspace(1.0, 3.0, len(monthly))
+    monthly['is_christmas'] = monthly['date'].dt.month.isin([11, 12])
+    return monthly.rename(columns={'date': 'order_date'})
+
+
+def by_transport():
+    return pd.DataFrame({
+        'Mode': TRANSPORTS,
+        'orders': [5200, 2100, 900, 7400],
+        'non_delivery_rate': [6.1, 4.2, 2.5, 9.8],
+        'theft_rate': [1.9, 0.7, 0.4, 3.1],
+    })
+
+
+def figure_builders(daily):
+    """{graphique: fonction qui construit la figure}"""
+    monthly = monthly_series(daily)
+    transport = by_transport()
+    return {
+        'overview:ca': lambda: create_line_chart(daily, 'date', 'ca_daily', title="CA"),
+        'overview:nb_orders': lambda: create_line_chart(daily, 'date', 'nb_orders', title="Commandes"),
+        'overview:claim_rate': lambda: create_bar_chart(daily, 'date', 'claim_rate', title="Réclamations"),
+        'overview:delivery_rate': lambda: create_bar_chart(daily, 'date', 'delivery_rate', title="Livraison"),
+        'transport:timeline': lambda: create_dual_axis_timeline(
+            monthly, metric1='orders', metric2='theft_rate'),
+        'transport:theft_rate': lambda: create_bar_chart(transport, 'Mode', 'theft_rate', title="Vols"),
+        'transport:comparison': lambda: create_comparison_chart(
+            transport, 'Mode', ['non_delivery_rate', 'theft_rate'], title="Comparaison"),
+        'reclamations:donut': lambda: create_pie_chart(transport, 'Mode', 'orders', hole=0.4),
+    }
+
+
+def measure(build, repeat):
+    """
+    Taille du JSON et meilleurs temps de construction
+
+    Returns:
+        tuple: (octets, ms cache vide, ms cache rempli)
+    """
+    cold = warm = float('inf')
+    for _ in range(repeat):
+        FIGURE_CACHE.clear()
+        start = time.perf_counter()
+        build()
+        cold = min(cold, time.perf_counter() - start)
+        start = time.perf_counter()
+        fig = build()
+        warm = min(warm, time.perf_counter() - start)
+    return len(pio.to_json(fig, validate=False)), cold * 1000, warm * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--years', type=float, default=3, help="Années de données journalières")
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    daily = daily_series(args.years)
+    print(f"{len(daily):,} jours")
+    print(f"{'graphique':<24} {'JSON (Ko)':>10} {'construction (ms)':>18} {'en cache (ms)':>14}")
+    totals = [0, 0.0, 0.0]
+    for name, build in figure_builders(daily).items():
+        size, cold, warm = measure(build, args.repeat)
+        totals = [totals[0] + size, totals[1] + cold, totals[2] + warm]
+        print(f"{name:<24} {size / 1e3:>10.1f} {cold:>18.1f} {warm:>14.2f}")
+    print(f"{'total':<24} {totals[0] / 1e3:>10.1f} {totals[1]:>18.1f} {totals[2]:>14.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark : jointures du pipeline, merge successifs vs jointures par positions
+
+Mesure le temps et le pic de mémoire allouée (tracemalloc) des jointures
+de build_main_dataset sur les tables de ``data/``.
+
+Usage :
+    python -m benchmarks.bench_joins [--data-dir data]
+"""
+import argparse
+import time
+import tracemalloc
+
+import pandas as pd
+
+from utils.data_loader import DATA_DIR, IN_MEMORY_TABLES, read_tables
+from utils.joins import join_lookup
+
+CLAIM_COLUMNS = ['claim_type', 'claim_status', 'claim_amount', 'refunded_amount', 'resolution_time_days']
+
+
+def joins_merge(data):
+    df = data['orders'].copy()
+    df = df.merge(data['transport_mode'], on='transport_id', how='left')
+    df = df.merge(data['customers'], on='customer_id', how='left')
+    df = df.merge(data['claims'][['order_id', *CLAIM_COLUMNS]], on='order_id', how='left')
+    order_products = data['order_product'].merge(data['products'], on='product_id', how='left')
+    return df, order_products
+
+
+def joins_lookup(data):
+    df = join_lookup(data['orders'], data['transport_mode'], on='transport_id')
+    df = join_lookup(df, data['customers'], on='customer_id')
+    df = join_lookup(df, data['claims'], on='order_id', columns=CLAIM_COLUMNS)
+    order_products = join_lookup(data['order_product'], data['products'], on='product_id')
+    return df, order_products
+
+
+def measure(func, data):
+    """Temps (s) et pic de mémoire allouée (Mo) d'un appel"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(data)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--data-dir', default=str(DATA_DIR))
+    args = parser.parse_args(argv)
+
+    data = read_tables(args.data_dir, IN_MEMORY_TABLES)
+    print(f"{len(data['orders']):,} commandes, {len(data['order_product']):,} lignes produits")
+
+    (df_merge, op_merge), t_merge, m_merge = measure(joins_merge, data)
+    (df_lookup, op_lookup), t_lookup, m_lookup = measure(joins_lookup, data)
+
+    pd.testing.assert_frame_equal(df_merge, df_lookup)
+    pd.testing.assert_frame_equal(op_merge, op_lookup)
+
+    print(f"{'':10} {'temps (s)':>10} {'pic (Mo)':>10}")
+    print(f"{'merge':10} {t_merge:>10.3f} {m_merge:>10.1f}")
+    print(f"{'positions':10} {t_lookup:>10.3f} {m_lookup:>10.1f}")
+    print(f"Résultats identiques, mémoire x{m_merge / m_lookup:.1f} plus faible")
+
+
+if __name__ == '__main__':
+    main()
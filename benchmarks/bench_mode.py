@@ -0,0 +1,66 @@
+"""
+Benchmark : mode par groupe (lambda x.mode()[0]) vs MostFrequent vectorisé
+
+Usage :
+    python -m benchmarks.bench_mode [--orders 1000000] [--seed 0]
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.aggregations import grouped_agg, MostFrequent
+
+
+def make_order_products(n_orders, seed=0):
+    """Lignes commande-produit synthétiques (1 à 5 produits par commande, égalités fréquentes)"""
+    rng = np.random.default_rng(seed)
+    lines_per_order = rng.integers(1, 6, n_orders)
+    n_lines = int(lines_per_order.sum())
+    fragility = rng.choice(['Low', 'Medium', 'High', None], n_lines, p=[0.4, 0.3, 0.25, 0.05])
+    return pd.DataFrame({
+        'order_id': np.repeat(np.arange(n_orders), lines_per_order),
+        'fragility_class': fragility
+    })
+
+
+def mode_lambda(df):
+    return df.groupby('order_id').agg({
+        'fragility_class': lambda x: x.mode()[0] if len(x.mode()) > 0 else 'Unknown'
+    })['fragility_class']
+
+
+def mode_vectorized(df):
+    return grouped_agg(df, 'order_id', {
+        'fragility_class': MostFrequent(default='Unknown')
+    })['fragility_class']
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--orders', type=int, default=1_000_000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    df = make_order_products(args.orders, args.seed)
+    print(f"{args.orders:,} commandes, {len(df):,} lignes")
+
+    fast, t_fast = timed(mode_vectorized, df)
+    print(f"MostFrequent : {t_fast:8.2f}s")
+
+    slow, t_slow = timed(mode_lambda, df)
+    print(f"lambda mode  : {t_slow:8.2f}s")
+
+    pd.testing.assert_series_equal(fast, slow, check_dtype=False)
+    print(f"Résultats identiques, accélération x{t_slow / t_fast:.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,304 @@
+"""
+Benchmark du pipeline sur données synthétiques, avec baseline de référence
+
+Génère (une fois, puis réutilise) un jeu synthétique à l'échelle demandée
+(benchmarks/synthetic.py) et mesure chaque étape du chargement au calcul
+des KPI :
+
+    read_tables_csv       lecture des CSV + écriture du cache Parquet
+    read_tables_parquet   relecture depuis le cache Parquet
+    build_main_dataset    jointures et agrégats (étapes de route en flux)
+    filter_index          bitmaps transport / état
+    apply_filters         sélection type (toute la période, 2 transports, 25 états)
+    get_kpi_metrics       KPI de la sélection
+
+Pour chaque étape : temps (meilleur de ``--repeat`` passes), pic de RSS du
+processus pendant l'étape et pic de mémoire allouée (tracemalloc, passe
+séparée pour ne pas fausser les temps ; les tampons Arrow, hors du
+suivi de tracemalloc, n'apparaissent que dans le RSS).
+
+Les résultats sont comparés à ``benchmarks/baseline.json`` : toute mesure
+qui dépasse la référence de plus de ``--tolerance`` (et d'un seuil
+absolu, pour ignorer le bruit des étapes de quelques millisecondes) est
+signalée et le script sort en erreur.
+
+Usage :
+    python -m benchmarks.bench_pipeline [--scale 10k|100k|1m|10m] [--repeat 3]
+    python -m benchmarks.bench_pipeline --scale 1m --update-baseline
+"""
+import argparse
+import gc
+import json
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks.synthetic import generate, parse_scale
+from utils.columnar_cache import CACHE_DIRNAME
+from utils.data_loader import IN_MEMORY_TABLES, build_main_dataset, get_kpi_metrics, read_tables
+from utils.filter_index import FilterIndex
+from utils.sidebar import apply_filters
+
+BASELINE_PATH = Path(__file__).with_name('baseline.json')
+WORK_DIR = Path(tempfile.gettempdir()) / 'logistixup-bench'
+
+TOLERANCE = 0.25
+# Écarts absolus en dessous desquels une hausse n'est pas une régression
+MIN_DELTA = {'wall_s': 0.05, 'rss_peak_mb': 10.0, 'alloc_peak_mb': 5.0}
+METRICS = tuple(MIN_DELTA)
+
+RSS_SAMPLE_INTERVAL = 0.002
+
+
+# ===== MESURES =====
+def current_rss_mb():
+    """RSS courant du processus (Mo), None hors Linux"""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return pages * resource.getpagesize() / 1e6
+
+
+def max_rss_mb():
+    """Pic de RSS depuis le lancement du processus (Mo)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1e6 if sys.platform == 'darwin' else peak / 1e3
+
+
+class RssMonitor:
+    """
+    Pic de RSS pendant un bloc
+
+    Échantillonne /proc/self/statm dans un thread ; si le pic historique
+    du processus (ru_maxrss) a augmenté pendant le bloc, il est exact et
+    remplace l'échantillonnage.
+    """
+
+    def __init__(self, interval=RSS_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.peak = 0.0
+        self._stop = threading.Event()
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, current_rss_mb() or 0.0)
+
+    def __enter__(self):
+        self._max_before = max_rss_mb()
+        self.peak = current_rss_mb() or 0.0
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss_mb() or 0.0)
+        max_after = max_rss_mb()
+        if max_after > self._max_before:
+            self.peak = max(self.peak, max_after)
+
+
+def run_stage(func, trace=False):
+    """
+    Exécute une étape et mesure temps et mémoire
+
+    Returns:
+        tuple: (résultat, {wall_s, rss_peak_mb} ou {alloc_peak_mb} si trace)
+    """
+    gc.collect()
+    if trace:
+        tracemalloc.start()
+        result = func()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return result, {'alloc_peak_mb': peak / 1e6}
+
+    with RssMonitor() as rss:
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+    return result, {'wall_s': elapsed, 'rss_peak_mb': rss.peak}
+
+
+# ===== PIPELINE =====
+def typical_filters(df):
+    """Sélection type de la sidebar : toute la période, 2 transports, 25 états"""
+    return {
+        'start_date': df['order_date'].min().date(),
+        'end_date': df['order_date'].max().date(),
+        'transport_filter': sorted(df['transport_type'].dropna().unique())[:2],
+        'state_filter': sorted(df['state_code'].dropna().unique())[:25],
+    }
+
+
+def run_pipeline(data_dir, trace=False):
+    """
+    Une passe complète du pipeline
+
+    Args:
+        data_dir: Dossier des CSV (son cache Parquet est supprimé au départ)
+        trace: Mesure les allocations (tracemalloc) au lieu du temps / RSS
+
+    Returns:
+        dict: {étape: mesures}
+    """
+    shutil.rmtree(Path(data_dir) / CACHE_DIRNAME, ignore_errors=True)
+    results = {}
+
+    def stage(name, func):
+        value, results[name] = run_stage(func, trace)
+        return value
+
+    stage('read_tables_csv', lambda: read_tables(data_dir, IN_MEMORY_TABLES))
+    data = stage('read_tables_parquet', lambda: read_tables(data_dir, IN_MEMORY_TABLES))
+    df = stage('build_main_dataset', lambda: build_main_dataset(data, data_dir=data_dir))
+    del data
+    index = stage('filter_index', lambda: FilterIndex(df))
+    filters = typical_filters(df)
+    filtered = stage('apply_filters', lambda: apply_filters(df, filters, index=index))
+    stage('get_kpi_metrics', lambda: get_kpi_metrics(filtered))
+    return results
+
+
+def benchmark(data_dir, repeat=3):
+    """
+    Meilleur temps / RSS sur ``repeat`` passes, puis une passe tracemalloc
+
+    Returns:
+        dict: {étape: {wall_s, rss_peak_mb, alloc_peak_mb}}
+    """
+    best = {}
+    for _ in range(repeat):
+        for name, values in run_pipeline(data_dir).items():
+            current = best.setdefault(name, dict(values))
+            for metric, value in values.items():
+                current[metric] = min(current[metric], value)
+
+    for name, values in run_pipeline(data_dir, trace=True).items():
+        best[name].update(values)
+    return best
+
+
+def synthetic_data_dir(n_orders, seed, work_dir=WORK_DIR):
+    """Dossier du jeu synthétique (généré seulement s'il n'existe pas)"""
+    data_dir = Path(work_dir) / f'{n_orders}-seed{seed}'
+    marker = data_dir / 'synthetic.json'
+    if not marker.exists():
+        counts = generate(data_dir, n_orders, seed=seed)
+        marker.write_text(json.dumps({'orders': n_orders, 'seed': seed, 'rows': counts}))
+    return data_dir
+
+
+# ===== BASELINE =====
+def load_baseline(path=BASELINE_PATH):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_baseline(scale, n_orders, seed, results, path=BASELINE_PATH):
+    """Enregistre (ou remplace) la référence d'une échelle"""
+    baseline = load_baseline(path)
+    baseline[scale] = {
+        'orders': n_orders,
+        'seed': seed,
+        'recorded': datetime.now().isoformat(timespec='seconds'),
+        'machine': f'{platform.machine()} / Python {platform.python_version()}',
+        'stages': {
+            name: {metric: round(values[metric], 4) for metric in METRICS}
+            for name, values in results.items()
+        },
+    }
+    with open(path, 'w') as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def find_regressions(results, reference, tolerance=TOLERANCE):
+    """
+    Mesures au-delà de la référence
+
+    Args:
+        results: {étape: mesures} de ce run
+        reference: {étape: mesures} de la baseline
+        tolerance: Hausse relative tolérée (0.25 = +25 %)
+
+    Returns:
+        list: (étape, métrique, référence, valeur)
+    """
+    regressions = []
+    for name, values in results.items():
+        for metric in METRICS:
+            ref = reference.get(name, {}).get(metric)
+            value = values.get(metric)
+            if ref is None or value is None:
+                continue
+            if value > ref * (1 + tolerance) and value - ref > MIN_DELTA[metric]:
+                regressions.append((name, metric, ref, value))
+    return regressions
+
+
+def print_results(results, reference):
+    print(f"{'étape':<22} {'temps (s)':>10} {'RSS (Mo)':>10} {'alloc (Mo)':>11}   vs baseline")
+    for name, values in results.items():
+        ref = reference.get(name, {})
+        ratios = ' '.join(
+            f"{values[m] / ref[m]:>5.2f}x" if ref.get(m) else '    - '
+            for m in METRICS
+        )
+        print(f"{name:<22} {values['wall_s']:>10.3f} {values['rss_peak_mb']:>10.1f} "
+              f"{values['alloc_peak_mb']:>11.1f}   {ratios}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--scale', default='10k', help="10k, 100k, 1m, 10m ou un nombre de commandes")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--data-dir', help="CSV existants au lieu du jeu synthétique")
+    parser.add_argument('--baseline', default=str(BASELINE_PATH))
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE)
+    parser.add_argument('--update-baseline', action='store_true',
+                        help="Enregistre ce run comme référence de l'échelle")
+    args = parser.parse_args(argv)
+
+    scale = args.scale.lower()
+    n_orders = parse_scale(scale)
+    data_dir = Path(args.data_dir) if args.data_dir else synthetic_data_dir(n_orders, args.seed)
+
+    results = benchmark(data_dir, repeat=args.repeat)
+    reference = load_baseline(args.baseline).get(scale, {}).get('stages', {})
+    print(f"{n_orders:,} commandes ({data_dir})")
+    print_results(results, reference)
+
+    if args.update_baseline:
+        save_baseline(scale, n_orders, args.seed, results, args.baseline)
+        print(f"[✓] Baseline '{scale}' enregistrée dans {args.baseline}")
+        return 0
+    if not reference:
+        print(f"[!] Pas de baseline pour '{scale}' (--update-baseline pour l'enregistrer)")
+        return 0
+
+    regressions = find_regressions(results, reference, args.tolerance)
+    for name, metric, ref, value in regressions:
+        print(f"[✗] Régression {name}.{metric} : {ref:.3f} -> {value:.3f} (+{value / ref - 1:.0%})")
+    if regressions:
+        return 1
+    print(f"[✓] Aucune régression (tolérance {args.tolerance:.0%})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
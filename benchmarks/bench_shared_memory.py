@@ -0,0 +1,73 @@
+"""
+Benchmark : mémoire de N processus qui ouvrent le dataset enrichi
+
+Compare la mémoire privée (USS) par processus quand chacun mappe la version
+matérialisée (``data/.build``) et quand chacun en garde une copie complète
+(équivalent d'une désérialisation st.cache_data). Linux uniquement
+(/proc/self/smaps_rollup).
+
+Usage :
+    python -m utils.build_dataset
+    python -m benchmarks.bench_shared_memory [--workers 5 20 50]
+"""
+import argparse
+import multiprocessing as mp
+
+from utils.data_loader import CACHE_VERSION, DATA_DIR
+from utils.materialized import load_current
+
+
+def private_memory_mb():
+    """Mémoire privée (Private_Clean + Private_Dirty) du processus courant, en Mo"""
+    total_kb = 0
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            if line.startswith(('Private_Clean:', 'Private_Dirty:')):
+                total_kb += int(line.split()[1])
+    return total_kb / 1024
+
+
+def worker(mode, ready, done):
+    before = private_memory_mb()
+    df, _ = load_current(DATA_DIR, pipeline_version=CACHE_VERSION)
+    if mode == 'copy':
+        df = df.copy(deep=True)
+    # Lecture de toutes les colonnes (charge les pages mappées)
+    for col in df.columns:
+        df[col].to_numpy()[:: 4096].tolist()
+    ready.put(private_memory_mb() - before)
+    done.wait()
+
+
+def measure(mode, n_workers):
+    ctx = mp.get_context('fork')
+    ready, done = ctx.Queue(), ctx.Event()
+    procs = [ctx.Process(target=worker, args=(mode, ready, done)) for _ in range(n_workers)]
+    for p in procs:
+        p.start()
+    per_worker = [ready.get() for _ in procs]
+    done.set()
+    for p in procs:
+        p.join()
+    return sum(per_worker)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--workers', type=int, nargs='+', default=[5, 20, 50])
+    args = parser.parse_args(argv)
+
+    df, manifest = load_current(DATA_DIR, pipeline_version=CACHE_VERSION)
+    if df is None:
+        raise SystemExit("[✗] Aucun build à jour : lancer d'abord python -m utils.build_dataset")
+    print(f"Version {manifest['version']} : {len(df):,} lignes, "
+          f"{df.memory_usage(deep=True).sum() / 1e6:.0f} Mo en mémoire")
+    del df
+
+    print(f"{'workers':>8} {'mappé (Mo)':>12} {'copie (Mo)':>12}")
+    for n in args.workers:
+        print(f"{n:>8} {measure('mmap', n):>12.0f} {measure('copy', n):>12.0f}")
+
+
+if __name__ == '__main__':
+    main()
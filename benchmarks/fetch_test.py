@@ -0,0 +1,300 @@
+"""
+Test de utils.fetch_data contre un serveur HTTP local simulé
+
+Un serveur local (thread, ``http.server``) sert des CSV synthétiques comme
+le ferait le stockage distant : ETag / Last-Modified, réponses 304,
+requêtes partielles (Range + If-Range, 206 / 416), contenu gzip (en-tête
+``Content-Encoding`` ou URL en ``.gz``). Il peut couper une réponse après
+N octets ou changer un fichier entre deux requêtes.
+
+Scénarios vérifiés :
+    - premier téléchargement (brut, gzip, .gz) : contenu et sha256 exacts ;
+    - second passage : 304 partout, aucun octet de contenu renvoyé ;
+    - connexion coupée : reprise avec Range + If-Range, seule la fin est
+      renvoyée (206), y compris sur un contenu gzip ;
+    - fichier modifié pendant la coupure : If-Range refusé, contenu complet
+      (200) et nouveau fichier écrit ;
+    - sha256 faux : FetchError, CSV en place et partie locale supprimés.
+
+Usage :
+    python -m benchmarks.fetch_test [--size-mb 4]
+"""
+import argparse
+import email.utils
+import gzip
+import hashlib
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from utils import fetch_data
+from utils.fetch_data import STATE_DIRNAME, FetchError, fetch_all, fetch_table
+
+# Table -> mode de service
+TABLES = {
+    'orders': 'raw',
+    'claims': 'gzip',        # Content-Encoding: gzip
+    'customers': 'gz-url',   # fichier .gz, sans en-tête
+}
+
+
+# ===== SERVEUR SIMULÉ =====
+def make_csv(name, size, seed=0):
+    """CSV synthétique d'environ ``size`` octets"""
+    header = f'{name}_id,value,label\n'.encode()
+    rows = []
+    total = len(header)
+    i = 0
+    while total < size:
+        row = f'{i},{(i * 7919 + seed) % 100003},label_{(i + seed) % 97}\n'.encode()
+        rows.append(row)
+        total += len(row)
+        i += 1
+    return header + b''.join(rows)
+
+
+class RemoteFile:
+    """Représentation servie d'une table (octets, validateurs)"""
+
+    def __init__(self, csv, mode):
+        self.csv = csv
+        self.mode = mode
+        self.body = gzip.compress(csv, mtime=0) if mode != 'raw' else csv
+        self.etag = '"' + hashlib.sha256(self.body).hexdigest()[:16] + '"'
+        self.last_modified = email.utils.formatdate(time.time(), usegmt=True)
+        self.sha256 = hashlib.sha256(csv).hexdigest()
+
+
+class RemoteStore:
+    """
+    Fichiers servis + journal des requêtes
+
+    Attributs:
+        files: {chemin: RemoteFile}
+        cuts: {chemin: octets} — la prochaine réponse est coupée après N octets
+        requests: [(chemin, en-têtes utiles, status, octets de contenu envoyés)]
+    """
+
+    def __init__(self):
+        self.files = {}
+        self.cuts = {}
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def publish(self, name, csv, mode):
+        path = f'/{name}.csv.gz' if mode == 'gz-url' else f'/{name}.csv'
+        self.files[path] = RemoteFile(csv, mode)
+        return path
+
+    def log(self, path, headers, status, sent):
+        with self.lock:
+            self.requests.append((path, headers, status, sent))
+
+    def since(self, start):
+        with self.lock:
+            return self.requests[start:]
+
+
+def make_handler(store):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            remote = store.files.get(self.path)
+            asked = {k: self.headers[k] for k in ('Range', 'If-Range', 'If-None-Match', 'If-Modified-Since')
+                     if self.headers.get(k)}
+            if remote is None:
+                self.send_error(404)
+                store.log(self.path, asked, 404, 0)
+                return
+
+            if self.headers.get('If-None-Match') == remote.etag:
+                self.send_response(304)
+                self.send_header('ETag', remote.etag)
+                self.end_headers()
+                store.log(self.path, asked, 304, 0)
+                return
+
+            body, status, start = remote.body, 200, 0
+            byte_range = self.headers.get('Range')
+            if_range = self.headers.get('If-Range')
+            if byte_range and (if_range is None or if_range in (remote.etag, remote.last_modified)):
+                start = int(byte_range.split('=')[1].split('-')[0])
+                if start >= len(body):
+                    self.send_response(416)
+                    self.send_header('Content-Range', f'bytes */{len(body)}')
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    store.log(self.path, asked, 416, 0)
+                    return
+                status = 206
+
+            payload = body[start:]
+            self.send_response(status)
+            self.send_header('ETag', remote.etag)
+            self.send_header('Last-Modified', remote.last_modified)
+            self.send_header('Content-Length', str(len(payload)))
+            if status == 206:
+                self.send_header('Content-Range', f'bytes {start}-{len(body) - 1}/{len(body)}')
+            if remote.mode == 'gzip':
+                self.send_header('Content-Encoding', 'gzip')
+            self.end_headers()
+
+            with store.lock:
+                cut = store.cuts.pop(self.path, None)
+            if cut is not None:
+                payload = payload[:cut]
+            self.wfile.write(payload)
+            self.wfile.flush()
+            store.log(self.path, asked, status, len(payload))
+            if cut is not None:
+                self.close_connection = True
+
+    return Handler
+
+
+class LocalServer:
+    """Serveur HTTP local dans un thread (contexte ``with``)"""
+
+    def __init__(self, store):
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(store))
+        self.url = f'http://127.0.0.1:{self.httpd.server_address[1]}'
+
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+# ===== SCÉNARIOS =====
+class Checks:
+    """Résultats des vérifications"""
+
+    def __init__(self):
+        self.failures = 0
+
+    def __call__(self, label, ok, detail=''):
+        if not ok:
+            self.failures += 1
+        print(f"  [{'✓' if ok else '✗'}] {label}{f' ({detail})' if detail else ''}")
+
+
+def sources_for(store, url, paths):
+    return {
+        name: {'url': url + path, 'sha256': store.files[path].sha256}
+        for name, path in paths.items()
+    }
+
+
+def run(size, quiet=True):
+    """
+    Exécute tous les scénarios
+
+    Returns:
+        int: Nombre de vérifications en échec
+    """
+    log = (lambda *args: None) if quiet else print
+    check = Checks()
+    store = RemoteStore()
+    paths = {name: store.publish(name, make_csv(name, size), mode) for name, mode in TABLES.items()}
+
+    with LocalServer(store) as server, tempfile.TemporaryDirectory() as tmp:
+        data_dir = Path(tmp)
+        sources = sources_for(store, server.url, paths)
+
+        print("Premier téléchargement")
+        start = time.perf_counter()
+        results = fetch_all(data_dir, sources, cache=False, log=log)
+        elapsed = time.perf_counter() - start
+        check("toutes les tables téléchargées", set(results.values()) == {'downloaded'}, results)
+        for name, path in paths.items():
+            same = (data_dir / f'{name}.csv').read_bytes() == store.files[path].csv
+            check(f"{name} ({TABLES[name]}) identique à la source", same)
+        print(f"  {sum(len(f.body) for f in store.files.values()) / 1e6:.1f} Mo servis en {elapsed:.2f}s")
+
+        print("Second passage")
+        mark = len(store.requests)
+        results = fetch_all(data_dir, sources, cache=False, log=log)
+        requests = store.since(mark)
+        check("toutes les tables inchangées", set(results.values()) == {'unchanged'}, results)
+        check("réponses 304 avec If-None-Match",
+              all(status == 304 and 'If-None-Match' in asked for _, asked, status, _ in requests))
+        check("aucun octet de contenu renvoyé", sum(sent for *_, sent in requests) == 0)
+
+        for name in ('orders', 'claims'):
+            print(f"Reprise après coupure : {name} ({TABLES[name]})")
+            path = paths[name]
+            remote = store.files[path] = RemoteFile(make_csv(name, size, seed=1), TABLES[name])
+            store.cuts[path] = len(remote.body) // 2
+            mark = len(store.requests)
+            result = fetch_table(name, {'url': server.url + path, 'sha256': remote.sha256}, data_dir, log=log)
+            requests = store.since(mark)
+            statuses = [status for _, _, status, _ in requests]
+            resumed = requests[-1][1] if requests else {}
+            check("téléchargé après une nouvelle tentative", result == 'downloaded' and statuses == [200, 206], statuses)
+            check("Range + If-Range envoyés", resumed.get('Range') == f'bytes={len(remote.body) // 2}-'
+                  and resumed.get('If-Range') == remote.etag, resumed)
+            sent = sum(s for *_, s in requests)
+            check("seule la fin est renvoyée", sent == len(remote.body), f"{sent:,} / {len(remote.body):,} octets")
+            check("contenu identique à la source", (data_dir / f'{name}.csv').read_bytes() == remote.csv)
+
+        print("Fichier modifié pendant la coupure")
+        path = paths['orders']
+        old = store.files[path] = RemoteFile(make_csv('orders', size, seed=2), 'raw')
+        store.cuts[path] = len(old.body) // 3
+        new = RemoteFile(make_csv('orders', size, seed=3), 'raw')
+        original_sleep = fetch_data.time.sleep
+
+        def publish_then_sleep(seconds):
+            # Le fichier distant change entre la coupure et la reprise
+            store.files[path] = new
+            original_sleep(seconds)
+
+        fetch_data.time.sleep = publish_then_sleep
+        try:
+            mark = len(store.requests)
+            result = fetch_table('orders', {'url': server.url + path, 'sha256': new.sha256}, data_dir, log=log)
+        finally:
+            fetch_data.time.sleep = original_sleep
+        requests = store.since(mark)
+        statuses = [status for _, _, status, _ in requests]
+        check("If-Range refusé : contenu complet renvoyé", statuses == [200, 200]
+              and requests[-1][1].get('If-Range') == old.etag, statuses)
+        check("nouveau contenu écrit", result == 'downloaded'
+              and (data_dir / 'orders.csv').read_bytes() == new.csv)
+
+        print("Empreinte incorrecte")
+        path = paths['customers']
+        store.files[path] = RemoteFile(make_csv('customers', size, seed=4), 'gz-url')
+        before = (data_dir / 'customers.csv').read_bytes()
+        try:
+            fetch_table('customers', {'url': server.url + path, 'sha256': '0' * 64}, data_dir, log=log)
+            raised = False
+        except FetchError:
+            raised = True
+        check("FetchError levée", raised)
+        check("CSV en place conservé", (data_dir / 'customers.csv').read_bytes() == before)
+        check("partie locale supprimée", not (data_dir / STATE_DIRNAME / 'customers.part').exists())
+
+    return check.failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--size-mb', type=float, default=4, help="Taille de chaque CSV servi (Mo)")
+    parser.add_argument('--verbose', action='store_true', help="Affiche les messages de fetch_data")
+    args = parser.parse_args(argv)
+
+    failures = run(int(args.size_mb * 1e6), quiet=not args.verbose)
+    print(f"[{'✗' if failures else '✓'}] {failures} vérification(s) en échec")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,429 @@
+"""
+Test de charge sans navigateur : sessions websocket simulées contre un
+vrai serveur Streamlit
+
+Le script démarre ``streamlit run test1.py`` (ou cible ``--url``) et ouvre
+N sessions websocket concurrentes, comme N onglets de navigateur. Chaque
+session suit un parcours réaliste : accueil, puis Overview, Transport et
+Réclamations, avec sur chaque page des actions tirées au hasard (graine
+par session) : déplacement du curseur de dates, changement des transports
+ou des états, et sur Overview changement de fréquence ou de métrique.
+Chaque action envoie l'état des widgets au serveur, comme le navigateur,
+et attend la fin du rerun.
+
+Les messages du serveur sont décodés avec l'arbre d'éléments de
+``streamlit.testing`` (mêmes sélecteurs qu'AppTest : ``sidebar.slider[0]``...).
+AppTest lui-même ne peut pas servir ici : il remplace le Runtime global à
+chaque exécution et n'accepte pas plusieurs sessions simultanées.
+
+Rapport :
+    - latence des reruns (p50 / p90 / p99 / max) par page et par action ;
+    - débit (reruns par seconde) et volume reçu par rerun ;
+    - mémoire par session : hausse du RSS du serveur entre le préchauffage
+      et la fin du test (sessions gardées ouvertes), divisée par N.
+
+À lancer depuis la racine du projet (``data/`` requis) :
+    python -m benchmarks.load_test [--sessions 8] [--rounds 2] [--actions 4] [--think 0.5]
+"""
+import argparse
+import asyncio
+import json
+import random
+import resource
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from collections import defaultdict
+from pathlib import Path
+
+import numpy as np
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+from streamlit.testing.v1.element_tree import parse_tree_from_messages
+from tornado.websocket import websocket_connect
+
+ROOT = Path(__file__).resolve().parent.parent
+HOME = 'test1.py'
+PAGES = ('overview', 'transport', 'reclamations')
+RUN_TIMEOUT = 300                       # s, par rerun
+STARTUP_TIMEOUT = 60                    # s, démarrage du serveur
+MAX_MESSAGE_SIZE = 256 * 1024 * 1024
+QUANTILES = (50, 90, 99)
+
+FINAL_STATUSES = {
+    ForwardMsg.FINISHED_SUCCESSFULLY,
+    ForwardMsg.FINISHED_WITH_COMPILE_ERROR,
+}
+
+
+# ===== SERVEUR =====
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def process_rss_mb(pid):
+    """RSS d'un processus (Mo), None hors Linux"""
+    try:
+        with open(f'/proc/{pid}/statm') as f:
+            pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return pages * resource.getpagesize() / 1e6
+
+
+class StreamlitServer:
+    """
+    ``streamlit run test1.py`` en sous-processus, le temps d'un bloc with
+
+    Lancé dans le dossier courant, qui doit contenir ``data/`` et ``assets/``.
+    """
+
+    def __init__(self, port=None):
+        self.port = port or free_port()
+        self.url = f'http://127.0.0.1:{self.port}'
+        self.process = None
+
+    def __enter__(self):
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', 'streamlit', 'run', str(ROOT / HOME),
+             '--server.headless', 'true', '--server.port', str(self.port),
+             '--server.fileWatcherType', 'none', '--browser.gatherUsageStats', 'false'],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError("Le serveur Streamlit s'est arrêté au démarrage")
+            try:
+                urllib.request.urlopen(f'{self.url}/_stcore/health', timeout=1)
+                return self
+            except OSError:
+                time.sleep(0.2)
+        self.__exit__()
+        raise RuntimeError(f"Serveur Streamlit injoignable après {STARTUP_TIMEOUT}s")
+
+    def __exit__(self, *exc):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+    def rss_mb(self):
+        return process_rss_mb(self.process.pid) if self.process else None
+
+
+# ===== SESSION =====
+class Session:
+    """
+    Une session navigateur simulée
+
+    Garde, comme le frontend, l'état des widgets modifiés par l'utilisateur
+    et le renvoie à chaque rerun ; ``tree`` est l'arbre d'éléments du
+    dernier rerun.
+    """
+
+    def __init__(self, url):
+        self.ws_url = url.replace('http', 'ws', 1) + '/_stcore/stream'
+        self.ws = None
+        self.pages = {}             # nom de page -> page_script_hash
+        self.page_hash = ''
+        self.widget_states = {}     # id -> WidgetState
+        self.tree = None
+
+    async def connect(self):
+        self.ws = await websocket_connect(
+            self.ws_url, subprotocols=['streamlit'], max_message_size=MAX_MESSAGE_SIZE
+        )
+
+    def set_widget(self, widget, field, value):
+        """
+        Modifie un widget de l'arbre courant (appliqué au prochain rerun)
+
+        Args:
+            widget: Proto du widget dans ``tree`` (``tree.radio[0].proto``...)
+            field: Champ de WidgetState rempli par le frontend pour ce type
+                   de widget ('double_array_value', 'string_value'...)
+            value: Valeur sérialisée (liste pour les champs *_array_value)
+        """
+        state = WidgetState(id=widget.id)
+        if field.endswith('_array_value'):
+            getattr(state, field).data[:] = value
+        else:
+            setattr(state, field, value)
+        self.widget_states[widget.id] = state
+
+    async def rerun(self, page=None):
+        """
+        Demande un rerun et attend sa fin
+
+        Args:
+            page: Page à afficher (nom de fichier sans extension), None pour
+                  rester sur la page courante
+
+        Returns:
+            int: Octets reçus pendant le rerun
+        """
+        if page is not None:
+            self.page_hash = self.pages.get(page, '')
+            self.widget_states.clear()
+
+        msg = BackMsg()
+        msg.rerun_script.page_script_hash = self.page_hash
+        msg.rerun_script.widget_states.widgets.extend(self.widget_states.values())
+        await self.ws.write_message(msg.SerializeToString(), binary=True)
+
+        messages, received = [], 0
+        while True:
+            payload = await asyncio.wait_for(self.ws.read_message(), RUN_TIMEOUT)
+            if payload is None:
+                raise ConnectionError("Websocket fermé par le serveur")
+            received += len(payload)
+            fwd = ForwardMsg()
+            fwd.ParseFromString(payload)
+            kind = fwd.WhichOneof('type')
+            if kind == 'new_session':
+                messages = []
+                self.page_hash = fwd.new_session.page_script_hash
+            elif kind == 'navigation':
+                self.pages.update({p.url_pathname or p.page_name: p.page_script_hash
+                                   for p in fwd.navigation.app_pages})
+            elif kind == 'script_finished' and fwd.script_finished in FINAL_STATUSES:
+                break
+            messages.append(fwd)
+
+        self.tree = parse_tree_from_messages(messages)
+        return received
+
+    def close(self):
+        if self.ws is not None:
+            self.ws.close()
+
+
+# ===== ACTIONS =====
+# Chaque action modifie un widget de la page courante et renvoie son nom.
+# Les valeurs sont sérialisées comme par le frontend : curseur de dates en
+# microsecondes, multiselect et selectbox par libellé, radio par index.
+DAY_US = 86_400 * 10**6
+
+
+def move_dates(session, rng):
+    slider = session.tree.sidebar.slider[0].proto
+    span = int((slider.max - slider.min) // DAY_US)
+    length = rng.randint(min(30, span), span)
+    start = slider.min + rng.randint(0, span - length) * DAY_US
+    session.set_widget(slider, 'double_array_value', [start, start + length * DAY_US])
+    return 'dates'
+
+
+def pick_transports(session, rng):
+    widget = session.tree.sidebar.multiselect[0].proto
+    options = list(widget.options)
+    session.set_widget(widget, 'string_array_value', rng.sample(options, rng.randint(1, len(options))))
+    return 'transports'
+
+
+def pick_states(session, rng):
+    widget = session.tree.sidebar.multiselect[1].proto
+    options = list(widget.options)
+    session.set_widget(widget, 'string_array_value', rng.sample(options, rng.randint(0, min(5, len(options)))))
+    return 'states'
+
+
+def switch_frequency(session, rng):
+    widget = session.tree.selectbox[0].proto
+    session.set_widget(widget, 'string_value', rng.choice(list(widget.options)))
+    return 'frequency'
+
+
+def switch_metric(session, rng):
+    widget = session.tree.radio[0].proto
+    session.set_widget(widget, 'int_value', rng.randrange(len(widget.options)))
+    return 'metric'
+
+
+FILTER_ACTIONS = (move_dates, pick_transports, pick_states)
+PAGE_ACTIONS = {
+    'overview': FILTER_ACTIONS + (switch_frequency, switch_metric),
+    'transport': FILTER_ACTIONS,
+    'reclamations': FILTER_ACTIONS,
+}
+
+
+# ===== PARCOURS =====
+class Recorder:
+    """Latences et volumes des reruns de toutes les sessions"""
+
+    def __init__(self):
+        self.samples = defaultdict(list)  # (page, action) -> [secondes]
+        self.bytes = []
+        self.errors = []
+
+    async def rerun(self, session, page_label, action, page=None):
+        start = time.perf_counter()
+        try:
+            received = await session.rerun(page)
+        except (asyncio.TimeoutError, ConnectionError) as e:
+            self.errors.append(f"{page_label} [{action}] {e!r}")
+            raise
+        self.samples[(page_label, action)].append(time.perf_counter() - start)
+        self.bytes.append(received)
+        for exc in session.tree.exception:
+            self.errors.append(f"{page_label} [{action}] {exc.message}")
+
+
+async def run_session(url, session_id, recorder, rounds=2, actions=4, think=0.0, seed=0):
+    """
+    Un parcours utilisateur complet
+
+    Args:
+        url: URL du serveur
+        session_id: Numéro de session (dérive la graine)
+        recorder: Recorder partagé
+        rounds: Passages sur l'ensemble des pages
+        actions: Actions par page et par passage
+        think: Pause entre deux actions (s), temps de lecture de l'utilisateur
+        seed: Graine de base
+
+    Returns:
+        Session: Session ouverte (fermée par l'appelant, après la mesure mémoire)
+    """
+    rng = random.Random(seed * 100_003 + session_id)
+    session = Session(url)
+    await session.connect()
+    await recorder.rerun(session, 'home', 'open')
+
+    for _ in range(rounds):
+        for page in PAGES:
+            await recorder.rerun(session, page, 'open', page=page)
+            for _ in range(actions):
+                await asyncio.sleep(think)
+                action = rng.choice(PAGE_ACTIONS[page])(session, rng)
+                await recorder.rerun(session, page, action)
+    return session
+
+
+async def warm_up(url):
+    """Une exécution de chaque page : chargement du dataset et des caches partagés"""
+    session = Session(url)
+    await session.connect()
+    timings = {}
+    for page in (None, *PAGES):
+        start = time.perf_counter()
+        await session.rerun(page)
+        timings[page or 'home'] = time.perf_counter() - start
+        if session.tree.exception:
+            raise RuntimeError(f"{page or 'home'} : {session.tree.exception[0].message}")
+    session.close()
+    return timings
+
+
+async def load_test(url, sessions=8, rounds=2, actions=4, think=0.0, seed=0, rss=None):
+    """
+    Lance ``sessions`` parcours concurrents après un préchauffage
+
+    Args:
+        url: URL du serveur
+        rss: Fonction renvoyant le RSS du serveur (Mo), None si inconnu
+
+    Returns:
+        dict: Rapport (latences, débit, mémoire, erreurs)
+    """
+    rss = rss or (lambda: None)
+    cold = await warm_up(url)
+    rss_start = rss()
+
+    recorder = Recorder()
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *(run_session(url, i, recorder, rounds, actions, think, seed) for i in range(sessions)),
+        return_exceptions=True,
+    )
+    wall = time.perf_counter() - start
+    rss_end = rss()
+    for result in results:
+        if isinstance(result, Session):
+            result.close()
+        elif not isinstance(result, (asyncio.TimeoutError, ConnectionError)):
+            # Déjà journalisées par le Recorder ; le reste (widget introuvable...) non
+            recorder.errors.append(f"session : {result!r}")
+
+    stats = {}
+    for (page, action), samples in sorted(recorder.samples.items()):
+        values = np.percentile(samples, QUANTILES) * 1000
+        stats[f'{page}:{action}'] = {
+            'count': len(samples),
+            **{f'p{q}_ms': float(v) for q, v in zip(QUANTILES, values)},
+            'max_ms': max(samples) * 1000,
+        }
+    all_samples = [s for samples in recorder.samples.values() for s in samples]
+    overall = np.percentile(all_samples, QUANTILES) * 1000 if all_samples else [np.nan] * len(QUANTILES)
+
+    return {
+        'sessions': sessions,
+        'reruns': len(all_samples),
+        'wall_s': wall,
+        'throughput_rps': len(all_samples) / wall,
+        'overall': {f'p{q}_ms': float(v) for q, v in zip(QUANTILES, overall)},
+        'kb_per_rerun': float(np.mean(recorder.bytes)) / 1e3 if recorder.bytes else 0.0,
+        'cold_start_ms': {page: t * 1000 for page, t in cold.items()},
+        'mb_per_session': (rss_end - rss_start) / sessions if rss_start and rss_end else None,
+        'stats': stats,
+        'errors': recorder.errors,
+    }
+
+
+def print_report(report):
+    print(f"{'rerun':<26} {'n':>5} {'p50 (ms)':>9} {'p90 (ms)':>9} {'p99 (ms)':>9} {'max (ms)':>9}")
+    for name, row in report['stats'].items():
+        print(f"{name:<26} {row['count']:>5} {row['p50_ms']:>9.0f} {row['p90_ms']:>9.0f} "
+              f"{row['p99_ms']:>9.0f} {row['max_ms']:>9.0f}")
+    overall = report['overall']
+    print(f"\n{report['sessions']} sessions, {report['reruns']} reruns en {report['wall_s']:.1f}s "
+          f"-> {report['throughput_rps']:.2f} reruns/s "
+          f"(p50 {overall['p50_ms']:.0f} ms, p99 {overall['p99_ms']:.0f} ms, "
+          f"{report['kb_per_rerun']:.0f} Ko reçus par rerun)")
+    if report['mb_per_session'] is not None:
+        print(f"Mémoire serveur : {report['mb_per_session']:.1f} Mo par session")
+    for error in report['errors']:
+        print(f"[✗] {error}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sessions', type=int, default=8)
+    parser.add_argument('--rounds', type=int, default=2, help="Passages sur les pages par session")
+    parser.add_argument('--actions', type=int, default=4, help="Actions par page et par passage")
+    parser.add_argument('--think', type=float, default=0.0, help="Pause entre deux actions (s)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--url', help="Serveur déjà lancé (sinon démarré par le script ; "
+                                      "la mémoire n'est mesurée que dans ce cas)")
+    parser.add_argument('--json', help="Écrit aussi le rapport dans ce fichier")
+    args = parser.parse_args(argv)
+
+    def run(url, rss=None):
+        return asyncio.run(load_test(
+            url, args.sessions, args.rounds, args.actions, args.think, args.seed, rss=rss
+        ))
+
+    if args.url:
+        report = run(args.url.rstrip('/'))
+    else:
+        with StreamlitServer() as server:
+            report = run(server.url, rss=server.rss_mb)
+
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 1 if report['errors'] else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
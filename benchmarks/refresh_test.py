@@ -0,0 +1,264 @@
+"""
+Test du rechargement du dataset (rebuild_dataset) sur des CSV qui évoluent
+
+Génère un jeu synthétique dans un dossier temporaire, en publie une
+première version (les ``--orders`` premières commandes), puis enchaîne des
+modifications des CSV en appelant à chaque fois ``rebuild_dataset``, comme
+le thread de rechargement :
+
+    - ``touch`` d'un CSV et re-téléchargement à l'identique : même version,
+      empreintes du manifest mises à jour, aucun CSV haché en entier ;
+    - ajout de commandes avec une ligne en cours d'écriture : seules les
+      lignes complètes sont ingérées, le manifest reste valide ;
+    - fin de la ligne : ajout incrémental suivant ;
+    - contenu modifié : build complet ;
+    - reconstruction en échec : ancien handle servi, erreur signalée au
+      store, nouvel essai après le délai (DatasetRefresher).
+
+À chaque étape : la version active se recharge au démarrage
+(``load_current`` avec contrôle des sources), le cube quotidien du handle
+est celui d'un calcul complet, le dataset est celui d'un build complet.
+
+Usage :
+    python -m benchmarks.refresh_test [--orders 6000]
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from benchmarks.synthetic import generate
+from utils import incremental
+from utils.cube import build_daily_cube
+from utils.data_loader import (
+    CACHE_VERSION, TABLES, get_daily_cube, load_main_dataset, read_dataset_tables, rebuild_dataset
+)
+from utils.build_dataset import build
+from utils.dataset_handle import DatasetHandle, DatasetStore
+from utils.materialized import current_version, load_current
+from utils.refresher import DatasetRefresher
+
+ORDER_TABLES = ('orders', 'order_product', 'order_route_leg', 'claims')
+
+
+class Checks:
+    """Résultats des vérifications"""
+
+    def __init__(self):
+        self.failures = 0
+
+    def __call__(self, label, ok, detail=''):
+        if not ok:
+            self.failures += 1
+        print(f"  [{'✓' if ok else '✗'}] {label}{f' ({detail})' if detail else ''}")
+
+
+class DigestCounter:
+    """Compte les sha256 de fichiers calculés par utils.incremental"""
+
+    def __init__(self):
+        self.calls = []
+        self._digest = incremental.file_digest
+
+    def __enter__(self):
+        def counted(path, *args, **kwargs):
+            self.calls.append(Path(path).stem)
+            return self._digest(path, *args, **kwargs)
+        incremental.file_digest = counted
+        return self
+
+    def __exit__(self, *exc):
+        incremental.file_digest = self._digest
+
+
+class CubeUpdates:
+    """Compte les cubes mis à jour incrémentalement (incremental.update_cube)"""
+
+    def __init__(self):
+        self.calls = 0
+        self._update = incremental.update_cube
+
+    def __enter__(self):
+        def counted(*args, **kwargs):
+            self.calls += 1
+            return self._update(*args, **kwargs)
+        incremental.update_cube = counted
+        return self
+
+    def __exit__(self, *exc):
+        incremental.update_cube = self._update
+
+
+def order_prefixes(full_dir, n_orders):
+    """Taille (octets) des lignes des commandes <= n_orders dans chaque CSV"""
+    sizes = {}
+    for name in TABLES:
+        data = (full_dir / f'{name}.csv').read_bytes()
+        if name not in ORDER_TABLES:
+            sizes[name] = len(data)
+            continue
+        ids = pd.read_csv(full_dir / f'{name}.csv', usecols=['order_id'])['order_id']
+        lines = int((ids <= n_orders).sum()) + 1
+        sizes[name] = len(b''.join(data.splitlines(keepends=True)[:lines]))
+    return sizes
+
+
+def append_bytes(path, data):
+    with open(path, 'ab') as f:
+        f.write(data)
+
+
+def check_handle(check, handle, reference_dir):
+    """Version rechargeable au démarrage, cube et dataset identiques à un calcul complet"""
+    df, manifest = load_current('data', pipeline_version=CACHE_VERSION)
+    check("version active rechargée au démarrage", df is not None and manifest['version'] == handle.build)
+    cube = get_daily_cube(handle)
+    expected = build_daily_cube(handle.main)
+    try:
+        pd.testing.assert_frame_equal(cube.reset_index(drop=True), expected.reset_index(drop=True))
+        same_cube = True
+    except AssertionError:
+        same_cube = False
+    check("cube quotidien = calcul complet", same_cube)
+
+    # Référence : mêmes CSV, sans ligne en cours d'écriture
+    shutil.rmtree(reference_dir, ignore_errors=True)
+    reference_dir.mkdir()
+    for name in TABLES:
+        data = Path('data', f'{name}.csv').read_bytes()
+        (reference_dir / f'{name}.csv').write_bytes(data[:data.rfind(b'\n') + 1])
+    build(reference_dir, log=lambda *args: None)
+    reference, _ = load_current(reference_dir)
+    try:
+        pd.testing.assert_frame_equal(
+            handle.main.sort_values('order_id', ignore_index=True),
+            reference.sort_values('order_id', ignore_index=True),
+            check_dtype=False, check_categorical=False,
+        )
+        same_data = True
+    except AssertionError:
+        same_data = False
+    check(f"dataset = build complet ({handle.n_rows:,} lignes)", same_data)
+
+
+def run(n_orders):
+    """
+    Exécute tous les scénarios
+
+    Returns:
+        int: Nombre de vérifications en échec
+    """
+    check = Checks()
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        full_dir, reference_dir = tmp / 'full', tmp / 'reference'
+        generate(full_dir, n_orders + n_orders // 4, seed=0, log=lambda *args: None)
+        full = {name: (full_dir / f'{name}.csv').read_bytes() for name in TABLES}
+        first = order_prefixes(full_dir, n_orders)
+
+        data_dir = tmp / 'data'
+        data_dir.mkdir()
+        for name in TABLES:
+            (data_dir / f'{name}.csv').write_bytes(full[name][:first[name]])
+        os.chdir(tmp)  # DATA_DIR est relatif
+        try:
+            # Handle initial construit comme get_dataset_store
+            df, build_name = load_main_dataset()
+            handle = DatasetHandle(df, load_tables=read_dataset_tables, build=build_name)
+            check("handle initial rattaché à sa version", build_name == current_version(data_dir))
+
+            print("touch d'un CSV")
+            version = current_version(data_dir)
+            os.utime(data_dir / 'orders.csv')
+            with DigestCounter() as digests:
+                handle = rebuild_dataset(handle)
+            check("même version servie", handle.build == version)
+            check("seul le CSV touché est haché", digests.calls == ['orders'], digests.calls)
+            check_handle(check, handle, reference_dir)
+
+            print("Re-téléchargement à l'identique")
+            (data_dir / 'customers.csv').write_bytes((data_dir / 'customers.csv').read_bytes())
+            handle = rebuild_dataset(handle)
+            check("même version servie", handle.build == version)
+
+            print("Ajout de commandes, dernière ligne en cours d'écriture")
+            second = order_prefixes(full_dir, n_orders + n_orders // 8)
+            for name in ORDER_TABLES:
+                append_bytes(data_dir / f'{name}.csv', full[name][first[name]:second[name]])
+            last_line = full['orders'][:second['orders']].splitlines(keepends=True)[-1]
+            extra = last_line.replace(last_line.split(b',')[0], str(10 ** 9).encode(), 1)
+            append_bytes(data_dir / 'orders.csv', extra[:len(extra) // 2])
+            with DigestCounter() as digests, CubeUpdates() as cube_updates:
+                handle = rebuild_dataset(handle)
+            check("nouvelle version incrémentale", handle.build != version)
+            check("aucun CSV haché", not digests.calls, digests.calls)
+            check("cube du handle initial complété (update_cube)", cube_updates.calls == 1)
+            check("lignes complètes seules ingérées", handle.n_rows == n_orders + n_orders // 8, f"{handle.n_rows:,}")
+            check_handle(check, handle, reference_dir)
+
+            print("Fin de la ligne en cours d'écriture")
+            append_bytes(data_dir / 'orders.csv', extra[len(extra) // 2:])
+            version = handle.build
+            handle = rebuild_dataset(handle)
+            check("commande ajoutée", handle.build != version
+                  and handle.n_rows == n_orders + n_orders // 8 + 1, f"{handle.n_rows:,}")
+            check_handle(check, handle, reference_dir)
+
+            print("touch après un incrémental (sha256 inconnu)")
+            version = handle.build
+            os.utime(data_dir / 'order_route_leg.csv')
+            handle = rebuild_dataset(handle)
+            check("même version servie", handle.build == version)
+            check_handle(check, handle, reference_dir)
+
+            print("Contenu modifié : build complet")
+            path = data_dir / 'states_risk.csv'
+            path.write_bytes(path.read_bytes() + path.read_bytes().splitlines(keepends=True)[-1])
+            handle = rebuild_dataset(handle)
+            check("nouvelle version", handle.build != version)
+            check_handle(check, handle, reference_dir)
+
+            print("Reconstruction en échec puis nouvel essai")
+            store = DatasetStore(handle)
+            attempts = []
+
+            def flaky_rebuild(previous):
+                attempts.append(time.monotonic())
+                if len(attempts) == 1:
+                    raise RuntimeError("échec simulé")
+                return rebuild_dataset(previous)
+
+            refresher = DatasetRefresher(store, data_dir, TABLES, flaky_rebuild, interval=0.05)
+            os.utime(data_dir / 'products.csv')
+            refresher.check()  # changement détecté, attente d'un cycle stable
+            swapped = refresher.check()
+            check("échec : ancien handle servi et erreur signalée",
+                  not swapped and store.current() is handle and store.refresh_error == "échec simulé")
+            check("pas de nouvel essai avant le délai", not refresher.check() and len(attempts) == 1)
+            time.sleep(max(0.0, refresher.retry_at - time.monotonic()) + 0.01)
+            swapped = refresher.check()
+            check("nouvel essai réussi, erreur effacée",
+                  swapped and len(attempts) == 2 and store.refresh_error is None)
+        finally:
+            os.chdir(cwd)
+
+    return check.failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--orders', type=int, default=6000, help="Commandes de la première version")
+    args = parser.parse_args(argv)
+
+    failures = run(args.orders)
+    print(f"[{'✗' if failures else '✓'}] {failures} vérification(s) en échec")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
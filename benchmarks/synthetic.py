@@ -0,0 +1,239 @@
+"""
+Générateur de données synthétiques (les 8 CSV de ``data/``)
+
+Reproduit les colonnes, types et cardinalités du jeu réel : ~1 client
+pour 5 commandes, 200 produits, 50 états, 4 modes de transport, 1 à 3
+produits et 1 à 4 étapes de route par commande, ~8 % de commandes
+réclamées. Saisonnalité de Noël : du 15 novembre au 31 décembre, volume
+de commandes x2.5, paniers plus gros et vols plus fréquents
+(``seasonal_period`` = 'Christmas').
+
+Les commandes sont générées et écrites par blocs : 10M commandes tiennent
+en mémoire. Même graine -> mêmes fichiers.
+
+Usage :
+    python -m benchmarks.synthetic --orders 1000000 --out /tmp/bench_data [--seed 0]
+"""
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+SCALES = {'10k': 10_000, '100k': 100_000, '1m': 1_000_000, '10m': 10_000_000}
+
+START_DATE = '2022-01-01'
+END_DATE = '2024-12-31'
+CHUNK_ORDERS = 500_000
+
+N_PRODUCTS = 200
+N_STATES = 50
+ORDERS_PER_CUSTOMER = 5
+CHRISTMAS_WEIGHT = 2.5
+CLAIM_RATE = 0.08
+
+TRANSPORT_MODES = pd.DataFrame({
+    'transport_id': [1, 2, 3, 4],
+    'transport_type': ['road', 'train', 'plane', 'last_mile'],
+    'cost_per_km': [0.5, 0.3, 2.0, 0.8],
+    'co2_emission_per_km': [0.10, 0.03, 0.50, 0.12],
+})
+
+
+def parse_scale(value):
+    """'10k', '1m', '10m' ou un entier -> nombre de commandes"""
+    return SCALES.get(str(value).lower()) or int(str(value).replace('_', ''))
+
+
+def state_codes():
+    return np.array([f'S{i:02d}' for i in range(N_STATES)])
+
+
+# ===== DIMENSIONS =====
+def make_products(rng):
+    return pd.DataFrame({
+        'product_id': np.arange(1, N_PRODUCTS + 1),
+        'fragility_class': rng.choice(['Low', 'Medium', 'High'], N_PRODUCTS, p=[0.3, 0.35, 0.35]),
+        'theft_attractiveness_score': rng.uniform(0, 10, N_PRODUCTS).round(2),
+        'christmas_popularity_multiplier': rng.uniform(1, 3, N_PRODUCTS).round(2),
+    })
+
+
+def make_states(rng):
+    codes = state_codes()
+    return pd.DataFrame({'state_code': codes, 'state_name': codes, 'risk_score': rng.uniform(0, 1, N_STATES)})
+
+
+def make_customers(rng, n_customers, start=START_DATE):
+    first_registration = pd.Timestamp(start) - np.timedelta64(730, 'D')
+    registration = first_registration + pd.to_timedelta(rng.integers(0, 900, n_customers), unit='D')
+    churned = rng.random(n_customers) < 0.2
+    churn_date = registration + pd.to_timedelta(rng.integers(180, 1500, n_customers), unit='D')
+    return pd.DataFrame({
+        'customer_id': np.arange(1, n_customers + 1),
+        'subscription_type': rng.choice(['Basic', 'Premium'], n_customers),
+        'registration_date': registration.strftime('%Y-%m-%d'),
+        'churn_status': np.where(churned, 'Churned', 'Active'),
+        'churn_date': np.where(churned, churn_date.strftime('%Y-%m-%d'), ''),
+    })
+
+
+# ===== COMMANDES =====
+def calendar(start=START_DATE, end=END_DATE):
+    """Jours de la période, poids de tirage et indicateur de Noël"""
+    days = pd.date_range(start, end, freq='D')
+    christmas = ((days.month == 11) & (days.day >= 15)) | (days.month == 12)
+    weights = np.where(christmas, CHRISTMAS_WEIGHT, 1.0)
+    return days, weights / weights.sum(), christmas
+
+
+def make_orders_chunk(rng, first_id, n, n_customers, days, weights, christmas):
+    """
+    Un bloc de commandes et leurs tables filles
+
+    Returns:
+        dict: {table: DataFrame} pour orders, order_product, order_route_leg, claims
+    """
+    order_id = np.arange(first_id, first_id + n)
+    day_idx = rng.choice(len(days), n, p=weights)
+    order_date = days[day_idx]
+    is_christmas = christmas[day_idx]
+    codes = state_codes()
+
+    estimated = order_date + np.timedelta64(3, 'D')
+    actual = estimated + pd.to_timedelta(rng.integers(-2, 3, n), unit='D')
+    claim_flag = rng.random(n) < CLAIM_RATE
+    amount = rng.gamma(2.0, 60.0, n) * np.where(is_christmas, 1.3, 1.0)
+
+    orders = pd.DataFrame({
+        'order_id': order_id,
+        'customer_id': rng.integers(1, n_customers + 1, n),
+        'transport_id': rng.integers(1, 5, n),
+        'order_date': order_date.strftime('%Y-%m-%d'),
+        'estimated_delivery_date': estimated.strftime('%Y-%m-%d'),
+        'actual_delivery_date': actual.strftime('%Y-%m-%d'),
+        'total_amount': amount.round(2),
+        'delivery_status': rng.choice(['Delivered', 'In Transit', 'Lost'], n, p=[0.85, 0.10, 0.05]),
+        'claim_flag': claim_flag,
+        'payment_status': rng.choice(['Paid', 'Pending'], n),
+        'seasonal_period': np.where(is_christmas, 'Christmas', 'Normal'),
+        'state_code': rng.choice(codes, n),
+    })
+
+    # Produits : 1 à 3 lignes par commande
+    lines = rng.integers(1, 4, n)
+    line_order = np.repeat(order_id, lines)
+    m = len(line_order)
+    quantity = rng.integers(1, 4, m)
+    order_product = pd.DataFrame({
+        'order_id': line_order,
+        'product_id': rng.integers(1, N_PRODUCTS + 1, m),
+        'quantity': quantity,
+        'line_total': (rng.gamma(2.0, 10.0, m) * quantity).round(2),
+        'return_flag': rng.random(m) < 0.05,
+        'refund_amount': 0.0,
+    })
+
+    # Étapes de route : 1 à 4 par commande, vols plus fréquents à Noël
+    legs = rng.integers(1, 5, n)
+    leg_order = np.repeat(order_id, legs)
+    k = len(leg_order)
+    leg_christmas = np.repeat(is_christmas, legs)
+    sequence = np.arange(k) - np.repeat(np.cumsum(legs) - legs, legs) + 1
+    duration = rng.uniform(1, 20, k).round(1)
+    entered = np.repeat(order_date, legs) + pd.to_timedelta(rng.integers(0, 72, k), unit='h')
+    order_route_leg = pd.DataFrame({
+        'order_id': leg_order,
+        'leg_sequence': sequence,
+        'state_code': rng.choice(codes, k),
+        'vandalism_incidents': rng.poisson(0.05, k),
+        'theft_incident_flag': rng.random(k) < np.where(leg_christmas, 0.03, 0.015),
+        'distance_km': rng.uniform(10, 500, k).round(1),
+        'leg_duration_hours': duration,
+        'entered_at': entered.strftime('%Y-%m-%d %H:%M:%S'),
+        'exited_at': (entered + pd.to_timedelta(np.ceil(duration), unit='h')).strftime('%Y-%m-%d %H:%M:%S'),
+    })
+
+    # Réclamations : une par commande réclamée
+    claimed = np.flatnonzero(claim_flag)
+    c = len(claimed)
+    claim_date = order_date[claimed] + pd.to_timedelta(rng.integers(1, 60, c), unit='D')
+    resolution = rng.integers(1, 30, c)
+    claims = pd.DataFrame({
+        'claim_id': claimed + first_id,  # renuméroté à l'écriture
+        'order_id': order_id[claimed],
+        'claim_type': rng.choice(['Damage', 'Delay', 'Theft'], c),
+        'claim_status': rng.choice(['Open', 'Closed'], c),
+        'claim_amount': rng.gamma(2.0, 20.0, c).round(2),
+        'refunded_amount': rng.gamma(2.0, 10.0, c).round(2),
+        'resolution_time_days': resolution,
+        'claim_date': claim_date.strftime('%Y-%m-%d'),
+        'resolution_date': (claim_date + pd.to_timedelta(resolution, unit='D')).strftime('%Y-%m-%d'),
+    })
+
+    return {'orders': orders, 'order_product': order_product,
+            'order_route_leg': order_route_leg, 'claims': claims}
+
+
+# ===== ÉCRITURE =====
+def generate(out_dir, n_orders, seed=0, chunk_orders=CHUNK_ORDERS, log=print):
+    """
+    Écrit les 8 CSV d'un jeu synthétique de ``n_orders`` commandes
+
+    Args:
+        out_dir: Dossier de sortie (créé si besoin, CSV existants remplacés)
+        n_orders: Nombre de commandes
+        seed: Graine du générateur
+        chunk_orders: Commandes générées par bloc
+        log: Fonction d'affichage des messages
+
+    Returns:
+        dict: {table: nombre de lignes}
+    """
+    start = time.perf_counter()
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+
+    n_customers = max(1, n_orders // ORDERS_PER_CUSTOMER)
+    make_products(rng).to_csv(out_dir / 'products.csv', index=False)
+    make_states(rng).to_csv(out_dir / 'states_risk.csv', index=False)
+    TRANSPORT_MODES.to_csv(out_dir / 'transport_mode.csv', index=False)
+    make_customers(rng, n_customers).to_csv(out_dir / 'customers.csv', index=False)
+    counts = {'products': N_PRODUCTS, 'states_risk': N_STATES,
+              'transport_mode': len(TRANSPORT_MODES), 'customers': n_customers}
+
+    days, weights, christmas = calendar()
+    next_claim_id = 0
+    for first in range(0, n_orders, chunk_orders):
+        n = min(chunk_orders, n_orders - first)
+        tables = make_orders_chunk(rng, first + 1, n, n_customers, days, weights, christmas)
+        claims = tables['claims']
+        claims['claim_id'] = np.arange(next_claim_id, next_claim_id + len(claims))
+        next_claim_id += len(claims)
+
+        for name, df in tables.items():
+            df.to_csv(out_dir / f'{name}.csv', index=False,
+                      mode='w' if first == 0 else 'a', header=first == 0)
+            counts[name] = counts.get(name, 0) + len(df)
+
+    log(f"[✓] {n_orders:,} commandes générées dans {out_dir} "
+        f"({time.perf_counter() - start:.1f}s)")
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--orders', default='10k', help="10k, 100k, 1m, 10m ou un entier")
+    parser.add_argument('--out', required=True, help="Dossier de sortie")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    counts = generate(args.out, parse_scale(args.orders), seed=args.seed)
+    for name, rows in counts.items():
+        print(f"  {name:<16} {rows:>12,} lignes")
+
+
+if __name__ == '__main__':
+    main()
@@ -2,10 +2,12 @@ import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
 from pathlib import Path
-from utils.data_loader import prepare_main_dataset, get_kpi_metrics
+from utils.data_loader import get_dataset, get_daily_cube, get_kpi_engine
+from utils.cube import slice_cube, cube_timeseries
 from utils.charts import create_line_chart, create_comparison_chart, create_bar_chart
 from utils.helpers import format_currency, format_percentage, calculate_growth_rate
-from utils.sidebar import render_sidebar, apply_filters
+from utils.profiling import start_run, stage, end_run
+from utils.sidebar import render_sidebar
 
 # ===== CONFIGURATION =====
 logo_path = Path(__file__).parent.parent / "assets" / "logo1.png"
@@ -21,19 +23,35 @@ st.set_page_config(
 with open('assets/styles.css') as f:
     st.markdown(f'<style>{f.read()}</style>', unsafe_allow_html=True)
 
-# ===== CHARGEMENT DES DONNÉES =====
-@st.cache_data
-def load_data():
-    return prepare_main_dataset()
+# Chronométrage des étapes (voir utils.profiling, ?debug=1 pour le panneau)
+start_run('overview')
 
-df_full = load_data()
+# ===== CHARGEMENT DES DONNÉES =====
+# Un seul handle pour toute l'exécution (même version même en cas de rechargement)
+with stage('load'):
+    dataset = get_dataset()
+    df_full = dataset.main
 
 # ===== SIDEBAR AVEC NAVIGATION =====
-filters = render_sidebar(df_full)  # 👈 AJOUTÉ
-df = apply_filters(df_full, filters)  # 👈 AJOUTÉ (pour l'instant retourne tout)
+with stage('sidebar'):
+    filters = render_sidebar(df_full)  # 👈 AJOUTÉ
+
+# Les KPI (moteur à sommes préfixes) et graphiques de la page sont servis
+# par le cube quotidien
+with stage('filters'):
+    cube = get_daily_cube(dataset)
+    engine = get_kpi_engine(dataset)
+    cube_current = slice_cube(
+        cube, filters['start_date'], filters['end_date'],
+        filters['transport_filter'], filters['state_filter']
+    )
 
 # Recalculer les KPI avec données filtrées
-kpis = get_kpi_metrics(df)
+with stage('kpis'):
+    kpis = engine.query(
+        filters['start_date'], filters['end_date'],
+        filters['transport_filter'], filters['state_filter']
+    )
 
 # Initialiser l'état de sélection KPI
 if 'selected_kpi' not in st.session_state:
@@ -55,17 +73,14 @@ period_duration = (current_end - current_start).days
 previous_start = current_start - pd.Timedelta(days=period_duration + 1)
 previous_end = current_start - pd.Timedelta(days=1)
 
-# Données période précédente
-df_previous = df_full[
-    (df_full['order_date'].dt.date >= previous_start) &
-    (df_full['order_date'].dt.date <= previous_end)
-]
-
 # KPI période actuelle (déjà calculés)
 kpis_current = kpis
 
-# KPI période précédente
-kpis_previous = get_kpi_metrics(df_previous) if len(df_previous) > 0 else None
+# KPI période précédente (aucune commande -> pas de comparaison)
+with stage('kpis_previous'):
+    kpis_previous = engine.query(previous_start, previous_end)
+if kpis_previous['nb_orders'] == 0:
+    kpis_previous = None
 
 # ===== CALCUL DES DELTAS =====
 if kpis_previous:
@@ -153,20 +168,6 @@ st.markdown("---")
 # ===== SECTION GRAPHIQUES INTERACTIFS =====
 st.subheader("Analyse Temporelle")
 
-# Préparer les données temporelles quotidiennes
-df_daily = df.groupby(df['order_date'].dt.date).agg({
-    'total_amount': 'sum',
-    'order_id': 'count',
-    'is_delivered': 'mean',
-    'has_claim': 'mean',
-    'claim_amount': 'sum'
-}).reset_index()
-
-df_daily.columns = ['date', 'ca_daily', 'nb_orders', 'delivery_rate', 'claim_rate', 'claim_amount']
-df_daily['date'] = pd.to_datetime(df_daily['date'])
-df_daily['delivery_rate'] = df_daily['delivery_rate'] * 100
-df_daily['claim_rate'] = df_daily['claim_rate'] * 100
-
 # ===== SÉLECTEURS =====
 col_graph, col_freq = st.columns([3, 1])
 
@@ -190,60 +191,28 @@ with col_freq:
 st.markdown("---")
 
 # ===== AGRÉGATION SELON LA FRÉQUENCE =====
-if frequency == "Quotidien":
-    df_display = df_daily.copy()
-    freq_label = "quotidien"
-    date_col = 'date'
-
-elif frequency == "Hebdomadaire":
-    df_daily['week'] = df_daily['date'].dt.to_period('W').dt.to_timestamp()
-    df_display = df_daily.groupby('week').agg({
-        'ca_daily': 'sum',
-        'nb_orders': 'sum',
-        'delivery_rate': 'mean',
-        'claim_rate': 'mean',
-        'claim_amount': 'sum'
-    }).reset_index()
-    df_display.columns = ['date', 'ca_daily', 'nb_orders', 'delivery_rate', 'claim_rate', 'claim_amount']
-    freq_label = "hebdomadaire"
-    date_col = 'date'
-
-elif frequency == "Mensuel":
-    df_daily['month'] = df_daily['date'].dt.to_period('M').dt.to_timestamp()
-    df_display = df_daily.groupby('month').agg({
-        'ca_daily': 'sum',
-        'nb_orders': 'sum',
-        'delivery_rate': 'mean',
-        'claim_rate': 'mean',
-        'claim_amount': 'sum'
-    }).reset_index()
-    df_display.columns = ['date', 'ca_daily', 'nb_orders', 'delivery_rate', 'claim_rate', 'claim_amount']
-    freq_label = "mensuel"
-    date_col = 'date'
-
-else:  # Annuel
-    df_daily['year'] = df_daily['date'].dt.to_period('Y').dt.to_timestamp()
-    df_display = df_daily.groupby('year').agg({
-        'ca_daily': 'sum',
-        'nb_orders': 'sum',
-        'delivery_rate': 'mean',
-        'claim_rate': 'mean',
-        'claim_amount': 'sum'
-    }).reset_index()
-    df_display.columns = ['date', 'ca_daily', 'nb_orders', 'delivery_rate', 'claim_rate', 'claim_amount']
-    freq_label = "annuel"
-    date_col = 'date'
+# Roll-up du cube : les taux sont des ratios de sommes sur chaque période
+freq_code, freq_label = {
+    "Quotidien": ('D', "quotidien"),
+    "Hebdomadaire": ('W', "hebdomadaire"),
+    "Mensuel": ('M', "mensuel"),
+    "Annuel": ('Y', "annuel"),
+}[frequency]
+with stage('aggregation'):
+    df_display = cube_timeseries(cube_current, freq=freq_code)
+date_col = 'date'
 
 # ===== AFFICHAGE DU GRAPHIQUE =====
 if selected_graph == ":material/attach_money: Chiffre d'Affaires":
-    fig = create_line_chart(
-        df_display, 
-        x=date_col, 
-        y='ca_daily',
-        title="Évolution du Chiffre d'Affaires",
-        subtitle=f"Montant {freq_label}"
-    )
-    st.plotly_chart(fig, use_container_width=True)
+    with stage('chart:ca'):
+        fig = create_line_chart(
+            df_display, 
+            x=date_col, 
+            y='ca_daily',
+            title="Évolution du Chiffre d'Affaires",
+            subtitle=f"Montant {freq_label}"
+        )
+        st.plotly_chart(fig, use_container_width=True)
     
         # Déterminer un label clair pour la fréquence
     if frequency == "Quotidien":
@@ -268,14 +237,15 @@ if selected_graph == ":material/attach_money: Chiffre d'Affaires":
 
 
 elif selected_graph == ":material/shopping_bag: Nombre de Commandes":
-    fig = create_line_chart(
-        df_display, 
-        x=date_col, 
-        y='nb_orders',
-        title="Évolution du Nombre de Commandes",
-        subtitle=f"Nombre {freq_label}"
-    )
-    st.plotly_chart(fig, use_container_width=True)
+    with stage('chart:nb_orders'):
+        fig = create_line_chart(
+            df_display, 
+            x=date_col, 
+            y='nb_orders',
+            title="Évolution du Nombre de Commandes",
+            subtitle=f"Nombre {freq_label}"
+        )
+        st.plotly_chart(fig, use_container_width=True)
     
     # Déterminer un label clair pour la fréquence
     if frequency == "Quotidien":
@@ -300,25 +270,26 @@ elif selected_graph == ":material/shopping_bag: Nombre de Commandes":
 
 
 elif selected_graph == ":material/report_problem: Taux de Réclamations":
-    # Utiliser barres pour les taux
-    fig = create_bar_chart(
-        df_display,
-        x=date_col,
-        y='claim_rate',
-        title="Évolution du Taux de Réclamations",
-        subtitle=f"Moyenne {freq_label} (%)"
-    )
+    with stage('chart:claim_rate'):
+        # Utiliser barres pour les taux
+        fig = create_bar_chart(
+            df_display,
+            x=date_col,
+            y='claim_rate',
+            title="Évolution du Taux de Réclamations",
+            subtitle=f"Moyenne {freq_label} (%)"
+        )
     
-    # Ajouter ligne objectif à 10%
-    fig.add_hline(
-        y=10, 
-        line_dash="dash", 
-        line_color="#f59e0b",
-        annotation_text="Objectif <10%",
-        annotation_position="right"
-    )
+        # Ajouter ligne objectif à 10%
+        fig.add_hline(
+            y=10, 
+            line_dash="dash", 
+            line_color="#f59e0b",
+            annotation_text="Objectif <10%",
+            annotation_position="right"
+        )
     
-    st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(fig, use_container_width=True)
     
     col1, col2, col3 = st.columns(3)
     with col1:
@@ -329,25 +300,26 @@ elif selected_graph == ":material/report_problem: Taux de Réclamations":
         st.metric("Montant moyen par réclamation", format_currency(kpis_current['montant_claims'] / kpis_current['nb_claims'] if kpis_current['nb_claims'] > 0 else 0))
 
 elif selected_graph == ":material/local_shipping: Taux de Livraison":
-    # Utiliser barres pour les taux
-    fig = create_bar_chart(
-        df_display,
-        x=date_col,
-        y='delivery_rate',
-        title="Évolution du Taux de Livraison Réussie",
-        subtitle=f"Moyenne {freq_label}(%)"
-    )
+    with stage('chart:delivery_rate'):
+        # Utiliser barres pour les taux
+        fig = create_bar_chart(
+            df_display,
+            x=date_col,
+            y='delivery_rate',
+            title="Évolution du Taux de Livraison Réussie",
+            subtitle=f"Moyenne {freq_label}(%)"
+        )
     
-    # Ajouter ligne objectif à 90%
-    fig.add_hline(
-        y=90, 
-        line_dash="dash", 
-        line_color="#10b981",
-        annotation_text="Objectif 90%",
-        annotation_position="right"
-    )
+        # Ajouter ligne objectif à 90%
+        fig.add_hline(
+            y=90, 
+            line_dash="dash", 
+            line_color="#10b981",
+            annotation_text="Objectif 90%",
+            annotation_position="right"
+        )
     
-    st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(fig, use_container_width=True)
     
     col1, col2, col3 = st.columns(3)
     with col1:
@@ -356,6 +328,4 @@ elif selected_graph == ":material/local_shipping: Taux de Livraison":
 st.markdown("---")
 
 
-
-
-
+end_run()
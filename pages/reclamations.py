@@ -3,8 +3,10 @@ import streamlit as st
 import pandas as pd
 from pathlib import Path
 
-from utils.data_loader import prepare_main_dataset, load_all_data
+from utils.data_loader import get_dataset, get_filter_index
+from utils.kpi_cache import cached_by_signature, filter_signature
 from utils.helpers import calculate_growth_rate
+from utils.profiling import start_run, stage, end_run
 from utils.sidebar import render_sidebar, apply_filters
 
 # ========= CONFIGURATION =========
@@ -20,12 +22,10 @@ with open('assets/styles.css') as f:
     st.markdown(f'<style>{f.read()}</style>', unsafe_allow_html=True)
 
 # ========= CHARGEMENT DES DONNÉES =========
-@st.cache_data
-def load_data():
-    data = load_all_data()
-    df_orders = prepare_main_dataset()
-    df_customers = data.get('customers', pd.DataFrame()).copy()
-    df_claims_full = data.get('claims', pd.DataFrame()).copy()
+def load_data(dataset):
+    df_orders = dataset.main
+    df_customers = dataset.table('customers')
+    df_claims_full = dataset.table('claims')
 
     # conversions robustes
     if not df_claims_full.empty:
@@ -39,13 +39,23 @@ def load_data():
 
     return df_orders, df_customers, df_claims_full
 
-df_full, df_customers, df_claims_full = load_data()
+# Chronométrage des étapes (voir utils.profiling, ?debug=1 pour le panneau)
+start_run('reclamations')
+
+# Un seul handle pour toute l'exécution (même version même en cas de rechargement)
+with stage('load'):
+    dataset = get_dataset()
+    df_full, df_customers, df_claims_full = load_data(dataset)
 
 # ========= SIDEBAR & FILTRES =========
-filters = render_sidebar(df_full)      # -> {start_date, end_date, transport_filter, state_filter}
-df = apply_filters(df_full, filters)   # DataFrame commandes filtré
+with stage('sidebar'):
+    filters = render_sidebar(df_full)      # -> {start_date, end_date, transport_filter, state_filter}
+with stage('filters'):
+    df = apply_filters(df_full, filters, index=get_filter_index(dataset))   # DataFrame commandes filtré
 
 # ========= KPI: FONCTION DE CALCUL =========
+# Cache partagé indexé par la sélection (dates, transports, états, version)
+@cached_by_signature()
 def compute_claims_kpis(
     df_orders_filt: pd.DataFrame,
     df_customers_all: pd.DataFrame,
@@ -72,11 +82,14 @@ def compute_claims_kpis(
     # 3) Churn pendant la période
     if n_clients > 0 and not df_customers_all.empty and 'churn_date' in df_customers_all.columns:
         cust_scope = df_customers_all[df_customers_all['customer_id'].isin(customers_in_scope)].copy()
+        # Comparaison au jour près en datetime64 : .dt.date renvoie du datetime64
+        # (et non des dates) quand toutes les churn_date du périmètre sont NaT
+        churn_day = cust_scope['churn_date'].dt.normalize()
         churned_in_period = int(
             cust_scope.loc[
                 cust_scope['churn_date'].notna() &
-                (cust_scope['churn_date'].dt.date >= start_date) &
-                (cust_scope['churn_date'].dt.date <= end_date),
+                (churn_day >= pd.Timestamp(start_date)) &
+                (churn_day <= pd.Timestamp(end_date)),
                 'customer_id'
             ].nunique()
         )
@@ -99,35 +112,37 @@ def compute_claims_kpis(
 
 # ========= KPI PÉRIODE COURANTE =========
 current_start, current_end = filters['start_date'], filters['end_date']
-kpis_current = compute_claims_kpis(
-    df_orders_filt=df,
-    df_customers_all=df_customers,
-    start_date=current_start,
-    end_date=current_end
-)
+data_version = dataset.version
+with stage('kpis'):
+    kpis_current = compute_claims_kpis(
+        df_orders_filt=df,
+        df_customers_all=df_customers,
+        start_date=current_start,
+        end_date=current_end,
+        signature=filter_signature(filters, data_version)
+    )
 
 # ========= PÉRIODE PRÉCÉDENTE (mêmes filtres transport/états) =========
 period_days = (current_end - current_start).days
 prev_start = current_start - pd.Timedelta(days=period_days + 1)
 prev_end   = current_start - pd.Timedelta(days=1)
 
-df_prev = df_full[
-    (df_full['order_date'].dt.date >= prev_start) &
-    (df_full['order_date'].dt.date <= prev_end)
-]
-df_prev = apply_filters(df_prev, {
+filters_prev = {
     'start_date': prev_start,
     'end_date': prev_end,
     'transport_filter': filters['transport_filter'],
     'state_filter': filters['state_filter']
-})
-
-kpis_previous = compute_claims_kpis(
-    df_orders_filt=df_prev,
-    df_customers_all=df_customers,
-    start_date=prev_start,
-    end_date=prev_end
-) if len(df_prev) > 0 else None
+}
+with stage('kpis_previous'):
+    df_prev = apply_filters(df_full, filters_prev, index=get_filter_index(dataset))
+
+    kpis_previous = compute_claims_kpis(
+        df_orders_filt=df_prev,
+        df_customers_all=df_customers,
+        start_date=prev_start,
+        end_date=prev_end,
+        signature=filter_signature(filters_prev, data_version)
+    ) if len(df_prev) > 0 else None
 
 # ========= DELTAS =========
 if kpis_previous:
@@ -209,33 +224,35 @@ st.markdown("---")
 from utils.charts import create_pie_chart
 
 # À placer une seule fois, au-dessus des graphes
-filtered_order_ids = df['order_id'].unique()
-df_claims = df_claims_full[
-    (df_claims_full['order_id'].isin(filtered_order_ids)) &
-    (df_claims_full['claim_date'].dt.date.between(filters['start_date'], filters['end_date']))
-].copy()
-
 st.subheader("Répartition des Réclamations par Type")
 
-claims_type = (
-    df_claims.assign(claim_type=df_claims.get('claim_type').fillna('Unknown') if 'claim_type' in df_claims.columns else 'Unknown')
-             .groupby('claim_type')
-             .size()
-             .reset_index(name='count')
-             .sort_values('count', ascending=False)
-)
+with stage('aggregation'):
+    filtered_order_ids = df['order_id'].unique()
+    df_claims = df_claims_full[
+        (df_claims_full['order_id'].isin(filtered_order_ids)) &
+        (df_claims_full['claim_date'].dt.date.between(filters['start_date'], filters['end_date']))
+    ].copy()
+
+    claims_type = (
+        df_claims.assign(claim_type=df_claims.get('claim_type').astype(object).fillna('Unknown') if 'claim_type' in df_claims.columns else 'Unknown')
+                 .groupby('claim_type')
+                 .size()
+                 .reset_index(name='count')
+                 .sort_values('count', ascending=False)
+    )
 
 if len(claims_type) > 0:
     # Utiliser create_pie_chart au lieu de px.pie
-    fig_donut = create_pie_chart(
-        claims_type,
-        names='claim_type',
-        values='count',
+    with stage('chart:claim_types'):
+        fig_donut = create_pie_chart(
+            claims_type,
+            names='claim_type',
+            values='count',
         
-        hole=0.5
-    )
+            hole=0.5
+        )
     
-    st.plotly_chart(fig_donut, use_container_width=True)
+        st.plotly_chart(fig_donut, use_container_width=True)
     
     # Métriques complémentaires (optionnel)
     col1, col2, col3 = st.columns(3)
@@ -250,3 +267,4 @@ else:
     st.info("📭 Aucune réclamation sur la période sélectionnée.")
 
 
+end_run()
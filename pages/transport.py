@@ -3,7 +3,8 @@ import pandas as pd
 from pathlib import Path
 
 # === imports existants de ton projet ===
-from utils.data_loader import prepare_main_dataset
+from utils.data_loader import get_dataset, get_filter_index
+from utils.profiling import start_run, stage, end_run
 from utils.sidebar import render_sidebar, apply_filters
 
 # ============== CONFIG PAGE ==============
@@ -21,16 +22,21 @@ try:
 except FileNotFoundError:
     pass
 
-# ============== CHARGEMENT DONNÉES ==============
-@st.cache_data
-def load_data():
-    return prepare_main_dataset()
+# Chronométrage des étapes (voir utils.profiling, ?debug=1 pour le panneau) ;
+# graphiques : chart:* = construction de la figure, render:* = st.plotly_chart
+start_run('transport')
 
-df_full = load_data()
+# ============== CHARGEMENT DONNÉES ==============
+# Un seul handle pour toute l'exécution (même version même en cas de rechargement)
+with stage('load'):
+    dataset = get_dataset()
+    df_full = dataset.main
 
 # ============== SIDEBAR & FILTRES ==============
-filters = render_sidebar(df_full)       # <-- ta sidebar existante
-df = apply_filters(df_full, filters)    # <-- DataFrame filtré
+with stage('sidebar'):
+    filters = render_sidebar(df_full)       # <-- ta sidebar existante
+with stage('filters'):
+    df = apply_filters(df_full, filters, index=get_filter_index(dataset))    # <-- DataFrame filtré
 
 # ============== FONCTION KPI ==============
 def kpi_transport(df: pd.DataFrame) -> dict:
@@ -63,7 +69,8 @@ st.markdown("---")
 
 st.subheader("KPI Principaux")  # 👈 Section KPI
 
-kpis = kpi_transport(df)
+with stage('kpis'):
+    kpis = kpi_transport(df)
 
 col1, col2, col3 = st.columns(3)
 with col1:
@@ -113,19 +120,22 @@ from utils.visualizations import (
 st.subheader("Analyse visuelle")
 
 # --- Prépas robustes ---
-if 'order_date' in df.columns:
-    df['_month'] = pd.to_datetime(df['order_date']).dt.to_period('M').dt.to_timestamp()
-else:
-    df['_month'] = pd.NaT
+# assign() : nouvelle colonne sur une copie, jamais sur le dataset partagé
+with stage('aggregation:month'):
+    if 'order_date' in df.columns:
+        df = df.assign(_month=pd.to_datetime(df['order_date']).dt.to_period('M').dt.to_timestamp())
+    else:
+        df = df.assign(_month=pd.NaT)
 
 # Agrégations mensuelles vols / commandes
 if '_month' in df.columns and 'has_theft_incident' in df.columns:
-    monthly = (
-        df.groupby('_month')
-          .agg(orders=('order_id', 'count'),
-               thefts=('has_theft_incident', 'sum'))
-          .reset_index()
-    )
+    with stage('aggregation:monthly'):
+        monthly = (
+            df.groupby('_month')
+              .agg(orders=('order_id', 'count'),
+                   thefts=('has_theft_incident', 'sum'))
+              .reset_index()
+        )
     if len(monthly):
         monthly['theft_rate'] = (monthly['thefts'] / monthly['orders'] * 100).round(2)
 else:
@@ -134,7 +144,7 @@ else:
 # Agrégations transport
 if 'transport_type' in df.columns and 'has_theft_incident' in df.columns:
     by_transport = (
-        df.groupby('transport_type')
+        df.groupby('transport_type', observed=True)
           .agg(orders=('order_id', 'count'),
                thefts=('has_theft_incident', 'sum'))
           .reset_index()
@@ -147,12 +157,13 @@ else:
 # Agrégations état
 state_col = 'state_code' if 'state_code' in df.columns else None
 if state_col and 'has_theft_incident' in df.columns:
-    by_state = (
-        df.groupby(state_col)
-          .agg(orders=('order_id', 'count'),
-               thefts=('has_theft_incident', 'sum'))
-          .reset_index()
-    )
+    with stage('aggregation:state'):
+        by_state = (
+            df.groupby(state_col, observed=True)
+              .agg(orders=('order_id', 'count'),
+                   thefts=('has_theft_incident', 'sum'))
+              .reset_index()
+        )
     if len(by_state):
         by_state['theft_rate'] = (by_state['thefts'] / by_state['orders'] * 100).round(2)
 else:
@@ -173,15 +184,16 @@ with tab1:
     if len(monthly):
         st.subheader("Commandes vs Incidents de Vol (Évolution mensuelle)")  
         # Timeline double axe : commandes (barres) vs taux de vol (ligne)
-        fig_dual = create_dual_axis_timeline(
-            monthly.rename(columns={'_month': 'order_date'}),
-            date_col='order_date',
-            metric1='orders', metric1_name='Commandes',
-            metric2='theft_rate', metric2_name='Taux de vol (%)',
+        with stage('chart:theft_timeline'):
+            fig_dual = create_dual_axis_timeline(
+                monthly.rename(columns={'_month': 'order_date'}),
+                date_col='order_date',
+                metric1='orders', metric1_name='Commandes',
+                metric2='theft_rate', metric2_name='Taux de vol (%)',
    
-            christmas_col='is_christmas' # s’affichera si colonne présente
+                christmas_col='is_christmas' # s’affichera si colonne présente
               
-        )
+            )
 
         # --- Hover enrichi ---
         # On suppose que fig_dual a deux traces : [0]=barres commandes, [1]=ligne taux de vol
@@ -211,7 +223,8 @@ with tab1:
             font=dict(family="Arial, sans-serif", size=12, color="#2B3D50")
         )
 
-        st.plotly_chart(fig_dual, use_container_width=True)
+        with stage('render:theft_timeline'):
+            st.plotly_chart(fig_dual, use_container_width=True)
 
     else:
         st.info("Pas de données sur la période sélectionnée.")
@@ -223,6 +236,7 @@ with tab1:
 from utils.charts import create_bar_chart, create_comparison_chart
 
 # --- Définition utilitaire (hors onglet !) ---
+@stage('aggregation:transport')
 def build_by_transport(df: pd.DataFrame) -> pd.DataFrame:
     required = {'transport_type', 'order_id', 'has_theft_incident'}
     if not required.issubset(df.columns) or len(df) == 0:
@@ -231,7 +245,7 @@ def build_by_transport(df: pd.DataFrame) -> pd.DataFrame:
         ])
 
     out = (
-        df.groupby('transport_type')
+        df.groupby('transport_type', observed=True)
           .agg(
               orders=('order_id', 'count'),
               thefts=('has_theft_incident', 'sum'),
@@ -265,13 +279,14 @@ with tab2:
         _bt['orders_display'] = _bt['orders']
         _bt['thefts_display'] = _bt['thefts']
 
-        fig_vol = create_bar_chart(
-            _bt,
-            x='transport_type',
-            y='theft_rate',
-            title="Taux de vol (%) par mode de transport"
+        with stage('chart:theft_by_transport'):
+            fig_vol = create_bar_chart(
+                _bt,
+                x='transport_type',
+                y='theft_rate',
+                title="Taux de vol (%) par mode de transport"
             
-        )
+            )
         fig_vol.update_traces(
             hovertemplate="<b>%{x}</b><br>"
                           "Taux de vol: %{y:.2f}%<br>"
@@ -279,19 +294,21 @@ with tab2:
                           "Vols: %{customdata[1]}<extra></extra>",
             customdata=_bt[['orders_display','thefts_display']].to_numpy()
         )
-        st.plotly_chart(fig_vol, use_container_width=True)
+        with stage('render:theft_by_transport'):
+            st.plotly_chart(fig_vol, use_container_width=True)
 
         st.markdown("---")
 
         # B) Comparaison : Non-livré (%) vs Vol (%) (hover spécifique)
         cmp_df = by_transport.rename(columns={'transport_type': 'Mode'}).copy()
-        fig_cmp = create_comparison_chart(
-            cmp_df,
-            categories='Mode',
-            metrics=['non_delivery_rate', 'theft_rate'],
-            title="Non-livré (%) vs Vol (%) par mode"
+        with stage('chart:non_delivery_vs_theft'):
+            fig_cmp = create_comparison_chart(
+                cmp_df,
+                categories='Mode',
+                metrics=['non_delivery_rate', 'theft_rate'],
+                title="Non-livré (%) vs Vol (%) par mode"
             
-        )
+            )
         custom = cmp_df[['orders','thefts']].to_numpy()
         if len(fig_cmp.data) >= 1:
             fig_cmp.data[0].update(
@@ -307,7 +324,8 @@ with tab2:
                               "Vols: %{customdata[1]}<extra></extra>",
                 customdata=custom
             )
-        st.plotly_chart(fig_cmp, use_container_width=True)
+        with stage('render:non_delivery_vs_theft'):
+            st.plotly_chart(fig_cmp, use_container_width=True)
 
         # C) Tableau dynamique (lié aux filtres)
         st.dataframe(
@@ -339,14 +357,15 @@ with tab3:
         top_states_display['commandes'] = top_states_display['orders']
         top_states_display['vols'] = top_states_display['thefts']
 
-        fig_state_rate = create_bar_chart(
-            top_states_display,
-            x=state_col,
-            y='theft_rate',
-            title="Top 10 États par taux de vol (%)",
+        with stage('chart:top_states'):
+            fig_state_rate = create_bar_chart(
+                top_states_display,
+                x=state_col,
+                y='theft_rate',
+                title="Top 10 États par taux de vol (%)",
 
-            horizontal=False
-        )
+                horizontal=False
+            )
 
         # enrichir le hover avec taux (%) + commandes + vols
         fig_state_rate.update_traces(
@@ -357,8 +376,11 @@ with tab3:
             customdata=top_states_display[['commandes','vols']].to_numpy()
         )
 
-        st.plotly_chart(fig_state_rate, use_container_width=True)
+        with stage('render:top_states'):
+            st.plotly_chart(fig_state_rate, use_container_width=True)
 
     else:
         st.info("Aucune donnée État sur ce périmètre.")
 
+
+end_run()
@@ -0,0 +1,194 @@
+"""
+Agrégations vectorisées utilisées par la préparation du dataset
+"""
+import numpy as np
+import pandas as pd
+
+
+# ===== VALEUR LA PLUS FRÉQUENTE =====
+class MostFrequent:
+    """
+    Agrégation « valeur la plus fréquente » à placer dans un spec de grouped_agg
+
+    Équivalent vectorisé de ``lambda x: x.mode()[0]`` : les NaN sont ignorés
+    et, en cas d'égalité, la plus petite valeur l'emporte (mode() trie ses
+    résultats). Les groupes sans valeur reçoivent ``default``.
+
+    Exemple:
+        grouped_agg(df, 'order_id', {'fragility_class': MostFrequent('Unknown')})
+    """
+
+    def __init__(self, default=None):
+        self.default = default
+
+    def __call__(self, df, by, column, index=None):
+        return most_frequent(df, by, column, default=self.default, index=index)
+
+    def __repr__(self):
+        return f'MostFrequent(default={self.default!r})'
+
+
+def most_frequent(df, by, column, default=None, index=None):
+    """
+    Valeur la plus fréquente de ``column`` pour chaque groupe ``by``
+
+    Args:
+        df: DataFrame source
+        by: Colonne de regroupement
+        column: Colonne dont on cherche le mode
+        default: Valeur pour les groupes sans valeur non nulle
+        index: Index des groupes attendu en sortie (défaut : clés triées de ``by``)
+
+    Returns:
+        pd.Series: Mode par groupe, indexé par les clés de ``by``
+    """
+    # Comptage par (groupe, valeur), trié par groupe puis par valeur
+    counts = df.groupby([by, column], observed=True, sort=True).size()
+
+    if index is None:
+        index = pd.Index(df[by].dropna().unique(), name=by).sort_values()
+
+    if counts.empty:
+        return pd.Series(default, index=index, name=column)
+
+    group_codes, _ = pd.factorize(counts.index.get_level_values(0), sort=True)
+
+    # Tri stable : groupe croissant puis effectif décroissant -> à effectif
+    # égal, l'ordre des valeurs (croissant) est conservé
+    order = np.lexsort((-counts.to_numpy(), group_codes))
+    sorted_groups = group_codes[order]
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = sorted_groups[1:] != sorted_groups[:-1]
+
+    winners = order[first]
+    modes = pd.Series(
+        counts.index.get_level_values(1)[winners],
+        index=counts.index.get_level_values(0)[winners],
+        name=column
+    )
+
+    if modes.index.equals(index):
+        return modes
+    if default is None:
+        return modes.reindex(index)
+    return modes.reindex(index).astype(object).fillna(default)
+
+
+# ===== AGRÉGATION MIXTE =====
+def grouped_agg(df, by, spec):
+    """
+    ``df.groupby(by).agg(spec)`` acceptant des agrégations vectorisées
+
+    Les entrées du spec qui sont des instances de MostFrequent sont calculées
+    séparément ; les autres passent par groupby().agg() classique.
+
+    Args:
+        df: DataFrame source
+        by: Colonne de regroupement
+        spec: Dict {colonne: agrégation}
+
+    Returns:
+        pd.DataFrame: Une ligne par groupe, colonnes dans l'ordre du spec
+    """
+    standard = {col: agg for col, agg in spec.items() if not isinstance(agg, MostFrequent)}
+    custom = {col: agg for col, agg in spec.items() if isinstance(agg, MostFrequent)}
+
+    if standard:
+        out = df.groupby(by).agg(standard)
+    else:
+        out = pd.DataFrame(index=pd.Index(df[by].dropna().unique(), name=by).sort_values())
+
+    for col, agg in custom.items():
+        out[col] = agg(df, by, col, index=out.index)
+
+    return out[list(spec)]
+
+
+# ===== AGRÉGATION EN FLUX =====
+STREAM_AGGS = ('sum', 'any', 'count')
+
+
+class StreamingGroupAgg:
+    """
+    Agrégation par groupe alimentée bloc par bloc
+
+    Les groupes sont connus à l'avance (ex. les commandes) : chaque bloc est
+    ramené à des positions de groupe puis cumulé par ``np.bincount`` dans un
+    tableau par colonne. La mémoire dépend du nombre de groupes, pas du
+    nombre de lignes lues. Les lignes dont la clé est inconnue sont ignorées,
+    comme dans une jointure gauche sur les groupes.
+
+    Agrégations : 'sum' (NaN ignorés), 'any' (au moins une valeur vraie),
+    'count' (valeurs non nulles).
+
+    Exemple:
+        agg = StreamingGroupAgg(orders['order_id'], {'distance_km': 'sum'})
+        for chunk in chunks:
+            agg.update(chunk, 'order_id')
+        totals = agg.result()
+    """
+
+    def __init__(self, keys, spec):
+        """
+        Args:
+            keys: Clés des groupes
+            spec: Dict {colonne: agrégation} (voir STREAM_AGGS)
+        """
+        unknown = set(spec.values()) - set(STREAM_AGGS)
+        if unknown:
+            raise ValueError(f"Agrégation non supportée en flux : {', '.join(sorted(unknown))}")
+
+        self.index = pd.Index(keys).unique()
+        self.spec = dict(spec)
+        self.rows = 0
+        n = len(self.index)
+        self._totals = {
+            col: np.zeros(n, dtype={'sum': np.float64, 'any': bool, 'count': np.int64}[agg])
+            for col, agg in self.spec.items()
+        }
+        self._dtypes = {}
+
+    def update(self, chunk, by):
+        """
+        Cumule un bloc de lignes
+
+        Args:
+            chunk: DataFrame contenant ``by`` et les colonnes du spec
+            by: Colonne des clés de groupe
+        """
+        positions = self.index.get_indexer(chunk[by])
+        known = positions >= 0
+        positions = positions[known]
+        n = len(self.index)
+        self.rows += len(chunk)
+
+        for col, agg in self.spec.items():
+            series = chunk[col]
+            self._dtypes.setdefault(col, series.dtype)
+            if agg == 'sum':
+                values = series.to_numpy(dtype=np.float64, na_value=0)[known]
+                self._totals[col] += np.bincount(positions, weights=values, minlength=n)
+            elif agg == 'any':
+                values = series.to_numpy(dtype=bool, na_value=False)[known]
+                self._totals[col] |= np.bincount(positions[values], minlength=n) > 0
+            else:
+                values = series.notna().to_numpy()[known]
+                self._totals[col] += np.bincount(positions[values], minlength=n)
+
+    def result(self):
+        """
+        Agrégats par groupe (0 / False pour les groupes sans ligne)
+
+        Les sommes de colonnes float32 sont cumulées en float64 puis
+        reconverties dans le type d'origine.
+
+        Returns:
+            pd.DataFrame: Une ligne par groupe, colonnes dans l'ordre du spec
+        """
+        columns = {}
+        for col, values in self._totals.items():
+            dtype = self._dtypes.get(col)
+            if self.spec[col] == 'sum' and dtype is not None and pd.api.types.is_float_dtype(dtype):
+                values = values.astype(dtype)
+            columns[col] = values
+        return pd.DataFrame(columns, index=self.index)
@@ -0,0 +1,129 @@
+"""
+Construction hors ligne du dataset enrichi
+
+Usage :
+    python -m utils.build_dataset [--data-dir data] [--keep 3] [--force] [--incremental]
+
+Écrit la sortie de prepare_main_dataset dans une nouvelle version de
+``data/.build`` ; le dashboard la mappe en mémoire au démarrage au lieu de
+refaire jointures et agrégations.
+
+``--incremental`` n'enrichit que les lignes ajoutées en fin de CSV depuis
+le dernier build (voir utils.incremental), avec repli sur un build complet.
+"""
+import argparse
+import sys
+import time
+
+from utils.data_loader import (
+    CACHE_VERSION, DATA_DIR, IN_MEMORY_TABLES, TABLES, read_tables, build_main_dataset
+)
+from utils.incremental import IncrementalUnsupported, incremental_build
+from utils.materialized import (
+    append_markers, current_version, read_manifest, source_fingerprints,
+    update_manifest, write_version, prune_versions
+)
+
+
+def _same_source(built, fp):
+    """Même contenu : sha256 identique, ou fichier intact si le build n'a pas de sha256"""
+    if built.get('sha256') is not None:
+        return built['sha256'] == fp['sha256']
+    return built.get('size') == fp['size'] == built.get('file_size', built.get('size')) \
+        and built.get('mtime_ns') == fp['mtime_ns']
+
+
+def is_up_to_date(data_dir, sources):
+    """Vrai si la version active a été construite à partir des mêmes CSV"""
+    version = current_version(data_dir)
+    if version is None:
+        return False
+    try:
+        manifest = read_manifest(data_dir, version)
+    except (OSError, ValueError):
+        return False
+    if manifest.get('pipeline_version') != CACHE_VERSION:
+        return False
+    built = manifest.get('sources', {})
+    return all(_same_source(built.get(name, {}), fp) for name, fp in sources.items())
+
+
+def build(data_dir=DATA_DIR, keep=3, force=False, log=print):
+    """
+    Construit et publie une nouvelle version du dataset enrichi
+
+    Args:
+        data_dir: Dossier des CSV
+        keep: Nombre de versions conservées
+        force: Reconstruire même si les sources n'ont pas changé
+        log: Fonction d'affichage des messages
+
+    Returns:
+        str: Version active à l'issue du build
+    """
+    start = time.perf_counter()
+    sources = source_fingerprints(data_dir, TABLES, with_hash=True)
+
+    if not force and is_up_to_date(data_dir, sources):
+        version = current_version(data_dir)
+        # Empreintes courantes (mtime d'un touch...) : load_current accepte la version
+        update_manifest(data_dir, version, sources=sources,
+                        append_markers=append_markers(data_dir, sources))
+        log(f"[INFO] Dataset déjà à jour : {version}")
+        return version
+
+    data = read_tables(data_dir, IN_MEMORY_TABLES)
+    log(f"[INFO] Tables chargées en {time.perf_counter() - start:.1f}s")
+
+    df = build_main_dataset(data, data_dir)
+    version = write_version(df, data_dir, sources, extra={
+        'pipeline_version': CACHE_VERSION,
+        'append_markers': append_markers(data_dir, sources),
+    })
+    prune_versions(data_dir, keep=keep)
+
+    log(f"[✓] Version {version} publiée ({len(df):,} lignes, "
+        f"{time.perf_counter() - start:.1f}s)")
+    return version
+
+
+def refresh(data_dir=DATA_DIR, keep=3, log=print, on_append=None):
+    """
+    Met à jour le dataset : incrémental si les CSV n'ont reçu que des ajouts,
+    build complet sinon
+
+    Args:
+        on_append: Appelée après une mise à jour incrémentale (voir incremental_build)
+
+    Returns:
+        str: Version active à l'issue de la mise à jour
+    """
+    try:
+        return incremental_build(data_dir, keep=keep, log=log, on_append=on_append)
+    except IncrementalUnsupported as e:
+        log(f"[INFO] Build complet nécessaire : {e}")
+    return build(data_dir, keep=keep, log=log)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Construit le dataset enrichi du dashboard")
+    parser.add_argument('--data-dir', default=str(DATA_DIR), help="Dossier des CSV")
+    parser.add_argument('--keep', type=int, default=3, help="Versions conservées")
+    parser.add_argument('--force', action='store_true', help="Reconstruire même si à jour")
+    parser.add_argument('--incremental', action='store_true',
+                        help="N'ajouter que les lignes ajoutées aux CSV depuis le dernier build")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.incremental and not args.force:
+            refresh(args.data_dir, keep=args.keep)
+        else:
+            build(args.data_dir, keep=args.keep, force=args.force)
+    except FileNotFoundError as e:
+        print(f"[✗] Fichier manquant : {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,8 +3,12 @@ Visualisations professionnelles adaptées à la charte graphique
 """
 import plotly.graph_objects as go
 import plotly.express as px
+import plotly.io as pio
 import pandas as pd
 
+from utils.downsampling import downsample
+from utils.figure_cache import cached_figure
+
 # ===== PALETTE DE COULEURS (VOTRE CHARTE) =====
 COLORS = {
     'primary': '#055e82',      # Accent bleu canard
@@ -49,14 +53,103 @@ DEFAULT_LAYOUT = {
     }
 }
 
+# Points par série au-delà desquels les séries temporelles sont réduites
+# (~ largeur en pixels de la zone de tracé d'un graphique pleine largeur)
+CHART_MAX_POINTS = 1000
+
+# Points d'une trace au-delà desquels elle est dessinée en WebGL
+WEBGL_MIN_POINTS = 1000
+
+# Types de traces produits par les graphiques du dashboard (seuls leurs
+# styles par défaut sont gardés dans le template envoyé avec chaque figure)
+TEMPLATE_TRACE_TYPES = (
+    'bar', 'scatter', 'scattergl', 'pie', 'heatmap', 'waterfall', 'indicator', 'scatterpolar'
+)
+
+# ===== ENCODAGE DES FIGURES =====
+_TEMPLATES = {}
+
+def chart_template():
+    """
+    Template plotly allégé, commun à tous les graphiques
+
+    Reprend le template par défaut courant ('streamlit' une fois Streamlit
+    importé, dont le frontend remplace les couleurs selon le thème) en ne
+    gardant que les styles des types de traces utilisés : le template est
+    sérialisé avec chaque figure à chaque rerun.
+
+    Returns:
+        str: Nom du template enregistré dans ``plotly.io.templates``
+    """
+    base = pio.templates.default
+    name = _TEMPLATES.get(base)
+    if name is None:
+        template = pio.templates[base].to_plotly_json()
+        data = template.get('data', {})
+        template['data'] = {k: v for k, v in data.items() if k in TEMPLATE_TRACE_TYPES}
+        name = f'logistixup_{base}'
+        pio.templates[name] = go.layout.Template(template)
+        _TEMPLATES[base] = name
+    return name
+
+def compact_values(values):
+    """
+    Valeurs d'axe au format le plus compact pour le JSON de la figure
+
+    Les tableaux numériques partent déjà en binaire typé (plotly >= 6) ;
+    les dates, elles, sont écrites en ISO à la nanoseconde (29 caractères).
+    Des dates à minuit deviennent 'AAAA-MM-JJ' (même axe date côté
+    navigateur), les booléens des entiers sur un octet.
+
+    Args:
+        values: Série ou tableau
+
+    Returns:
+        np.ndarray ou la valeur d'entrée si rien n'est à convertir
+    """
+    if not isinstance(values, pd.Series):
+        return values
+    if pd.api.types.is_datetime64_any_dtype(values.dtype):
+        if values.dt.tz is None and (values.dropna() == values.dropna().dt.normalize()).all():
+            text = values.dt.strftime('%Y-%m-%d')
+            return text.where(values.notna(), None).to_numpy(dtype=object)
+        return values
+    if pd.api.types.is_bool_dtype(values.dtype) and not values.isna().any():
+        return values.to_numpy(dtype='int8')
+    if pd.api.types.is_extension_array_dtype(values.dtype) and pd.api.types.is_numeric_dtype(values.dtype):
+        return values.to_numpy(dtype='float64', na_value=float('nan'))
+    return values
+
+def scatter_trace(n_points, **kwargs):
+    """
+    Trace ``go.Scatter``, ou ``go.Scattergl`` au-delà de WEBGL_MIN_POINTS
+
+    Au-delà de quelques milliers de points, le rendu SVG (un nœud DOM par
+    point) ralentit le navigateur ; WebGL dessine tout en un seul canvas.
+    ``stackgroup`` n'existe pas en WebGL : ces traces restent en SVG.
+    """
+    if n_points > WEBGL_MIN_POINTS and not kwargs.get('stackgroup'):
+        kwargs.pop('stackgroup', None)
+        return go.Scattergl(**kwargs)
+    return go.Scatter(**kwargs)
+
 def hex_to_rgba(hex_color, alpha=0.25):
     """Convertit hex en rgba"""
     hex_color = hex_color.lstrip('#')
     r, g, b = tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
     return f'rgba({r},{g},{b},{alpha})'
 
+def downsampled_subtitle(subtitle, shown, total):
+    """Sous-titre complété du nombre de points affichés si la série a été réduite"""
+    if shown >= total:
+        return subtitle
+    note = f"{shown:,} points sur {total:,} (réduire la période pour le détail)".replace(',', ' ')
+    return f"{subtitle} · {note}" if subtitle else note
+
 # ===== GRAPHIQUE EN LIGNE =====
-def create_line_chart(df, x, y, title="", subtitle="", color_col=None, show_markers=True):
+@cached_figure()
+def create_line_chart(df, x, y, title="", subtitle="", color_col=None, show_markers=True,
+                      max_points=CHART_MAX_POINTS):
     """
     Graphique en ligne propre
     
@@ -68,17 +161,33 @@ def create_line_chart(df, x, y, title="", subtitle="", color_col=None, show_mark
         subtitle: Sous-titre
         color_col: Colonne pour grouper par couleur
         show_markers: Afficher les points
+        max_points: Points par série au-delà desquels la série est réduite
+                    par LTTB (None : tous les points)
     """
     fig = go.Figure()
     
     y_cols = [y] if isinstance(y, str) else y
     
+    # Réduction avant construction des traces (par groupe de couleur)
+    total = len(df)
+    if color_col and color_col in df.columns:
+        groups = [
+            (name, downsample(group, x, y_cols, max_points, method='lttb'))
+            for name, group in df.groupby(color_col)
+        ]
+        shown = sum(len(group) for _, group in groups)
+    else:
+        df = downsample(df, x, y_cols, max_points, method='lttb')
+        shown = len(df)
+    subtitle = downsampled_subtitle(subtitle, shown, total)
+    
     for idx, y_col in enumerate(y_cols):
         if color_col and color_col in df.columns:
-            for color_idx, (group_name, group_df) in enumerate(df.groupby(color_col)):
-                fig.add_trace(go.Scatter(
-                    x=group_df[x],
-                    y=group_df[y_col],
+            for color_idx, (group_name, group_df) in enumerate(groups):
+                fig.add_trace(scatter_trace(
+                    len(group_df),
+                    x=compact_values(group_df[x]),
+                    y=compact_values(group_df[y_col]),
                     name=str(group_name),
                     mode='lines+markers' if show_markers else 'lines',
                     line={
@@ -89,9 +198,10 @@ def create_line_chart(df, x, y, title="", subtitle="", color_col=None, show_mark
                     hovertemplate='%{y:,.2f}<extra></extra>'
                 ))
         else:
-            fig.add_trace(go.Scatter(
-                x=df[x],
-                y=df[y_col],
+            fig.add_trace(scatter_trace(
+                len(df),
+                x=compact_values(df[x]),
+                y=compact_values(df[y_col]),
                 name=y_col if len(y_cols) > 1 else '',
                 mode='lines+markers' if show_markers else 'lines',
                 line={
@@ -104,6 +214,7 @@ def create_line_chart(df, x, y, title="", subtitle="", color_col=None, show_mark
     
     fig.update_layout(
         **DEFAULT_LAYOUT,
+        template=chart_template(),
         title={
             'text': f"<b>{title}</b><br><sub>{subtitle}</sub>" if subtitle else f"<b>{title}</b>",
             'font': {'size': 18, 'color': '#2b3d50'},
@@ -124,7 +235,9 @@ def create_line_chart(df, x, y, title="", subtitle="", color_col=None, show_mark
     return fig
 
 # ===== GRAPHIQUE EN BARRES =====
-def create_bar_chart(df, x, y, title="", subtitle="", color=None, horizontal=False):
+@cached_figure()
+def create_bar_chart(df, x, y, title="", subtitle="", color=None, horizontal=False,
+                     max_points=CHART_MAX_POINTS):
     """
     Graphique en barres
     
@@ -136,30 +249,39 @@ def create_bar_chart(df, x, y, title="", subtitle="", color=None, horizontal=Fal
         subtitle: Sous-titre
         color: Couleur fixe ou colonne pour mapping
         horizontal: Barres horizontales
+        max_points: Barres au-delà desquelles une série temporelle (x en
+                    dates) est réduite au min / max par tranche (None : toutes)
     """
+    if not horizontal and pd.api.types.is_datetime64_any_dtype(df[x]):
+        total = len(df)
+        df = downsample(df, x, y, max_points, method='minmax')
+        subtitle = downsampled_subtitle(subtitle, len(df), total)
+    
+    # Couleur unique : une seule valeur plutôt qu'une par barre
     if color and color in df.columns:
         color_values = df[color]
     else:
-        color_values = [COLORS['primary']] * len(df)
+        color_values = COLORS['primary']
     
     if horizontal:
         fig = go.Figure(go.Bar(
-            y=df[x],
-            x=df[y],
+            y=compact_values(df[x]),
+            x=compact_values(df[y]),
             orientation='h',
             marker={'color': color_values, 'line': {'width': 0}},
             hovertemplate='%{x:,.0f}<extra></extra>'
         ))
     else:
         fig = go.Figure(go.Bar(
-            x=df[x],
-            y=df[y],
+            x=compact_values(df[x]),
+            y=compact_values(df[y]),
             marker={'color': color_values, 'line': {'width': 0}},
             hovertemplate='%{y:,.0f}<extra></extra>'
         ))
     
     fig.update_layout(
         **DEFAULT_LAYOUT,
+        template=chart_template(),
         title={
             'text': f"<b>{title}</b><br><sub>{subtitle}</sub>" if subtitle else f"<b>{title}</b>",
             'font': {'size': 18, 'color': '#2b3d50'},
@@ -174,6 +296,7 @@ def create_bar_chart(df, x, y, title="", subtitle="", color=None, horizontal=Fal
     return fig
 
 # ===== AIRES EMPILÉES =====
+@cached_figure()
 def create_area_chart(df, x, y, title="", subtitle="", stacked=False):
     """Aires empilées ou simples"""
     fig = go.Figure()
@@ -182,9 +305,10 @@ def create_area_chart(df, x, y, title="", subtitle="", stacked=False):
     
     for idx, y_col in enumerate(y_cols):
         color = COLORS['chart_palette'][idx % len(COLORS['chart_palette'])]
-        fig.add_trace(go.Scatter(
-            x=df[x],
-            y=df[y_col],
+        fig.add_trace(scatter_trace(
+            len(df),
+            x=compact_values(df[x]),
+            y=compact_values(df[y_col]),
             name=y_col,
             mode='lines',
             line={'width': 0},
@@ -196,6 +320,7 @@ def create_area_chart(df, x, y, title="", subtitle="", stacked=False):
     
     fig.update_layout(
         **DEFAULT_LAYOUT,
+        template=chart_template(),
         title={
             'text': f"<b>{title}</b><br><sub>{subtitle}</sub>" if subtitle else f"<b>{title}</b>",
             'font': {'size': 18, 'color': '#2b3d50'},
@@ -209,6 +334,7 @@ def create_area_chart(df, x, y, title="", subtitle="", stacked=False):
     return fig
 
 # ===== BARRES GROUPÉES =====
+@cached_figure()
 def create_comparison_chart(df, categories, metrics, title="", subtitle=""):
     """Barres groupées pour comparer plusieurs métriques"""
     fig = go.Figure()
@@ -216,14 +342,15 @@ def create_comparison_chart(df, categories, metrics, title="", subtitle=""):
     for idx, metric in enumerate(metrics):
         fig.add_trace(go.Bar(
             name=metric,
-            x=df[categories],
-            y=df[metric],
+            x=compact_values(df[categories]),
+            y=compact_values(df[metric]),
             marker={'color': COLORS['chart_palette'][idx % len(COLORS['chart_palette'])]},
             hovertemplate='%{y:,.1f}<extra></extra>'
         ))
     
     fig.update_layout(
         **DEFAULT_LAYOUT,
+        template=chart_template(),
         title={
             'text': f"<b>{title}</b><br><sub>{subtitle}</sub>" if subtitle else f"<b>{title}</b>",
             'font': {'size': 18, 'color': '#2b3d50'},
@@ -319,6 +446,7 @@ def style_dataframe(df, highlight_max=None, highlight_min=None):
 
 ############################################""
 # ===== GRAPHIQUE EN CAMEMBERT (PIE CHART) =====
+@cached_figure()
 def create_pie_chart(df, names, values, title="", subtitle="", hole=0):
     """
     Graphique en camembert (pie chart) ou donut
@@ -350,10 +478,11 @@ def create_pie_chart(df, names, values, title="", subtitle="", hole=0):
         textinfo='label+percent',
         textfont={'size': 13, 'color': '#ffffff', 'family': 'Inter'},
         hovertemplate='<b>%{label}</b><br>%{value:,.0f} (%{percent})<extra></extra>',
-        pull=[0.05] * len(df)  # Légère séparation des parts
+        pull=0.05  # Légère séparation des parts
     )])
     
     fig.update_layout(
+        template=chart_template(),
         paper_bgcolor='#ffffff',
         plot_bgcolor='#ffffff',
         font={
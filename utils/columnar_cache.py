@@ -0,0 +1,306 @@
+"""
+Cache columnaire (Parquet) des fichiers CSV sources
+
+Chaque table est stockée dans ``data/.cache/<table>.parquet`` avec les types
+déjà convertis (dates, ...). Un fichier ``<table>.meta.json`` conserve
+l'empreinte du CSV source (taille, mtime, sha256) : seul un CSV modifié est
+relu, les autres se rechargent directement depuis le Parquet.
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import pandas as pd
+
+CACHE_DIRNAME = '.cache'
+
+
+class PostprocessError(Exception):
+    """Erreur levée par la fonction de post-traitement d'une table"""
+
+
+# ===== EMPREINTE DES FICHIERS =====
+def file_digest(path, chunk_size=1 << 20, size=None):
+    """
+    Calcule le sha256 d'un fichier par blocs
+
+    Args:
+        path: Chemin du fichier
+        chunk_size: Taille des blocs lus
+        size: Nombre d'octets hachés depuis le début (défaut : tout le
+              fichier ; fixé, les octets ajoutés pendant la lecture sont ignorés)
+
+    Returns:
+        str: Empreinte hexadécimale
+    """
+    digest = hashlib.sha256()
+    remaining = float('inf') if size is None else size
+    with open(path, 'rb') as f:
+        while remaining > 0:
+            block = f.read(int(min(chunk_size, remaining)))
+            if not block:
+                break
+            digest.update(block)
+            remaining -= len(block)
+    return digest.hexdigest()
+
+
+def file_fingerprint(path, with_hash=True):
+    """
+    Empreinte d'un fichier source : taille, mtime et (optionnellement) sha256
+
+    Returns:
+        dict: {'size', 'mtime_ns', 'sha256'}
+    """
+    stat = os.stat(path)
+    return {
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha256': file_digest(path, size=stat.st_size) if with_hash else None
+    }
+
+
+# ===== LECTURE / ÉCRITURE DU CACHE =====
+def cache_paths(csv_path, cache_dir=None):
+    """Retourne les chemins (parquet, meta) associés à un CSV"""
+    csv_path = Path(csv_path)
+    cache_dir = Path(cache_dir) if cache_dir else csv_path.parent / CACHE_DIRNAME
+    return (
+        cache_dir / f'{csv_path.stem}.parquet',
+        cache_dir / f'{csv_path.stem}.meta.json'
+    )
+
+
+def _read_meta(meta_path):
+    try:
+        with open(meta_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_atomic(path, write):
+    """Écrit via un fichier temporaire puis ``os.replace`` (jamais de fichier partiel)"""
+    tmp_path = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+def is_cache_valid(csv_path, meta, version=None):
+    """
+    Vérifie qu'une entrée de cache correspond encore au CSV source
+
+    La taille et le mtime suffisent quand ils sont identiques ; si seul le
+    mtime a changé (fichier re-téléchargé à l'identique), le sha256 tranche.
+
+    Returns:
+        tuple: (valide, empreinte_courante_ou_None)
+    """
+    if not meta or meta.get('version') != version:
+        return False, None
+
+    current = file_fingerprint(csv_path, with_hash=False)
+    if current['size'] != meta.get('size'):
+        return False, None
+    if current['mtime_ns'] == meta.get('mtime_ns'):
+        return True, None
+
+    current['sha256'] = file_digest(csv_path)
+    return current['sha256'] == meta.get('sha256'), current
+
+
+def write_cache(df, csv_path, fingerprint, version=None, cache_dir=None):
+    """Écrit une table et son empreinte dans le cache"""
+    parquet_path, meta_path = cache_paths(csv_path, cache_dir)
+    parquet_path.parent.mkdir(parents=True, exist_ok=True)
+
+    _write_atomic(parquet_path, lambda p: df.to_parquet(p, index=False))
+    _write_meta(meta_path, {**fingerprint, 'version': version})
+
+
+def _write_meta(meta_path, meta):
+    def write(p):
+        with open(p, 'w') as f:
+            json.dump(meta, f)
+    _write_atomic(meta_path, write)
+
+
+class _ChunkedParquetWriter:
+    """
+    Écrit le cache d'une table bloc par bloc (``pyarrow.parquet.ParquetWriter``)
+
+    Le fichier temporaire n'est mis en place qu'à ``commit()``. Un bloc dont
+    le schéma diffère du premier (type déduit d'un bloc sans valeur
+    manquante, par ex.) abandonne l'écriture : le cache ne doit jamais
+    différer d'une lecture complète du CSV.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.tmp_path = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+        self.writer = None
+        self.failed = False
+
+    def write(self, df):
+        if self.failed:
+            return
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self.writer is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self.writer = pq.ParquetWriter(self.tmp_path, table.schema)
+            elif not table.schema.equals(self.writer.schema, check_metadata=False):
+                raise TypeError("schéma différent du premier bloc")
+            self.writer.write_table(table)
+        except (OSError, ValueError, TypeError, pa.ArrowException):
+            self.discard()
+            self.failed = True
+
+    def commit(self):
+        """
+        Met le fichier écrit en place
+
+        Returns:
+            bool: Vrai si le cache a été écrit
+        """
+        if self.failed or self.writer is None:
+            return False
+        try:
+            self.writer.close()
+            self.writer = None
+            os.replace(self.tmp_path, self.path)
+        except OSError:
+            self.discard()
+            return False
+        return True
+
+    def discard(self):
+        """Abandonne l'écriture en cours"""
+        if self.writer is not None:
+            try:
+                self.writer.close()
+            except Exception:
+                pass
+            self.writer = None
+        if self.tmp_path.exists():
+            self.tmp_path.unlink()
+
+
+def cached_read_csv(csv_path, postprocess=None, version=None, cache_dir=None,
+                    reader=pd.read_csv):
+    """
+    Lit un CSV en passant par le cache Parquet
+
+    Args:
+        csv_path: Chemin du CSV source
+        postprocess: Fonction appliquée au DataFrame brut avant mise en cache
+                     (conversion de dates, types...)
+        version: Version du post-traitement ; la changer invalide le cache
+        cache_dir: Dossier du cache (défaut : ``<dossier du CSV>/.cache``)
+        reader: Fonction de lecture du CSV en cas de cache absent ou périmé
+
+    Returns:
+        pd.DataFrame: Table avec les types déjà convertis
+
+    Raises:
+        FileNotFoundError: Si le CSV source n'existe pas
+        PostprocessError: Si ``postprocess`` échoue (rien n'est mis en cache)
+    """
+    csv_path = Path(csv_path)
+    if not csv_path.exists():
+        raise FileNotFoundError(csv_path)
+
+    parquet_path, meta_path = cache_paths(csv_path, cache_dir)
+    meta = _read_meta(meta_path)
+
+    if parquet_path.exists():
+        valid, refreshed = is_cache_valid(csv_path, meta, version)
+        if valid:
+            if refreshed:
+                # Contenu identique, seul le mtime a bougé
+                _write_meta(meta_path, {**refreshed, 'version': version})
+            return pd.read_parquet(parquet_path)
+
+    fingerprint = file_fingerprint(csv_path)
+    df = reader(csv_path)
+
+    if postprocess is not None:
+        try:
+            df = postprocess(df)
+        except Exception as e:
+            raise PostprocessError(str(e)) from e
+
+    try:
+        write_cache(df, csv_path, fingerprint, version, cache_dir)
+    except OSError:
+        # Cache en lecture seule : on sert quand même les données
+        pass
+
+    return df
+
+
+def iter_cached_csv(csv_path, columns, chunk_rows, postprocess=None, version=None,
+                    cache_dir=None):
+    """
+    Parcourt un CSV par blocs de lignes, depuis le cache Parquet s'il est à jour
+
+    Depuis le cache, seules ``columns`` sont lues. Depuis le CSV, chaque bloc
+    est lu en entier et ajouté au cache Parquet au fil de la lecture
+    (``ParquetWriter``) : la table entière n'est jamais chargée en mémoire,
+    et le prochain parcours (ou read_table) part du cache. Le cache n'est mis
+    en place que si le parcours va jusqu'au bout.
+
+    Args:
+        csv_path: Chemin du CSV source
+        columns: Colonnes à lire
+        chunk_rows: Nombre de lignes par bloc
+        postprocess: Fonction appliquée à chaque bloc lu depuis le CSV
+        version: Version du post-traitement (voir cached_read_csv)
+        cache_dir: Dossier du cache
+
+    Yields:
+        pd.DataFrame: Blocs successifs, types déjà convertis
+
+    Raises:
+        FileNotFoundError: Si le CSV source n'existe pas
+    """
+    csv_path = Path(csv_path)
+    if not csv_path.exists():
+        raise FileNotFoundError(csv_path)
+
+    parquet_path, meta_path = cache_paths(csv_path, cache_dir)
+    if parquet_path.exists():
+        valid, refreshed = is_cache_valid(csv_path, _read_meta(meta_path), version)
+        if valid:
+            if refreshed:
+                _write_meta(meta_path, {**refreshed, 'version': version})
+            import pyarrow.parquet as pq
+
+            for batch in pq.ParquetFile(parquet_path).iter_batches(batch_size=chunk_rows,
+                                                                   columns=list(columns)):
+                yield batch.to_pandas()
+            return
+
+    fingerprint = file_fingerprint(csv_path)
+    cache = _ChunkedParquetWriter(parquet_path)
+    try:
+        for chunk in pd.read_csv(csv_path, chunksize=chunk_rows):
+            if postprocess is not None:
+                chunk = postprocess(chunk)
+            cache.write(chunk)
+            yield chunk[list(columns)]
+        if cache.commit():
+            try:
+                _write_meta(meta_path, {**fingerprint, 'version': version})
+            except OSError:
+                pass
+    finally:
+        cache.discard()
@@ -0,0 +1,171 @@
+"""
+Cube quotidien pré-agrégé pour la page Overview
+
+Une ligne par (jour, transport_type, state_code) avec des mesures additives
+(CA, commandes, livrées, réclamations, montants, distances...). Les séries
+de la page et les KPI (utils.kpi_engine) s'obtiennent en sommant les lignes
+du cube ; les taux sont des ratios de sommes, donc exacts quelle que soit la
+fréquence d'affichage.
+"""
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from utils.helpers import day_number
+
+CUBE_KEYS = ['order_day_num', 'transport_type', 'state_code']
+
+# Mesure du cube -> (colonne source, agrégation)
+# Les comptes 'n_*' (valeurs non nulles) servent de dénominateur aux moyennes
+CUBE_MEASURES = {
+    'ca': ('total_amount', 'sum'),
+    'nb_orders': ('order_id', 'count'),
+    'nb_delivered': ('is_delivered', 'sum'),
+    'nb_claims': ('has_claim', 'sum'),
+    'claim_amount': ('claim_amount', 'sum'),
+    'n_amount': ('total_amount', 'count'),
+    'nb_late': ('is_late', 'sum'),
+    'total_loss': ('total_loss', 'sum'),
+    'nb_theft': ('has_theft_incident', 'sum'),
+    'vandalism': ('total_vandalism', 'sum'),
+    'distance': ('total_distance_km', 'sum'),
+    'n_distance': ('total_distance_km', 'count'),
+    'duration': ('total_duration_hours', 'sum'),
+    'n_duration': ('total_duration_hours', 'count'),
+    'co2': ('co2_emission_estimate', 'sum'),
+    'transport_cost': ('transport_cost_estimate', 'sum'),
+    'n_transport_cost': ('transport_cost_estimate', 'count'),
+}
+
+# Colonnes booléennes sommées (peuvent être de type objet après jointure)
+_FLAG_COLUMNS = ['is_delivered', 'has_claim', 'is_late', 'has_theft_incident']
+
+
+def build_daily_cube(df):
+    """
+    Construit le cube quotidien à partir du dataset principal
+
+    Args:
+        df: DataFrame principal (résultat de prepare_main_dataset())
+
+    Returns:
+        pd.DataFrame: Cube trié par jour (colonnes CUBE_KEYS + mesures)
+    """
+    sources = sorted({col for col, _ in CUBE_MEASURES.values()})
+    data = df[CUBE_KEYS + sources].copy()
+    for col in _FLAG_COLUMNS:
+        data[col] = data[col].fillna(False).astype(bool)
+
+    cube = (
+        data.groupby(CUBE_KEYS, observed=True, dropna=False, sort=True)
+            .agg(**CUBE_MEASURES)
+            .reset_index()
+    )
+    return cube
+
+
+def _align_categories(cube, other):
+    """
+    Clés catégorielles des deux cubes sur les mêmes modalités (union triée,
+    comme incremental.concat_aligned) : ``pd.concat`` les convertirait en object
+    """
+    cube, other = cube.copy(deep=False), other.copy(deep=False)
+    for col in CUBE_KEYS:
+        a, b = cube[col], other[col]
+        if isinstance(a.dtype, pd.CategoricalDtype) and isinstance(b.dtype, pd.CategoricalDtype) \
+                and not a.dtype == b.dtype:
+            categories = union_categoricals([a.array, b.array], sort_categories=True).categories
+            cube[col] = a.cat.set_categories(categories)
+            other[col] = b.cat.set_categories(categories)
+    return cube, other
+
+
+def merge_cubes(cube, other):
+    """
+    Somme de deux cubes (ex. cube existant + cube des nouvelles commandes)
+
+    Seuls les jours présents dans ``other`` sont réagrégés ; les autres
+    lignes de ``cube`` sont reprises telles quelles.
+
+    Args:
+        cube: Cube existant (trié par jour)
+        other: Cube à ajouter
+
+    Returns:
+        pd.DataFrame: Cube trié par jour
+    """
+    if len(other) == 0:
+        return cube
+    cube, other = _align_categories(cube, other)
+    touched = cube['order_day_num'].isin(other['order_day_num'].unique())
+    merged = (
+        pd.concat([cube[touched], other], ignore_index=True)
+          .groupby(CUBE_KEYS, observed=True, dropna=False, sort=True)[list(CUBE_MEASURES)]
+          .sum()
+          .reset_index()
+    )
+    return (
+        pd.concat([cube[~touched], merged], ignore_index=True)
+          .sort_values(CUBE_KEYS, kind='stable', ignore_index=True)
+    )
+
+
+def slice_cube(cube, start_date, end_date, transport_filter=None, state_filter=None):
+    """
+    Lignes du cube pour une période et des filtres (mêmes règles que apply_filters)
+
+    Args:
+        cube: Cube quotidien (trié par jour)
+        start_date: Date de début (incluse)
+        end_date: Date de fin (incluse)
+        transport_filter: Modes cochés (vide = tous)
+        state_filter: États cochés (vide = tous)
+
+    Returns:
+        pd.DataFrame: Sous-ensemble du cube
+    """
+    lo, hi = np.searchsorted(
+        cube['order_day_num'].to_numpy(),
+        [day_number(start_date), day_number(end_date) + 1]
+    )
+    part = cube.iloc[lo:hi]
+
+    if transport_filter:
+        part = part[part['transport_type'].isin(transport_filter)]
+    if state_filter:
+        part = part[part['state_code'].isin(state_filter)]
+
+    return part
+
+
+def _add_rates(df):
+    """Taux (%) = ratio des sommes (et non moyenne de taux quotidiens)"""
+    nb_orders = df['nb_orders'].replace(0, np.nan)
+    df['delivery_rate'] = (df['nb_delivered'] / nb_orders * 100).fillna(0)
+    df['claim_rate'] = (df['nb_claims'] / nb_orders * 100).fillna(0)
+    return df
+
+
+def cube_timeseries(part, freq='D'):
+    """
+    Série temporelle agrégée à la fréquence demandée
+
+    Args:
+        part: Lignes du cube (slice_cube)
+        freq: 'D', 'W', 'M' ou 'Y'
+
+    Returns:
+        pd.DataFrame: Colonnes date, ca_daily, nb_orders, delivery_rate,
+        claim_rate, claim_amount (une ligne par période)
+    """
+    measures = ['ca', 'nb_orders', 'nb_delivered', 'nb_claims', 'claim_amount']
+    daily = part.groupby('order_day_num', sort=True)[measures].sum()
+    dates = pd.to_datetime(daily.index.to_numpy(dtype='int64'), unit='D')
+
+    if freq != 'D':
+        dates = dates.to_period(freq).to_timestamp()
+    series = daily.groupby(dates, sort=True).sum()
+
+    series = _add_rates(series.rename_axis('date').reset_index())
+    series = series.rename(columns={'ca': 'ca_daily'})
+    return series[['date', 'ca_daily', 'nb_orders', 'delivery_rate', 'claim_rate', 'claim_amount']]
@@ -1,30 +1,222 @@
 """
 Module de chargement et préparation des données
 """
+import logging
+
 import pandas as pd
 import streamlit as st
+from functools import partial
 from pathlib import Path
 
-@st.cache_data
+from utils.aggregations import grouped_agg, MostFrequent, StreamingGroupAgg
+from utils.columnar_cache import cached_read_csv, iter_cached_csv, PostprocessError
+from utils.cube import build_daily_cube
+from utils.dataset_handle import DatasetHandle, DatasetStore, require_copy_on_write
+from utils.filter_index import FilterIndex
+from utils.joins import KeyIndex, join_lookup
+from utils.helpers import to_day_numbers
+from utils.kpi_engine import KpiEngine
+from utils.materialized import (
+    append_markers, load_current, prune_versions, source_fingerprints, write_version
+)
+from utils.parallel_csv import read_csv_parallel, read_many
+from utils.refresher import REFRESH_INTERVAL, DatasetRefresher
+from utils.schema import TABLE_SCHEMAS, MAIN_SCHEMA, apply_schema
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = Path('data')
+
+# Tables sources (un fichier <nom>.csv par table dans DATA_DIR)
+TABLES = (
+    'orders', 'products', 'states_risk', 'transport_mode',
+    'claims', 'customers', 'order_product', 'order_route_leg'
+)
+
+# Colonnes de dates à convertir, par table
+DATE_COLUMNS = {
+    'orders': ['order_date', 'estimated_delivery_date', 'actual_delivery_date'],
+    'claims': ['claim_date', 'resolution_date'],
+    'order_route_leg': ['entered_at', 'exited_at'],
+    'customers': ['registration_date', 'churn_date'],
+}
+
+# À incrémenter quand le post-traitement des tables ou du dataset enrichi
+# change (invalide le cache Parquet et les builds matérialisés)
+CACHE_VERSION = 4
+
+# Ingestion parallèle : grosses tables découpées en plages d'octets analysées
+# en parallèle, toutes les tables lues en même temps
+CHUNKED_TABLES = ('orders', 'order_product', 'order_route_leg')
+CSV_ENGINE = 'pandas'      # 'pandas' ou 'pyarrow'
+INGEST_WORKERS = None      # None = un worker par cœur
+
+# Tables agrégées en flux par build_main_dataset (jamais chargées en entière) ;
+# les autres restent en mémoire (load_all_data)
+STREAMED_TABLES = ('order_route_leg',)
+IN_MEMORY_TABLES = tuple(name for name in TABLES if name not in STREAMED_TABLES)
+STREAM_CHUNK_ROWS = 500_000
+
+# Agrégats des étapes de route par commande : colonne source -> (agrégation, colonne produite)
+ROUTE_AGG = {
+    'vandalism_incidents': ('sum', 'total_vandalism'),
+    'theft_incident_flag': ('any', 'has_theft_incident'),
+    'distance_km': ('sum', 'total_distance_km'),
+    'leg_duration_hours': ('sum', 'total_duration_hours'),
+    'state_code': ('count', 'nb_states_crossed'),  # Nombre d'états traversés
+}
+
+
+def prepare_table(name, df):
+    """
+    Post-traitement d'une table brute : dates puis schéma de types
+    
+    Args:
+        name: Nom de la table
+        df: DataFrame brut (pd.read_csv)
+    
+    Returns:
+        pd.DataFrame: Table typée
+    """
+    df = parse_dates(name, df)
+    return apply_schema(df, TABLE_SCHEMAS.get(name, {}), name=name)
+
+
+def parse_dates(name, df):
+    """
+    Convertit les colonnes de dates d'une table
+
+    Args:
+        name: Nom de la table (clé de DATE_COLUMNS)
+        df: DataFrame brut
+
+    Returns:
+        pd.DataFrame: DataFrame avec les dates converties
+    """
+    for col in DATE_COLUMNS.get(name, []):
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col])
+    return df
+
+
+def read_table(name, data_dir=DATA_DIR):
+    """
+    Lit une table via le cache Parquet (dates et types déjà convertis)
+
+    Args:
+        name: Nom de la table
+        data_dir: Dossier contenant les CSV
+
+    Returns:
+        pd.DataFrame: Table chargée
+
+    Raises:
+        FileNotFoundError: Si le CSV est absent
+        PostprocessError: Si la conversion des dates échoue
+    """
+    reader = pd.read_csv
+    if name in CHUNKED_TABLES or CSV_ENGINE != 'pandas':
+        reader = partial(read_csv_parallel, workers=INGEST_WORKERS, engine=CSV_ENGINE)
+    
+    return cached_read_csv(
+        Path(data_dir) / f'{name}.csv',
+        postprocess=partial(prepare_table, name),
+        version=CACHE_VERSION,
+        reader=reader
+    )
+
+
+def read_tables(data_dir=DATA_DIR, tables=TABLES, on_postprocess_error=None):
+    """
+    Lit plusieurs tables en parallèle (pool de threads, une table par tâche)
+    
+    Args:
+        data_dir: Dossier contenant les CSV
+        tables: Noms des tables
+        on_postprocess_error: Fonction (nom, erreur) -> DataFrame appelée si
+                              la conversion d'une table échoue ; sans elle,
+                              l'erreur est propagée
+    
+    Returns:
+        dict: {nom: DataFrame}
+    """
+    def read(name):
+        try:
+            return read_table(name, data_dir)
+        except PostprocessError as e:
+            if on_postprocess_error is None:
+                raise
+            return on_postprocess_error(name, e)
+    
+    return read_many({name: partial(read, name) for name in tables}, workers=INGEST_WORKERS)
+
+
+def iter_table_chunks(name, columns, data_dir=DATA_DIR, chunk_rows=STREAM_CHUNK_ROWS):
+    """
+    Parcourt une table par blocs (cache Parquet à jour, sinon CSV)
+    
+    Args:
+        name: Nom de la table
+        columns: Colonnes à lire
+        data_dir: Dossier contenant les CSV
+        chunk_rows: Nombre de lignes par bloc
+    
+    Yields:
+        pd.DataFrame: Blocs typés comme read_table
+    """
+    return iter_cached_csv(
+        Path(data_dir) / f'{name}.csv',
+        columns,
+        chunk_rows,
+        postprocess=partial(prepare_table, name),
+        version=CACHE_VERSION
+    )
+
+
+def aggregate_route_legs(legs, order_ids):
+    """
+    Agrégats des étapes de route par commande (voir ROUTE_AGG)
+    
+    Args:
+        legs: DataFrame des étapes, ou itérable de blocs (iter_table_chunks)
+        order_ids: Identifiants des commandes
+    
+    Returns:
+        pd.DataFrame: Une ligne par commande (0 / False sans étape), indexée
+        par order_id
+    """
+    agg = StreamingGroupAgg(order_ids, {col: how for col, (how, _) in ROUTE_AGG.items()})
+    for chunk in ([legs] if isinstance(legs, pd.DataFrame) else legs):
+        agg.update(chunk, 'order_id')
+    
+    return agg.result().rename(columns={col: out for col, (_, out) in ROUTE_AGG.items()})
+
+
+@st.cache_resource
 def load_all_data():
     """
     Charge tous les fichiers CSV avec gestion d'erreurs
     
+    Les tables sont servies depuis le cache Parquet ``data/.cache`` quand le
+    CSV source n'a pas changé (taille, mtime, sha256). Chargées une fois par
+    processus et partagées : passer par get_dataset().table(nom) pour
+    obtenir une copie modifiable. Les STREAMED_TABLES ne sont pas chargées
+    (agrégées en flux par build_main_dataset).
+    
     Returns:
         dict: Dictionnaire contenant tous les DataFrames
     """
-    data_dir = Path('data')
+    failed = {}
+    
+    def read_raw(name, error):
+        # st.warning hors des threads du pool (pas de contexte Streamlit)
+        failed[name] = error
+        return pd.read_csv(DATA_DIR / f'{name}.csv')
     
     try:
-        # Chargement des fichiers
-        orders = pd.read_csv(data_dir / 'orders.csv')
-        products = pd.read_csv(data_dir / 'products.csv')
-        states_risk = pd.read_csv(data_dir / 'states_risk.csv')
-        transport_mode = pd.read_csv(data_dir / 'transport_mode.csv')
-        claims = pd.read_csv(data_dir / 'claims.csv')
-        customers = pd.read_csv(data_dir / 'customers.csv')
-        order_product = pd.read_csv(data_dir / 'order_product.csv')
-        order_route_leg = pd.read_csv(data_dir / 'order_route_leg.csv')
+        data = read_tables(DATA_DIR, IN_MEMORY_TABLES, on_postprocess_error=read_raw)
+        for name, e in failed.items():
+            st.warning(f"⚠️ Problème de conversion de dates ({name}) : {e}")
         
     except FileNotFoundError as e:
         st.error(f"❌ Fichier manquant : {e}")
@@ -34,112 +226,325 @@ def load_all_data():
         st.error(f"❌ Erreur lors du chargement des données : {e}")
         st.stop()
     
-    # Conversion des dates - Orders
-    try:
-        orders['order_date'] = pd.to_datetime(orders['order_date'])
-        orders['estimated_delivery_date'] = pd.to_datetime(orders['estimated_delivery_date'])
-        orders['actual_delivery_date'] = pd.to_datetime(orders['actual_delivery_date'])
-    except Exception as e:
-        st.warning(f"⚠️ Problème de conversion de dates (orders) : {e}")
+    return data
+
+
+def read_dataset_tables():
+    """
+    Tables sources d'un DatasetHandle (chargées à son premier accès à une table)
     
-    # Conversion des dates - Claims
-    try:
-        if 'claim_date' in claims.columns:
-            claims['claim_date'] = pd.to_datetime(claims['claim_date'])
-        if 'resolution_date' in claims.columns:
-            claims['resolution_date'] = pd.to_datetime(claims['resolution_date'])
-    except Exception as e:
-        st.warning(f"⚠️ Problème de conversion de dates (claims) : {e}")
+    Même fonction pour le handle initial et les handles reconstruits : les
+    tables sont celles des CSV de la version servie (pas le cache
+    ``load_all_data``, figé à la première lecture).
     
-    # Conversion des dates - Order Route Leg
-    try:
-        if 'entered_at' in order_route_leg.columns:
-            order_route_leg['entered_at'] = pd.to_datetime(order_route_leg['entered_at'])
-        if 'exited_at' in order_route_leg.columns:
-            order_route_leg['exited_at'] = pd.to_datetime(order_route_leg['exited_at'])
-    except Exception as e:
-        st.warning(f"⚠️ Problème de conversion de dates (route_leg) : {e}")
+    Returns:
+        dict: {nom: DataFrame} des IN_MEMORY_TABLES
+    """
+    return read_tables(DATA_DIR, IN_MEMORY_TABLES)
+
+
+def load_main_dataset():
+    """
+    Dataset principal et nom de la version matérialisée dont il provient
     
-    # Conversion des dates - Customers
-    try:
-        if 'registration_date' in customers.columns:
-            customers['registration_date'] = pd.to_datetime(customers['registration_date'])
-        if 'churn_date' in customers.columns:
-            customers['churn_date'] = pd.to_datetime(customers['churn_date'])
-    except Exception as e:
-        st.warning(f"⚠️ Problème de conversion de dates (customers) : {e}")
-    
-    return {
-        'orders': orders,
-        'products': products,
-        'states_risk': states_risk,
-        'transport_mode': transport_mode,
-        'claims': claims,
-        'customers': customers,
-        'order_product': order_product,
-        'order_route_leg': order_route_leg
-    }
+    Version active de ``data/.build`` si elle est à jour ; sinon le dataset
+    est construit puis publié.
+    
+    Returns:
+        tuple: (pd.DataFrame, version ou None si la publication a échoué)
+    """
+    df, manifest = load_current(DATA_DIR, pipeline_version=CACHE_VERSION)
+    if df is not None:
+        return df, manifest['version']
+    
+    df = build_main_dataset(load_all_data())
+    return publish_main_dataset(df)
 
 
-@st.cache_data
+@st.cache_resource
 def prepare_main_dataset():
     """
     Prépare le dataset principal avec toutes les jointures et colonnes dérivées
     
+    Le dataset est mappé en mémoire depuis la version matérialisée
+    (``data/.build``) : une seule instance par processus, partagée par
+    référence entre les sessions, et des pages partagées entre processus.
+    Si aucune version à jour n'existe, elle est construite puis publiée.
+    
+    Returns:
+        pd.DataFrame: Dataset principal enrichi (colonnes en lecture seule,
+        ne pas modifier : travailler sur une copie)
+    """
+    df, _ = load_main_dataset()
+    return df
+
+
+def publish_main_dataset(df):
+    """
+    Publie le dataset construit dans ``data/.build`` puis le recharge mappé
+    
+    Args:
+        df: Dataset principal (résultat de build_main_dataset)
+    
+    Returns:
+        tuple: (vue mappée du dataset publié, version), ou (``df``, None)
+        si la publication échoue (dossier en lecture seule...)
+    """
+    try:
+        sources = source_fingerprints(DATA_DIR, TABLES, with_hash=True)
+        version = write_version(df, DATA_DIR, sources, extra={
+            'pipeline_version': CACHE_VERSION,
+            'append_markers': append_markers(DATA_DIR, sources),
+        })
+        prune_versions(DATA_DIR)
+    except OSError as e:
+        st.warning(f"Publication du dataset impossible ({e}) : copie en mémoire")
+        return df, None
+    
+    mapped, _ = load_current(DATA_DIR, pipeline_version=CACHE_VERSION)
+    return (df, None) if mapped is None else (mapped, version)
+
+
+def dataset_version():
+    """
+    Identifiant de la version des données (clé des caches de KPI)
+    
+    Calculé à partir de la taille et de la date de modification des CSV
+    sources : quelques appels stat, sans lecture des fichiers.
+    
+    Returns:
+        tuple | None: Version du pipeline + empreintes, None si un CSV manque
+    """
+    try:
+        sources = source_fingerprints(DATA_DIR, TABLES)
+    except OSError:
+        return None
+    return (CACHE_VERSION,) + tuple((fp['size'], fp['mtime_ns']) for fp in sources.values())
+
+
+@st.cache_resource
+def get_dataset_store():
+    """
+    Référence partagée vers le dataset courant, créée une fois par processus
+    
+    Démarre aussi le thread de rechargement (REFRESH_INTERVAL secondes,
+    None pour le désactiver) : les CSV modifiés dans ``data/`` sont
+    reconstruits en tâche de fond puis le handle est remplacé atomiquement.
+    
+    Returns:
+        DatasetStore: Store du handle courant
+    """
+    df, build = load_main_dataset()
+    store = DatasetStore(
+        DatasetHandle(df, version=dataset_version(), load_tables=read_dataset_tables, build=build)
+    )
+    if REFRESH_INTERVAL:
+        DatasetRefresher(store, DATA_DIR, TABLES, rebuild_dataset, interval=REFRESH_INTERVAL).start()
+    return store
+
+
+def get_dataset():
+    """
+    Handle immuable sur les données courantes
+    
+    À appeler une fois par exécution de page puis à transmettre aux
+    fonctions ci-dessous : toute la page travaille ainsi sur la même version,
+    même si un rechargement a lieu pendant son exécution.
+    
+    Returns:
+        DatasetHandle: Dataset principal (.main) et tables sources (.table(nom))
+    """
+    return get_dataset_store().current()
+
+
+def refresh_error():
+    """
+    Échec du dernier rechargement en tâche de fond
+    
+    Returns:
+        tuple | None: (message, datetime) si les données servies n'ont pas
+        pu être rechargées, None sinon
+    """
+    store = get_dataset_store()
+    if store.refresh_error is None:
+        return None
+    return store.refresh_error, store.refresh_error_at
+
+
+def rebuild_dataset(previous=None):
+    """
+    Reconstruit le dataset (incrémental si possible) et renvoie un nouveau handle
+    
+    Exécuté par le thread de rechargement : aucun appel Streamlit. Les
+    objets dérivés du handle sont construits ici, avant le remplacement :
+    le premier rerun sur la nouvelle version ne les recalcule pas. Après
+    un ajout de lignes, le cube quotidien est celui du handle courant
+    complété des nouvelles commandes (update_cube), sans reparcourir le
+    dataset.
+    
+    Args:
+        previous: Handle courant (ses tables chargées le sont aussi sur le
+                  nouveau handle)
+    
+    Returns:
+        DatasetHandle: Handle sur la nouvelle version, prêt à servir
+    """
+    # Import local : build_dataset et incremental importent ce module
+    from utils.build_dataset import refresh
+    from utils.incremental import update_cube
+    
+    appends = []
+    refresh(DATA_DIR, log=logger.info, on_append=lambda *args: appends.append(args))
+    # Version validée par refresh : un CSV modifié depuis attend le cycle suivant
+    df, manifest = load_current(DATA_DIR, check_sources=False, pipeline_version=CACHE_VERSION)
+    if df is None:
+        raise RuntimeError("Version reconstruite illisible")
+    handle = DatasetHandle(
+        df, version=dataset_version(), load_tables=read_dataset_tables, build=manifest['version']
+    )
+    
+    # Cube incrémental seulement si le handle courant est la version de départ
+    if appends and previous is not None:
+        base_version, new_version, part = appends[-1]
+        if previous.build == base_version and handle.build == new_version:
+            handle.derived('daily_cube', lambda _: update_cube(get_daily_cube(previous), part))
+    
+    warm_dataset(handle, tables=previous is not None and previous.tables_loaded)
+    return handle
+
+
+def warm_dataset(dataset, tables=False):
+    """
+    Construit les objets dérivés d'un handle (index des filtres, cube
+    quotidien, moteur de KPI) et, au besoin, charge ses tables sources
+    
+    Args:
+        dataset: Handle à préparer
+        tables: Charge aussi les tables sources
+    """
+    get_filter_index(dataset)
+    get_daily_cube(dataset)
+    get_kpi_engine(dataset)
+    if tables:
+        dataset.table('orders')
+
+
+def get_filter_index(dataset=None):
+    """
+    Index des filtres transport / état, construit une fois par version
+    
+    Args:
+        dataset: Handle de la page (défaut : handle courant)
+    
+    Returns:
+        FilterIndex: Bitmaps par valeur sur le dataset principal
+    """
+    dataset = dataset or get_dataset()
+    return dataset.derived('filter_index', FilterIndex)
+
+
+def get_daily_cube(dataset=None):
+    """
+    Cube quotidien (jour x transport x état) du dataset principal
+    
+    Args:
+        dataset: Handle de la page (défaut : handle courant)
+    
+    Returns:
+        pd.DataFrame: Cube de mesures additives (voir utils.cube)
+    """
+    dataset = dataset or get_dataset()
+    return dataset.derived('daily_cube', build_daily_cube)
+
+
+def get_kpi_engine(dataset=None):
+    """
+    Moteur de KPI (sommes préfixes + sketches HLL) sur le cube quotidien
+    
+    Args:
+        dataset: Handle de la page (défaut : handle courant)
+    
+    Returns:
+        KpiEngine: Réponses de get_kpi_metrics pour toute sélection sidebar
+    """
+    dataset = dataset or get_dataset()
+    return dataset.derived(
+        'kpi_engine', lambda df: KpiEngine(df, get_daily_cube(dataset), index=get_filter_index(dataset))
+    )
+
+
+def build_main_dataset(data, data_dir=DATA_DIR):
+    """
+    Construit le dataset principal à partir des tables sources
+    
+    Args:
+        data: Dictionnaire des DataFrames (résultat de load_all_data()) ;
+              sans 'order_route_leg', les étapes sont lues par blocs dans
+              ``data_dir``
+        data_dir: Dossier contenant les CSV
+    
     Returns:
         pd.DataFrame: Dataset principal enrichi
     """
-    data = load_all_data()
+    # Construit avant tout DatasetHandle (démarrage, CLI, benchmarks) : les
+    # colonnes ajoutées aux vues intermédiaires ne recopient pas les blocs
+    require_copy_on_write()
+    
+    # Jointures gauche par positions (utils.joins) : seules les colonnes
+    # ajoutées sont lues, la table des commandes n'est jamais recopiée
+    
+    # Tri par date de commande dès la table des commandes : les jointures
+    # gauche conservent cet ordre, le dataset enrichi n'est jamais retrié.
+    # Les filtres de période deviennent une recherche dichotomique (voir
+    # sidebar.slice_date_range)
+    df = data['orders'].sort_values('order_date', kind='stable', ignore_index=True)
     
     # Dataset principal : orders + transport + customers
-    df = data['orders'].copy()
-    df = df.merge(data['transport_mode'], on='transport_id', how='left')
-    df = df.merge(data['customers'], on='customer_id', how='left')
-    
-    # Ajouter les claims
-    df = df.merge(
-        data['claims'][['order_id', 'claim_type', 'claim_status', 'claim_amount', 
-                       'refunded_amount', 'resolution_time_days']], 
-        on='order_id', 
-        how='left'
+    df = join_lookup(df, data['transport_mode'], on='transport_id')
+    df = join_lookup(df, data['customers'], on='customer_id')
+    
+    # Clés order_id indexées une fois pour les jointures par commande
+    order_keys = KeyIndex(df['order_id'])
+    
+    # Ajouter les claims (merge si plusieurs réclamations par commande)
+    df = join_lookup(
+        df, data['claims'], on='order_id',
+        columns=['claim_type', 'claim_status', 'claim_amount', 
+                 'refunded_amount', 'resolution_time_days'],
+        keys=order_keys
     )
     
     # Ajouter info produits (agrégées par commande)
-    order_products = data['order_product'].merge(
-        data['products'], 
-        on='product_id', 
-        how='left'
-    )
+    order_products = join_lookup(data['order_product'], data['products'], on='product_id')
     
-    product_agg = order_products.groupby('order_id').agg({
+    product_agg = grouped_agg(order_products, 'order_id', {
         'line_total': 'sum',
         'quantity': 'sum',
         'return_flag': 'any',
         'refund_amount': 'sum',
-        'fragility_class': lambda x: x.mode()[0] if len(x.mode()) > 0 else 'Unknown',
+        'fragility_class': MostFrequent(default='Unknown'),
         'theft_attractiveness_score': 'mean',
         'christmas_popularity_multiplier': 'mean'
-    }).reset_index()
+    })
     
-    product_agg.columns = ['order_id', 'product_line_total', 'total_quantity', 
+    product_agg.columns = ['product_line_total', 'total_quantity', 
                           'has_return', 'product_refund_amount', 'main_fragility_class',
                           'avg_theft_attractiveness', 'avg_christmas_multiplier']
     
-    df = df.merge(product_agg, on='order_id', how='left')
+    df = join_lookup(df, product_agg, on='order_id', keys=order_keys)
     
-    # Ajouter info route (incidents totaux par commande)
-    route_agg = data['order_route_leg'].groupby('order_id').agg({
-        'vandalism_incidents': 'sum',
-        'theft_incident_flag': 'any',
-        'distance_km': 'sum',
-        'leg_duration_hours': 'sum',
-        'state_code': 'count'  # Nombre d'états traversés
-    }).reset_index()
+    # Ajouter info route (incidents totaux par commande), en flux : la
+    # mémoire dépend du nombre de commandes, pas du nombre d'étapes
+    legs = data.get('order_route_leg')
+    if legs is None:
+        legs = iter_table_chunks('order_route_leg', ['order_id', *ROUTE_AGG], data_dir)
+    route_agg = aggregate_route_legs(legs, df['order_id'])
     
-    route_agg.columns = ['order_id', 'total_vandalism', 'has_theft_incident', 
-                        'total_distance_km', 'total_duration_hours', 'nb_states_crossed']
-    
-    df = df.merge(route_agg, on='order_id', how='left')
+    if len(route_agg) == len(df):
+        # Commandes uniques : une ligne par commande, déjà dans l'ordre de df
+        df = pd.concat([df, route_agg.set_axis(df.index)], axis=1)
+    else:
+        df = join_lookup(df, route_agg, on='order_id', keys=order_keys)
     
    
     # ===== GESTION DES VALEURS MANQUANTES =====
@@ -205,13 +610,18 @@ def prepare_main_dataset():
         include_lowest=True
     )
     
-    return df
+    # Numéro de jour (dataset déjà trié par date de commande)
+    df['order_day_num'] = to_day_numbers(df['order_date'])
+    
+    return apply_schema(df, MAIN_SCHEMA, name='main')
 
 
-@st.cache_data
 def get_kpi_metrics(df):
     """
-    Calcule les KPI principaux du dashboard
+    Calcule les KPI principaux du dashboard sur un DataFrame filtré
+    
+    Calcul de référence (benchmarks) : les pages passent par
+    get_kpi_engine, qui donne les mêmes KPI sans parcourir les lignes.
     
     Args:
         df: DataFrame principal (résultat de prepare_main_dataset())
@@ -254,83 +664,3 @@ def get_kpi_metrics(df):
     }
     
     return kpis
-
-
-
-# page reclamation:
-
-
-@st.cache_data
-def get_claims_kpi_metrics(df_orders, df_customers, df_claims, start_date, end_date):
-    """
-    Calcule les KPI pour la page Réclamations & Satisfaction Client
-    
-    Args:
-        df_orders: DataFrame des commandes (DÉJÀ filtré par order_date)
-        df_customers: DataFrame des clients (complet)
-        df_claims: DataFrame des réclamations (DÉJÀ filtré par claim_date)
-        start_date: Date de début (date ou Timestamp)
-        end_date: Date de fin (date ou Timestamp)
-    
-    Returns:
-        dict: Dictionnaire contenant les 3 KPI + métriques complémentaires
-    """
-    # Convertir les dates
-    df_customers = df_customers.copy()
-    df_customers['churn_date'] = pd.to_datetime(df_customers['churn_date'], errors='coerce')
-    df_customers['registration_date'] = pd.to_datetime(df_customers['registration_date'])
-    
-    # === KPI 1 : Taux de Réclamations (DURANT la période) ===
-    total_orders = len(df_orders)
-    
-    # Compter les commandes ayant au moins 1 réclamation DANS la période
-    orders_with_claims_in_period = df_claims['order_id'].nunique()
-    
-    claim_rate = (orders_with_claims_in_period / total_orders * 100) if total_orders > 0 else 0
-    
-    # === BASE DE CALCUL : Clients actifs au début de la période ===
-    active_at_start = df_customers[
-        (df_customers['registration_date'] <= pd.to_datetime(start_date)) &
-        (
-            (df_customers['churn_status'] != 'Churned') | 
-            (df_customers['churn_date'] > pd.to_datetime(start_date))
-        )
-    ]
-    
-    total_customers_at_start = len(active_at_start)
-    
-    # === KPI 2 : Taux de Churn (clients qui ont churné DURANT la période) ===
-    churned_in_period = df_customers[
-        (df_customers['churn_status'] == 'Churned') &
-        (df_customers['churn_date'] >= pd.to_datetime(start_date)) &
-        (df_customers['churn_date'] <= pd.to_datetime(end_date))
-    ]
-    
-    nb_churned_in_period = len(churned_in_period)
-    churn_rate = (nb_churned_in_period / total_customers_at_start * 100) if total_customers_at_start > 0 else 0
-    
-    # === KPI 3 : Clients Actifs (au début de la période) ===
-    active_customers = total_customers_at_start  # ✅ MÊME BASE QUE LE CHURN !
-    
-    # === Métriques complémentaires ===
-    total_claims = len(df_claims)
-    avg_resolution_time = df_claims['resolution_time_days'].mean() if total_claims > 0 else 0
-    total_claim_amount = df_claims['claim_amount'].sum()
-    total_refunded = df_claims['refunded_amount'].sum()
-    
-    return {
-        # KPI principaux
-        'claim_rate': claim_rate,
-        'churn_rate': churn_rate,
-        'active_customers': active_customers,
-        
-        # Métriques complémentaires
-        'total_orders': total_orders,
-        'orders_with_claims': orders_with_claims_in_period,
-        'total_customers': total_customers_at_start,
-        'churned_customers': nb_churned_in_period,
-        'total_claims': total_claims,
-        'avg_resolution_time': avg_resolution_time,
-        'total_claim_amount': total_claim_amount,
-        'total_refunded': total_refunded
-    }
\ No newline at end of file
@@ -0,0 +1,177 @@
+"""
+Handle immuable sur les données du dashboard
+
+Le dataset principal et les tables sources sont chargés une fois par
+processus (``st.cache_resource``) et partagés par référence entre sessions.
+Les pages n'accèdent jamais aux objets partagés eux-mêmes : ``handle.main``
+et ``handle.table(name)`` renvoient des copies superficielles, qui ne
+recopient aucune donnée. Ajouter ou remplacer une colonne (``df[col] = ...``)
+ne touche que la copie de la page. Les modifications en place
+(``.loc[...] =``...) ne sont isolées qu'avec le mode copy-on-write de pandas :
+le handle l'active à sa création (``require_copy_on_write``), quel que soit
+le point d'entrée (test1.py, page lancée seule, AppTest, benchmarks).
+"""
+import logging
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+def require_copy_on_write():
+    """
+    Active le mode copy-on-write de pandas (défaut de pandas 3) s'il ne
+    l'est pas : une copie superficielle ne recopie alors une colonne qu'au
+    moment où elle est modifiée, sans jamais toucher le dataset partagé
+    """
+    if pd.options.mode.copy_on_write is not True:
+        logger.info("Activation du mode copy-on-write de pandas (requis par DatasetHandle)")
+        pd.set_option('mode.copy_on_write', True)
+
+
+class DatasetHandle:
+    """
+    Dataset principal + tables sources, en lecture seule
+
+    Attributs:
+        version: Version des données (voir data_loader.dataset_version)
+        build: Nom de la version matérialisée (data/.build) ou None si inconnue
+        n_rows: Nombre de lignes du dataset principal
+
+    Exemple:
+        dataset = get_dataset()
+        df_full = dataset.main
+        df_claims = dataset.table('claims')
+    """
+
+    __slots__ = ('_main', '_tables', '_load_tables', '_derived', '_lock', 'version', 'build', 'n_rows')
+
+    def __init__(self, main, version=None, load_tables=None, build=None):
+        """
+        Args:
+            main: Dataset principal (prepare_main_dataset)
+            version: Identifiant de version
+            load_tables: Fonction sans argument renvoyant {nom: DataFrame} ;
+                         appelée au premier accès à une table
+            build: Nom de la version matérialisée chargée
+        """
+        require_copy_on_write()
+        set_attr = object.__setattr__
+        set_attr(self, '_main', main)
+        set_attr(self, '_tables', None)
+        set_attr(self, '_load_tables', load_tables)
+        set_attr(self, '_derived', {})
+        set_attr(self, '_lock', threading.RLock())
+        set_attr(self, 'version', version)
+        set_attr(self, 'build', build)
+        set_attr(self, 'n_rows', len(main))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("DatasetHandle est immuable")
+
+    def __delattr__(self, name):
+        raise AttributeError("DatasetHandle est immuable")
+
+    @property
+    def main(self):
+        """Dataset principal (copie superficielle, modifiable sans effet partagé)"""
+        return self._main.copy(deep=False)
+
+    def table(self, name):
+        """
+        Table source par nom (copie superficielle)
+
+        Args:
+            name: Nom de la table (voir data_loader.TABLES)
+
+        Returns:
+            pd.DataFrame: Table, ou DataFrame vide si elle est absente
+        """
+        if self._tables is None:
+            if self._load_tables is None:
+                return pd.DataFrame()
+            with self._lock:
+                if self._tables is None:
+                    object.__setattr__(self, '_tables', dict(self._load_tables()))
+        table = self._tables.get(name)
+        return pd.DataFrame() if table is None else table.copy(deep=False)
+
+    @property
+    def tables_loaded(self):
+        """Vrai si les tables sources ont déjà été chargées"""
+        return self._tables is not None
+
+    def derived(self, name, factory):
+        """
+        Objet calculé à partir du dataset principal (index, cube...), une
+        fois par handle : il est remplacé avec le handle lors d'un rechargement
+
+        Args:
+            name: Nom de l'objet
+            factory: Fonction (DataFrame principal) -> objet
+
+        Returns:
+            L'objet, partagé entre sessions (ne pas le modifier)
+        """
+        value = self._derived.get(name)
+        if value is None:
+            with self._lock:
+                value = self._derived.get(name)
+                if value is None:
+                    value = factory(self._main)
+                    self._derived[name] = value
+        return value
+
+    def __repr__(self):
+        return f"DatasetHandle(version={self.version!r}, n_rows={self.n_rows:,})"
+
+
+class DatasetStore:
+    """
+    Référence partagée vers le handle courant, remplacée atomiquement
+
+    Les pages lisent ``store.current()`` une fois en début d'exécution et
+    gardent ce handle jusqu'à la fin du script : une session en cours ne
+    change de version qu'à son prochain rerun.
+
+    Attributs:
+        swaps: Nombre de remplacements depuis le démarrage
+        last_swap: Date du dernier remplacement (datetime) ou None
+        refresh_error: Erreur du dernier rechargement si celui-ci a échoué
+                       (données servies périmées), None sinon
+        refresh_error_at: Date de cet échec (datetime) ou None
+    """
+
+    def __init__(self, handle):
+        self._handle = handle
+        self._lock = threading.Lock()
+        self.swaps = 0
+        self.last_swap = None
+        self.refresh_error = None
+        self.refresh_error_at = None
+
+    def current(self):
+        """Handle courant"""
+        return self._handle
+
+    def swap(self, handle):
+        """
+        Remplace le handle courant
+
+        Returns:
+            DatasetHandle: L'ancien handle
+        """
+        with self._lock:
+            old, self._handle = self._handle, handle
+            self.swaps += 1
+            self.last_swap = datetime.now()
+            self.refresh_error = self.refresh_error_at = None
+        return old
+
+    def report_error(self, message):
+        """Signale l'échec d'un rechargement (le handle courant reste servi)"""
+        with self._lock:
+            self.refresh_error = message
+            self.refresh_error_at = datetime.now()
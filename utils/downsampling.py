@@ -0,0 +1,120 @@
+"""
+Réduction du nombre de points des séries temporelles avant tracé
+
+Au-delà d'un point par pixel, les points supplémentaires d'une courbe ne
+sont plus visibles mais restent envoyés au navigateur et dessinés. Deux
+méthodes gardent la forme de la série :
+
+    - LTTB (Largest Triangle Three Buckets) pour les courbes : un point par
+      tranche, celui qui forme le plus grand triangle avec le point retenu
+      précédent et la moyenne de la tranche suivante ;
+    - min / max par tranche pour les barres : les pics et les creux restent
+      visibles.
+
+Les fonctions renvoient des positions (triées) : les lignes retenues sont
+prises telles quelles, sans interpolation.
+"""
+import numpy as np
+import pandas as pd
+
+
+def _as_float(values):
+    """Valeurs numériques ou dates -> float64 (dates en nanosecondes)"""
+    values = pd.Series(values) if not isinstance(values, pd.Series) else values
+    if pd.api.types.is_datetime64_any_dtype(values.dtype):
+        values = values.dt.tz_localize(None) if values.dt.tz is not None else values
+        return values.to_numpy(dtype='datetime64[ns]').view(np.int64).astype(np.float64)
+    return pd.to_numeric(values, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+# ===== POSITIONS =====
+def lttb_indices(x, y, n_out):
+    """
+    Positions des points retenus par LTTB
+
+    Args:
+        x: Abscisses croissantes (nombres ou dates)
+        y: Ordonnées
+        n_out: Nombre de points voulu (premier et dernier toujours gardés)
+
+    Returns:
+        np.ndarray: Positions int64 triées
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x, y = _as_float(x), np.nan_to_num(_as_float(y))
+    # Tranches des points intérieurs ; la dernière « tranche suivante » est le dernier point
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    starts, ends = edges[:-1], edges[1:]
+    csum_x, csum_y = np.concatenate(([0.0], np.cumsum(x))), np.concatenate(([0.0], np.cumsum(y)))
+    next_starts = np.append(starts[1:], n - 1)
+    next_ends = np.append(ends[1:], n)
+    avg_x = (csum_x[next_ends] - csum_x[next_starts]) / (next_ends - next_starts)
+    avg_y = (csum_y[next_ends] - csum_y[next_starts]) / (next_ends - next_starts)
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i, (lo, hi) in enumerate(zip(starts, ends)):
+        bx, by = x[lo:hi], y[lo:hi]
+        area = np.abs((x[a] - avg_x[i]) * (by - y[a]) - (x[a] - bx) * (avg_y[i] - y[a]))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def minmax_indices(y, n_out):
+    """
+    Positions du minimum et du maximum de chaque tranche
+
+    Args:
+        y: Valeurs
+        n_out: Nombre maximal de points (premier et dernier toujours gardés)
+
+    Returns:
+        np.ndarray: Positions int64 triées
+    """
+    n = len(y)
+    n_buckets = (n_out - 2) // 2
+    if n_out >= n or n_buckets < 1:
+        return np.arange(n)
+
+    y = np.nan_to_num(_as_float(y))
+    bucket = np.arange(n, dtype=np.int64) * n_buckets // n
+    # Tri par (tranche, valeur) : premier = min, dernier = max de chaque tranche
+    order = np.lexsort((y, bucket))
+    bounds = np.searchsorted(bucket[order], np.arange(n_buckets + 1))
+    selected = np.concatenate((order[bounds[:-1]], order[bounds[1:] - 1], [0, n - 1]))
+    return np.unique(selected)
+
+
+# ===== DATAFRAMES =====
+def downsample(df, x, y, max_points, method='lttb'):
+    """
+    Lignes de ``df`` à tracer pour au plus ~``max_points`` points par série
+
+    Args:
+        df: DataFrame trié par ``x``
+        x: Colonne des abscisses
+        y: Colonne(s) des ordonnées ; avec plusieurs colonnes, les positions
+           retenues pour chacune sont réunies (abscisses communes)
+        max_points: Points par série (None : pas de réduction)
+        method: 'lttb' (courbes) ou 'minmax' (barres)
+
+    Returns:
+        pd.DataFrame: ``df`` ou un sous-ensemble de ses lignes
+    """
+    if max_points is None or len(df) <= max_points:
+        return df
+
+    y_cols = [y] if isinstance(y, str) else list(y)
+    if method == 'lttb':
+        positions = [lttb_indices(df[x], df[col], max_points) for col in y_cols]
+    elif method == 'minmax':
+        positions = [minmax_indices(df[col], max_points) for col in y_cols]
+    else:
+        raise ValueError(f"Méthode de réduction inconnue : {method}")
+
+    return df.iloc[np.unique(np.concatenate(positions))]
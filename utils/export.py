@@ -0,0 +1,200 @@
+"""
+Export des données par blocs de lignes
+
+Le fichier exporté n'est jamais construit en entier en mémoire : chaque bloc
+de ``chunk_rows`` lignes est sérialisé puis écrit dans un fichier. Le pic
+mémoire dépend de la taille d'un bloc, pas du nombre de lignes exportées.
+
+Pour le téléchargement, le fichier est écrit dans ``static/exports/`` et
+servi par la route statique de Streamlit (``/app/static``, option
+``server.enableStaticServing``) : tornado le lit sur disque par blocs de
+64 Ko, sans le charger en mémoire comme ``st.download_button``. Chaque
+export a son propre dossier au nom aléatoire, supprimé avec le fichier ;
+les exports plus anciens que ``EXPORT_TTL_SECONDS`` sont supprimés au
+suivant.
+
+La route statique n'est pas authentifiée : tant que le fichier existe,
+quiconque connaît son URL peut le télécharger. Le nom aléatoire (128 bits)
+la rend impossible à deviner, mais elle ne doit pas être partagée.
+
+Formats : 'csv', 'csv.gz' (CSV compressé gzip) et 'parquet' (un row group
+par bloc).
+"""
+import gzip
+import os
+import secrets
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+EXPORT_CHUNK_ROWS = 50_000
+EXPORT_PREFIX = 'logistixup-export-'
+
+# Dossier statique de Streamlit : static/ à côté du script principal (test1.py)
+STATIC_EXPORT_DIR = Path(__file__).resolve().parent.parent / 'static' / 'exports'
+STATIC_EXPORT_URL = 'app/static/exports'
+# Taille maximale d'un fichier servi par la route statique de Streamlit
+STATIC_MAX_BYTES = 200 * 1024 * 1024
+EXPORT_TTL_SECONDS = 3600
+
+# Format -> (extension, type MIME)
+EXPORT_FORMATS = {
+    'csv': ('.csv', 'text/csv'),
+    'csv.gz': ('.csv.gz', 'application/gzip'),
+    'parquet': ('.parquet', 'application/vnd.apache.parquet'),
+}
+
+
+def iter_chunks(df, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Tranches successives de ``chunk_rows`` lignes (vues, sans copie)"""
+    for start in range(0, len(df), chunk_rows):
+        yield start, df.iloc[start:start + chunk_rows]
+
+
+def iter_csv_chunks(df, chunk_rows=EXPORT_CHUNK_ROWS):
+    """
+    Texte CSV du DataFrame, bloc par bloc (en-tête dans le premier bloc)
+
+    Args:
+        df: DataFrame à exporter
+        chunk_rows: Nombre de lignes par bloc
+
+    Yields:
+        str: Fragment CSV
+    """
+    if len(df) == 0:
+        yield df.to_csv(index=False)
+        return
+    for start, chunk in iter_chunks(df, chunk_rows):
+        yield chunk.to_csv(index=False, header=start == 0)
+
+
+def _write_csv(df, path, chunk_rows, compress):
+    opener = gzip.open if compress else open
+    with opener(path, 'wt', encoding='utf-8', newline='') as f:
+        for text in iter_csv_chunks(df, chunk_rows):
+            f.write(text)
+
+
+def _write_parquet(df, path, chunk_rows):
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    with pq.ParquetWriter(path, schema) as writer:
+        for _, chunk in iter_chunks(df, chunk_rows):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+
+def export_dataframe(df, fmt='csv', path=None, chunk_rows=EXPORT_CHUNK_ROWS):
+    """
+    Écrit le DataFrame dans un fichier, par blocs
+
+    Args:
+        df: DataFrame à exporter
+        fmt: 'csv', 'csv.gz' ou 'parquet'
+        path: Fichier de destination (défaut : fichier temporaire)
+        chunk_rows: Nombre de lignes par bloc
+
+    Returns:
+        Path: Chemin du fichier écrit
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Format d'export inconnu : {fmt} (attendu : {', '.join(EXPORT_FORMATS)})")
+
+    if path is None:
+        fd, path = tempfile.mkstemp(prefix=EXPORT_PREFIX, suffix=EXPORT_FORMATS[fmt][0])
+        os.close(fd)
+
+    try:
+        if fmt == 'parquet':
+            _write_parquet(df, path, chunk_rows)
+        else:
+            _write_csv(df, path, chunk_rows, compress=(fmt == 'csv.gz'))
+    except BaseException:
+        remove_export(path)
+        raise
+    return Path(path)
+
+
+def export_file_name(filename, fmt):
+    """Nom de fichier proposé au téléchargement, avec l'extension du format"""
+    stem = filename
+    for ext, _ in EXPORT_FORMATS.values():
+        if stem.endswith(ext):
+            stem = stem[:-len(ext)]
+            break
+    return stem + EXPORT_FORMATS[fmt][0]
+
+
+def remove_export(path):
+    """
+    Supprime un fichier d'export (ignore les fichiers déjà supprimés)
+
+    Pour un export statique, tout son dossier au nom aléatoire est supprimé,
+    même si le fichier n'existe plus ou n'a jamais été écrit : aucun dossier
+    vide ne reste dans ``static/exports/``.
+    """
+    if path is None:
+        return
+    path = Path(path)
+    if path.resolve().parent.parent == STATIC_EXPORT_DIR:
+        shutil.rmtree(path.parent, ignore_errors=True)
+        return
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+# ===== EXPORTS SERVIS PAR LA ROUTE STATIQUE =====
+def static_export_path(filename, fmt, export_dir=STATIC_EXPORT_DIR):
+    """
+    Chemin d'un nouvel export dans un dossier au nom aléatoire
+
+    Args:
+        filename: Nom proposé (l'extension suit le format)
+        fmt: 'csv', 'csv.gz' ou 'parquet'
+        export_dir: Dossier des exports statiques
+
+    Returns:
+        Path: Fichier à écrire (son dossier est créé)
+
+    Raises:
+        ValueError: Format inconnu (aucun dossier créé)
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Format d'export inconnu : {fmt} (attendu : {', '.join(EXPORT_FORMATS)})")
+    folder = Path(export_dir) / secrets.token_urlsafe(16)
+    folder.mkdir(parents=True)
+    return folder / export_file_name(filename, fmt)
+
+
+def export_url(path, export_dir=STATIC_EXPORT_DIR):
+    """URL relative (route /app/static) d'un export écrit par static_export_path"""
+    relative = Path(path).relative_to(export_dir)
+    return f"{STATIC_EXPORT_URL}/{relative.as_posix()}"
+
+
+def prune_exports(max_age=EXPORT_TTL_SECONDS, export_dir=STATIC_EXPORT_DIR):
+    """
+    Supprime les exports statiques plus anciens que ``max_age`` secondes
+
+    Returns:
+        int: Nombre d'exports supprimés
+    """
+    removed = 0
+    limit = time.time() - max_age
+    try:
+        folders = list(Path(export_dir).iterdir())
+    except FileNotFoundError:
+        return 0
+    for folder in folders:
+        try:
+            if folder.is_dir() and folder.stat().st_mtime < limit:
+                shutil.rmtree(folder, ignore_errors=True)
+                removed += 1
+        except FileNotFoundError:
+            continue
+    return removed
@@ -0,0 +1,352 @@
+"""
+Téléchargement des CSV sources (remplace les appels curl de data_getter.sh)
+
+Usage :
+    python -m utils.fetch_data [--data-dir data] [--workers 8] [--sources sources.json]
+                               [--force] [--no-cache]
+
+Pour chaque table :
+    - téléchargement en parallèle (pool de threads) ;
+    - reprise d'un téléchargement interrompu (en-tête Range sur ``.part``) ;
+    - fichier inchangé sauté (ETag / Last-Modified mémorisés, réponse 304) ;
+    - contenu gzip décompressé à la volée ;
+    - taille et sha256 vérifiés avant de remplacer le CSV (atomiquement) ;
+    - table convertie dans le cache Parquet (``data/.cache``) dans la foulée.
+
+``--sources`` : fichier JSON {table: {"url": ..., "sha256": ..., "size": ...}}
+qui remplace ou complète les sources par défaut (ex. serveur local de test).
+"""
+import argparse
+import hashlib
+import http.client
+import json
+import os
+import sys
+import time
+import urllib.error
+import urllib.request
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+DRIVE_URL = 'https://drive.google.com/uc?export=download&id={}'
+
+# Table -> identifiant Google Drive
+DRIVE_IDS = {
+    'claims': '1tnGjcW7iGt1Bk2DNTNmUt11N8SRodukR',
+    'customers': '1KiZHcH8NVEjRkEU23fVo6HXyzyR-BQaS',
+    'order_product': '19YeYEylQI0My55VS9NPU3SmomLws5k5m',
+    'order_route_leg': '1v4NPP_N_Mkj_of-d2rh4V0sPI_nxJxcI',
+    'orders': '1gDCSeaTcGTrw0SfHaydPRNPC4LGtlauS',
+    'products': '1dt_0epycTe8A6GcbS6SMThIQUv5BGlhO',
+    'states_risk': '1pubgis7FWMBAv1EUpW00NjknSD3twBR1',
+    'transport_mode': '19VuTgH6L7cNDy0Bgpono5T37APSILZuR',
+}
+
+# Table -> {'url', 'sha256' (optionnel), 'size' (optionnel)}
+SOURCES = {name: {'url': DRIVE_URL.format(file_id)} for name, file_id in DRIVE_IDS.items()}
+
+STATE_DIRNAME = '.fetch'
+CHUNK_SIZE = 1 << 20
+RETRIES = 3
+TIMEOUT = 60
+
+
+class FetchError(Exception):
+    """Téléchargement impossible ou contenu invalide (taille, sha256)"""
+
+
+class IncompleteDownload(OSError):
+    """Connexion interrompue avant la fin du contenu annoncé"""
+
+
+# ===== ÉTAT DES TÉLÉCHARGEMENTS =====
+def state_path(data_dir, name):
+    return Path(data_dir) / STATE_DIRNAME / f'{name}.json'
+
+
+def read_state(data_dir, name):
+    """Validateurs HTTP et empreinte du dernier téléchargement réussi"""
+    try:
+        with open(state_path(data_dir, name)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_state(data_dir, name, state):
+    path = state_path(data_dir, name)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f'.{path.name}.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+# ===== TÉLÉCHARGEMENT =====
+def _request(url, headers):
+    """Ouvre la requête ; renvoie (status, réponse) — 304 et 416 ne sont pas des erreurs"""
+    request = urllib.request.Request(url, headers={'User-Agent': 'logistixup-fetcher', **headers})
+    try:
+        response = urllib.request.urlopen(request, timeout=TIMEOUT)
+        return response.status, response
+    except urllib.error.HTTPError as e:
+        if e.code in (304, 416):
+            return e.code, e
+        raise
+
+
+def _download_part(url, part_path, state, force, on_start=None):
+    """
+    Télécharge (ou reprend) le contenu brut dans ``part_path``
+
+    Args:
+        url: URL du fichier
+        part_path: Fichier partiel (complété en cas de reprise)
+        state: État du dernier téléchargement (read_state)
+        force: Ignorer ETag / Last-Modified
+        on_start: Fonction (en-têtes) appelée avant l'écriture du contenu,
+                  pour mémoriser les validateurs d'une reprise éventuelle
+
+    Returns:
+        tuple: (status, en-têtes de la réponse) ; status 304 = inchangé
+    """
+    headers = {}
+    offset = part_path.stat().st_size if part_path.exists() else 0
+    validator = state.get('partial_etag') or state.get('partial_last_modified')
+
+    if offset and validator:
+        headers['Range'] = f'bytes={offset}-'
+        headers['If-Range'] = validator
+    else:
+        offset = 0
+        if not force and state.get('etag'):
+            headers['If-None-Match'] = state['etag']
+        if not force and state.get('last_modified'):
+            headers['If-Modified-Since'] = state['last_modified']
+
+    status, response = _request(url, headers)
+    with response:
+        if status == 304:
+            return status, response.headers
+        if status == 416:
+            # Plage hors fichier : la partie locale est complète ou périmée
+            part_path.unlink(missing_ok=True)
+            return _download_part(url, part_path, {}, force=True, on_start=on_start)
+
+        if on_start is not None:
+            on_start(response.headers)
+        mode = 'ab' if status == 206 else 'wb'  # 200 : le serveur renvoie tout
+        with open(part_path, mode) as f:
+            for block in iter(lambda: response.read(CHUNK_SIZE), b''):
+                f.write(block)
+        return status, response.headers
+
+
+def _expected_size(headers):
+    """Taille totale annoncée par le serveur (Content-Range ou Content-Length)"""
+    content_range = headers.get('Content-Range')
+    if content_range and '/' in content_range:
+        total = content_range.rsplit('/', 1)[1]
+        return int(total) if total.isdigit() else None
+    length = headers.get('Content-Length')
+    return int(length) if length and length.isdigit() else None
+
+
+def _is_gzip(headers, url, part_path):
+    if headers.get('Content-Encoding', '').lower() == 'gzip' or url.split('?')[0].endswith('.gz'):
+        return True
+    with open(part_path, 'rb') as f:
+        return f.read(2) == b'\x1f\x8b'
+
+
+def _finalize(part_path, dest, gzipped, expected_sha256=None, expected_size=None):
+    """
+    Décompresse (si besoin) vers un temporaire, vérifie taille et sha256
+    du CSV obtenu puis remplace ``dest``
+
+    Raises:
+        FetchError: Taille ou sha256 différent de celui attendu
+
+    Returns:
+        dict: {'size', 'sha256'} du CSV écrit
+    """
+    tmp_path = dest.with_name(f'.{dest.name}.tmp')
+    digest = hashlib.sha256()
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS) if gzipped else None
+
+    with open(part_path, 'rb') as src, open(tmp_path, 'wb') as out:
+        for block in iter(lambda: src.read(CHUNK_SIZE), b''):
+            if decompressor is not None:
+                block = decompressor.decompress(block)
+            digest.update(block)
+            out.write(block)
+        if decompressor is not None:
+            tail = decompressor.flush()
+            digest.update(tail)
+            out.write(tail)
+
+    sha256 = digest.hexdigest()
+    size = tmp_path.stat().st_size
+    error = None
+    if expected_size is not None and size != expected_size:
+        error = f"{size} octets après décompression, {expected_size} attendus"
+    elif expected_sha256 and sha256 != expected_sha256.lower():
+        error = f"sha256 {sha256[:12]}… ≠ attendu {expected_sha256[:12]}…"
+    if error:
+        tmp_path.unlink(missing_ok=True)
+        part_path.unlink(missing_ok=True)  # contenu invalide : ne pas le reprendre
+        raise FetchError(f"{dest.stem} : {error}")
+
+    os.replace(tmp_path, dest)
+    return {'size': size, 'sha256': sha256}
+
+
+def fetch_table(name, source, data_dir, force=False, log=print):
+    """
+    Télécharge une table si elle a changé côté serveur
+
+    Args:
+        name: Nom de la table
+        source: {'url', 'sha256'?, 'size'?}
+        data_dir: Dossier de destination
+        force: Ignorer ETag / Last-Modified
+        log: Fonction d'affichage des messages
+
+    Returns:
+        str: 'unchanged' ou 'downloaded'
+
+    Raises:
+        FetchError: Échec après RETRIES tentatives ou contenu invalide
+    """
+    data_dir = Path(data_dir)
+    dest = data_dir / f'{name}.csv'
+    part_path = data_dir / STATE_DIRNAME / f'{name}.part'
+    part_path.parent.mkdir(parents=True, exist_ok=True)
+
+    state = read_state(data_dir, name)
+    if not dest.exists():
+        force = True
+
+    def remember(headers):
+        # Validateurs du contenu en cours : une reprise ne complète la partie
+        # téléchargée que si le fichier distant n'a pas changé (If-Range)
+        state.update(_partial_validators(headers))
+        write_state(data_dir, name, state)
+
+    for attempt in range(1, RETRIES + 1):
+        try:
+            status, headers = _download_part(source['url'], part_path, state, force, remember)
+            if status == 304:
+                log(f"[INFO] {name} inchangé")
+                return 'unchanged'
+            # Taille brute annoncée par le serveur (contenu compressé le cas échéant)
+            expected_size = _expected_size(headers)
+            downloaded = part_path.stat().st_size
+            if expected_size is not None and downloaded != expected_size:
+                raise IncompleteDownload(f"{downloaded} octets reçus, {expected_size} attendus")
+            break
+        except (urllib.error.URLError, http.client.HTTPException, OSError) as e:
+            # La partie déjà reçue est conservée : la tentative suivante la complète
+            if attempt == RETRIES:
+                raise FetchError(f"{name} : {e}") from e
+            log(f"[!] {name} : {e} — nouvelle tentative ({attempt}/{RETRIES})")
+            time.sleep(2 ** attempt)
+
+    gzipped = _is_gzip(headers, source['url'], part_path)
+    fingerprint = _finalize(part_path, dest, gzipped, source.get('sha256'), source.get('size'))
+    part_path.unlink(missing_ok=True)
+
+    write_state(data_dir, name, {
+        'url': source['url'],
+        'etag': headers.get('ETag'),
+        'last_modified': headers.get('Last-Modified'),
+        **fingerprint,
+    })
+    log(f"[✓] {name} téléchargé ({fingerprint['size']:,} octets)")
+    return 'downloaded'
+
+
+def _partial_validators(headers):
+    """Validateurs à renvoyer en If-Range pour reprendre un téléchargement partiel"""
+    return {
+        'partial_etag': headers.get('ETag'),
+        'partial_last_modified': headers.get('Last-Modified'),
+    }
+
+
+# ===== CACHE COLONNAIRE =====
+def warm_cache(names, data_dir, log=print):
+    """Convertit les tables téléchargées dans le cache Parquet (utils.columnar_cache)"""
+    try:
+        from utils.data_loader import read_table
+    except ImportError as e:
+        log(f"[!] Cache Parquet non alimenté (dépendances manquantes : {e})")
+        return
+    for name in names:
+        try:
+            read_table(name, data_dir)
+        except Exception as e:
+            log(f"[!] {name} non converti en Parquet : {e}")
+            continue
+        log(f"[✓] {name} converti en Parquet")
+
+
+# ===== POINT D'ENTRÉE =====
+def fetch_all(data_dir, sources=None, workers=8, force=False, cache=True, log=print):
+    """
+    Télécharge toutes les tables en parallèle
+
+    Returns:
+        dict: {table: 'unchanged' | 'downloaded' | message d'erreur}
+    """
+    sources = sources or SOURCES
+    Path(data_dir).mkdir(parents=True, exist_ok=True)
+
+    def run(name):
+        try:
+            return fetch_table(name, sources[name], data_dir, force=force, log=log)
+        except FetchError as e:
+            log(f"[✗] {e}")
+            return f'error: {e}'
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(sources)))) as pool:
+        results = dict(zip(sources, pool.map(run, sources)))
+
+    downloaded = [name for name, result in results.items() if result == 'downloaded']
+    if cache and downloaded:
+        warm_cache(downloaded, data_dir, log=log)
+    return results
+
+
+def load_sources(path):
+    """Sources par défaut complétées par un fichier JSON {table: {...}}"""
+    sources = {name: dict(source) for name, source in SOURCES.items()}
+    with open(path) as f:
+        for name, override in json.load(f).items():
+            sources.setdefault(name, {}).update(override)
+    return sources
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Télécharge les CSV sources du dashboard")
+    parser.add_argument('--data-dir', default='data', help="Dossier de destination")
+    parser.add_argument('--workers', type=int, default=8, help="Téléchargements simultanés")
+    parser.add_argument('--sources', help="JSON {table: {url, sha256, size}}")
+    parser.add_argument('--force', action='store_true', help="Ignorer ETag / Last-Modified")
+    parser.add_argument('--no-cache', action='store_true', help="Ne pas alimenter le cache Parquet")
+    args = parser.parse_args(argv)
+
+    sources = load_sources(args.sources) if args.sources else SOURCES
+    results = fetch_all(args.data_dir, sources, workers=args.workers,
+                        force=args.force, cache=not args.no_cache)
+    failed = [name for name, result in results.items() if result.startswith('error')]
+    if failed:
+        print(f"[✗] Échec : {', '.join(failed)}", file=sys.stderr)
+        return 1
+    print(f"[✓] {len(results)} tables à jour")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,110 @@
+"""
+Cache LRU des figures plotly, indexé par une empreinte de l'agrégat tracé
+
+À chaque rerun (changement de n'importe quel widget), les pages
+reconstruisent toutes leurs figures, alors que l'agrégat tracé (quelques
+centaines à quelques milliers de lignes) n'a souvent pas changé. La
+construction valide chaque propriété et coûte 15 à 50 ms par figure.
+
+La clé est la fabrique appelée, le template plotly courant et ses
+arguments : les DataFrame y figurent par une empreinte de leur contenu
+(``pd.util.hash_pandas_object``), pas par identité. Le cache garde la
+figure sous forme de dict ; chaque appel reçoit une nouvelle figure
+construite sans validation (``_validate=False``), que la page peut
+modifier (update_traces, add_hline...) sans toucher au cache.
+"""
+import functools
+import hashlib
+import sys
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from utils.kpi_cache import KpiCache
+
+
+# ===== EMPREINTES =====
+def frame_fingerprint(df):
+    """
+    Empreinte du contenu d'un DataFrame ou d'une Série
+
+    Args:
+        df: DataFrame ou Série (colonnes, types, index et valeurs)
+
+    Returns:
+        str: Condensat hexadécimal (blake2b, 16 octets)
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    if isinstance(df, pd.Series):
+        digest.update(repr((df.name, str(df.dtype))).encode())
+    else:
+        digest.update(repr([(str(c), str(t)) for c, t in df.dtypes.items()]).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _key_part(value):
+    """
+    Forme hachable d'un argument de fabrique
+
+    Raises:
+        TypeError: Argument sans forme hachable connue (l'appel n'est pas mis en cache)
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return ('frame', frame_fingerprint(value))
+    if isinstance(value, np.ndarray):
+        return ('array', value.dtype.str, value.shape, hashlib.blake2b(value.tobytes(), digest_size=16).hexdigest())
+    if isinstance(value, dict):
+        return ('dict',) + tuple((str(k), _key_part(v)) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return (type(value).__name__,) + tuple(_key_part(v) for v in value)
+    hash(value)
+    return value
+
+
+def _figure_size(value):
+    """Taille approximative (octets) d'un dict de figure"""
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_figure_size(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(_figure_size(v) for v in value)
+    if isinstance(value, np.ndarray):
+        if value.dtype == object:
+            return value.nbytes + sum(sys.getsizeof(v) for v in value.ravel())
+        return value.nbytes
+    return sys.getsizeof(value)
+
+
+# ===== CACHE =====
+# Partagé entre sessions : une figure = quelques dizaines de Ko
+FIGURE_CACHE = KpiCache(maxsize=128, max_bytes=32 * 1024 * 1024, sizeof=_figure_size)
+
+
+def cached_figure(cache=FIGURE_CACHE):
+    """
+    Décorateur : met en cache une fabrique de figures plotly
+
+    La figure renvoyée est toujours une nouvelle instance. Les appels dont
+    un argument n'a pas de forme hachable sont simplement exécutés.
+
+    Exemple:
+        @cached_figure()
+        def create_line_chart(df, x, y, title=""): ...
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                key = (
+                    func.__module__, func.__qualname__, pio.templates.default,
+                    _key_part(args), _key_part(dict(sorted(kwargs.items())))
+                )
+                hash(key)
+            except TypeError:
+                return func(*args, **kwargs)
+            spec = cache.get(key, lambda: func(*args, **kwargs).to_plotly_json())
+            return go.Figure(spec, _validate=False)
+        return wrapper
+    return decorator
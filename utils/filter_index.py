@@ -0,0 +1,126 @@
+"""
+Index inversé (bitmaps) pour les filtres transport / état de la sidebar
+
+Pour chaque valeur de ``transport_type`` et ``state_code``, un bitset
+(``np.packbits``, 1 bit par ligne du dataset principal) est calculé une fois.
+Une sélection multiple devient un OU des bitsets concernés, puis un ET entre
+colonnes, limité à la plage de lignes de la période (dataset trié par date).
+L'ordre des dates est vérifié une fois ici, pas à chaque filtrage.
+
+Les bitmaps sont positionnels : ils ne s'appliquent qu'au DataFrame indexé
+ou à ses copies superficielles (``handle.main``), reconnus au tableau
+``order_id`` qu'ils partagent (même adresse, même pas).
+"""
+import numpy as np
+
+INDEXED_COLUMNS = ('transport_type', 'state_code')
+KEY_COLUMN = 'order_id'
+
+
+class FilterIndex:
+    """
+    Bitmaps par valeur pour les colonnes filtrables du dataset principal
+
+    Attributs:
+        n_rows: Nombre de lignes du DataFrame indexé
+        bitmaps: {colonne: {valeur: np.ndarray uint8 (bits packés)}}
+        has_nulls: {colonne: présence de valeurs manquantes}
+        date_sorted: Vrai si order_day_num est croissant (tranches de
+                     période par recherche dichotomique)
+    """
+
+    def __init__(self, df, columns=INDEXED_COLUMNS):
+        self.n_rows = len(df)
+        # Référence gardée : l'adresse ne peut pas être réutilisée par un autre tableau
+        self._keys = _key_values(df)
+        self.bitmaps = {}
+        self.has_nulls = {}
+
+        day_nums = df['order_day_num'].to_numpy() if 'order_day_num' in df.columns else None
+        self.date_sorted = day_nums is not None and bool((day_nums[1:] >= day_nums[:-1]).all())
+
+        for col in columns:
+            if col not in df.columns:
+                continue
+            codes, uniques = df[col].factorize()
+            self.bitmaps[col] = {
+                value: np.packbits(codes == code)
+                for code, value in enumerate(uniques)
+            }
+            self.has_nulls[col] = bool((codes < 0).any())
+
+    def covers(self, df):
+        """
+        Vrai si l'index a été construit sur ce DataFrame ou une copie
+        superficielle : mêmes lignes, dans le même ordre
+
+        Un DataFrame filtré, trié ou reconstruit (même s'il a le même nombre
+        de lignes) n'est pas couvert.
+        """
+        if len(df) != self.n_rows or self._keys is None:
+            return False
+        keys = _key_values(df)
+        return keys is not None and _same_buffer(keys, self._keys)
+
+    def nbytes(self):
+        """Mémoire occupée par les bitmaps (octets)"""
+        return sum(b.nbytes for col in self.bitmaps.values() for b in col.values())
+
+    def _selection_bits(self, col, values, start_byte, end_byte):
+        """OU des bitsets des valeurs sélectionnées, ou None si aucun filtrage nécessaire"""
+        bitmaps = self.bitmaps[col]
+        selected = set(values)
+
+        # Toutes les valeurs cochées et aucune valeur manquante : pas de filtre
+        if not self.has_nulls[col] and selected.issuperset(bitmaps):
+            return None
+
+        bits = np.zeros(end_byte - start_byte, dtype=np.uint8)
+        for value in selected:
+            bitmap = bitmaps.get(value)
+            if bitmap is not None:
+                np.bitwise_or(bits, bitmap[start_byte:end_byte], out=bits)
+        return bits
+
+    def mask(self, start, stop, selections):
+        """
+        Masque booléen des lignes [start, stop) respectant les sélections
+
+        Args:
+            start: Première ligne (incluse)
+            stop: Dernière ligne (exclue)
+            selections: {colonne: valeurs cochées} ; une liste vide = pas de filtre
+
+        Returns:
+            np.ndarray | None: Masque de longueur stop - start, ou None si
+            aucune sélection ne restreint les lignes
+        """
+        start_byte, end_byte = start // 8, (stop + 7) // 8
+        combined = None
+
+        for col, values in selections.items():
+            if not values or col not in self.bitmaps:
+                continue
+            bits = self._selection_bits(col, values, start_byte, end_byte)
+            if bits is None:
+                continue
+            combined = bits if combined is None else np.bitwise_and(combined, bits, out=combined)
+
+        if combined is None:
+            return None
+
+        offset = start - start_byte * 8
+        return np.unpackbits(combined, count=offset + (stop - start))[offset:].astype(bool)
+
+
+def _key_values(df):
+    """Tableau numpy de la colonne clé (vue sur les données pour un dtype numpy), ou None"""
+    if KEY_COLUMN not in df.columns:
+        return None
+    return df[KEY_COLUMN].to_numpy()
+
+
+def _same_buffer(a, b):
+    """Mêmes données en mémoire : même adresse de départ, même pas, même longueur"""
+    return (a.__array_interface__['data'][0] == b.__array_interface__['data'][0]
+            and a.strides == b.strides and a.shape == b.shape)
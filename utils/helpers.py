@@ -1,5 +1,15 @@
+import html
+import os
+from pathlib import Path
+
+import numpy as np
 import pandas as pd
 import streamlit as st
+from datetime import date
+
+from utils.export import (
+    STATIC_MAX_BYTES, export_dataframe, export_url, prune_exports, remove_export, static_export_path
+)
 
 # === FORMATAGE ===
 def format_currency(value, decimals=0):
@@ -27,14 +37,64 @@ def calculate_growth_rate(current, previous):
     return ((current - previous) / previous) * 100
 
 # === TÉLÉCHARGEMENT ===
-def add_download_button(df, filename="export.csv", label="📥 Télécharger CSV"):
-    csv = df.to_csv(index=False).encode('utf-8')
-    st.download_button(
-        label=label,
-        data=csv,
-        file_name=filename,
-        mime='text/csv'
-    )
+def add_download_button(df, filename="export.csv", label="📥 Télécharger CSV", fmt='csv', key='export'):
+    """
+    Export à la demande : le fichier est écrit par blocs au clic sur
+    « Préparer », puis servi en flux par la route statique (/app/static)
+    
+    Le lien pointe vers le fichier sur disque : les reruns suivants ne le
+    relisent pas et le serveur ne le charge jamais en mémoire.
+    
+    Args:
+        df: DataFrame à exporter, ou fonction sans argument le renvoyant
+            (évaluée seulement au moment de l'export)
+        filename: Nom proposé (l'extension suit le format)
+        label: Libellé du lien de téléchargement
+        fmt: 'csv', 'csv.gz' ou 'parquet'
+        key: Clé unique du bouton sur la page
+    """
+    state_key = f'{key}_path'
+    
+    if st.button(f"Préparer l'export ({fmt})", key=f'{key}_prepare', use_container_width=True, icon=":material/download:"):
+        remove_export(st.session_state.pop(state_key, None))
+        prune_exports()
+        data = df() if callable(df) else df
+        path = export_dataframe(data, fmt, path=static_export_path(filename, fmt))
+        size = path.stat().st_size
+        if size > STATIC_MAX_BYTES:
+            remove_export(path)
+            st.warning(
+                f"Export trop volumineux ({size / 1e6:,.0f} Mo, maximum {STATIC_MAX_BYTES / 1e6:,.0f} Mo) : "
+                "réduire la sélection ou choisir un format compressé (csv.gz, parquet)."
+            )
+        else:
+            st.session_state[state_key] = str(path)
+    
+    path = st.session_state.get(state_key)
+    if path and os.path.exists(path):
+        name = html.escape(Path(path).name)
+        st.markdown(
+            f'<a href="{html.escape(export_url(path))}" download="{name}" '
+            f'style="display:block;text-align:center;padding:0.4rem;border-radius:0.5rem;'
+            f'background:#055e82;color:#ffffff;text-decoration:none;">{html.escape(label)}</a>',
+            unsafe_allow_html=True
+        )
+
+# === DATES ===
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+DAY_NUMBER_NAT = np.iinfo(np.int32).max  # NaT classé après toutes les dates
+
+def to_day_numbers(dates):
+    """Numéros de jour (jours depuis 1970-01-01, int32) d'une colonne datetime ; NaT -> max"""
+    values = pd.to_datetime(dates).to_numpy(dtype='datetime64[ns]')
+    days = values.astype('datetime64[D]').astype(np.int64)
+    return np.where(np.isnat(values), DAY_NUMBER_NAT, days).astype(np.int32)
+
+def day_number(value):
+    """Numéro de jour d'une date (date, datetime ou Timestamp)"""
+    if hasattr(value, 'date'):  # datetime / Timestamp
+        value = value.date()
+    return value.toordinal() - EPOCH_ORDINAL
 
 # === FILTRAGE ===
 def filter_by_date_range(df, start_date, end_date, date_column='date'):
@@ -0,0 +1,310 @@
+"""
+Ingestion incrémentale : lignes ajoutées en fin de CSV depuis le dernier build
+
+Le manifest d'un build conserve, pour chaque CSV, sa taille et le sha256 de
+ses derniers octets (``append_markers``). Au build suivant, un fichier dont
+la taille a augmenté et dont ces octets sont inchangés a seulement reçu des
+lignes en fin de fichier : seules ces lignes (lues à partir de l'ancien
+offset) sont analysées.
+
+Les tailles des CSV sont figées avant toute lecture (``snapshot_sources``)
+et les lignes ajoutées ne sont lues que jusqu'à ces tailles : une ligne
+écrite pendant la mise à jour n'est pas marquée comme ingérée, la mise à
+jour suivante la lira. Aucun CSV n'est relu en entier : seul un fichier de
+même taille mais de mtime différent est haché (``touch``, re-téléchargement
+à l'identique) ; sans sha256 connu (table complétée par un incrémental),
+ses derniers octets sont comparés au marqueur d'ajout.
+
+Les nouvelles commandes sont enrichies seules (produits, étapes de route,
+réclamations, clients) puis ajoutées au dataset matérialisé. Toute autre
+modification (ligne réécrite, table de dimension modifiée, produit ou étape
+rattaché à une ancienne commande...) impose un build complet.
+"""
+import io
+import os
+import time
+from pathlib import Path
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from utils.columnar_cache import file_digest
+from utils.cube import build_daily_cube, merge_cubes
+from utils.data_loader import (
+    CACHE_VERSION, DATA_DIR, TABLES, build_main_dataset, prepare_table, read_table
+)
+from utils.materialized import (
+    TAIL_BYTES, append_markers, current_version, load_current, read_manifest,
+    tail_digest, update_manifest, write_version, prune_versions
+)
+
+# Tables qui peuvent recevoir des lignes en fin de fichier
+APPEND_TABLES = ('orders', 'order_product', 'order_route_leg', 'claims', 'customers')
+
+# Tables rattachées à une commande : leurs nouvelles lignes doivent concerner
+# uniquement de nouvelles commandes
+ORDER_CHILD_TABLES = ('order_product', 'order_route_leg', 'claims')
+
+class IncrementalUnsupported(Exception):
+    """Les sources ont changé autrement que par ajout de lignes : build complet requis"""
+
+
+# ===== INSTANTANÉ DES SOURCES =====
+def last_line_end(path, size, block_size=TAIL_BYTES):
+    """Offset qui suit la dernière fin de ligne avant l'offset ``size`` (0 si aucune)"""
+    end = size
+    with open(path, 'rb') as f:
+        while end > 0:
+            start = max(0, end - block_size)
+            f.seek(start)
+            pos = f.read(end - start).rfind(b'\n')
+            if pos >= 0:
+                return start + pos + 1
+            end = start
+    return 0
+
+
+def snapshot_sources(data_dir, tables=TABLES, built=None):
+    """
+    Empreintes des CSV figées avant toute lecture
+
+    Pour les tables qui reçoivent des ajouts, la taille (octets ingérés) est
+    arrêtée à la dernière fin de ligne : une ligne en cours d'écriture est
+    laissée à la mise à jour suivante. ``file_size`` garde la taille réelle
+    du fichier, comparée par load_current.
+
+    Le sha256 (sur les octets ingérés) n'est calculé que pour un fichier de
+    même taille que dans ``built`` mais de mtime différent ; inchangé, il
+    reprend celui de ``built`` ; sinon il vaut None (fichier complété).
+
+    Args:
+        data_dir: Dossier des CSV
+        tables: Noms des tables
+        built: Empreintes du manifest de la version active
+
+    Returns:
+        dict: {table: {'size', 'file_size', 'mtime_ns', 'sha256'}}
+    """
+    built = built or {}
+    sources = {}
+    for name in tables:
+        path = Path(data_dir) / f'{name}.csv'
+        stat = os.stat(path)
+        size = last_line_end(path, stat.st_size) if name in APPEND_TABLES else stat.st_size
+        current = {'size': size, 'file_size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': None}
+        previous = built.get(name)
+        if previous is not None and previous['size'] == size:
+            if previous['mtime_ns'] == stat.st_mtime_ns \
+                    and previous.get('file_size', previous['size']) == stat.st_size:
+                current['sha256'] = previous.get('sha256')
+            else:
+                current['sha256'] = file_digest(path, size=size)
+        sources[name] = current
+    return sources
+
+
+# ===== DÉTECTION DES AJOUTS =====
+def detect_appends(manifest, data_dir, sources):
+    """
+    Offsets à partir desquels relire les CSV qui ont reçu des lignes
+
+    Args:
+        manifest: Manifest de la version active
+        data_dir: Dossier des CSV
+        sources: Instantané des CSV (snapshot_sources)
+
+    Returns:
+        dict: {table: offset} (vide si rien n'a changé)
+
+    Raises:
+        IncrementalUnsupported: Modification autre qu'un ajout
+    """
+    markers = manifest.get('append_markers')
+    if not markers:
+        raise IncrementalUnsupported("build sans marqueurs d'ajout")
+
+    appended = {}
+    for name, built in manifest['sources'].items():
+        path = Path(data_dir) / f'{name}.csv'
+        current = sources[name]
+
+        if current['size'] == built['size']:
+            if current['mtime_ns'] == built['mtime_ns'] or current['sha256'] == built.get('sha256'):
+                continue
+            # sha256 inconnu (table déjà complétée) : marqueur de fin de fichier
+            if built.get('sha256') is None and name in APPEND_TABLES \
+                    and tail_digest(path, current['size']) == markers[name]['tail_sha256']:
+                continue
+            raise IncrementalUnsupported(f"{name} modifié")
+
+        if name not in APPEND_TABLES:
+            raise IncrementalUnsupported(f"table de dimension {name} modifiée")
+        offset = markers[name]['size']
+        if current['size'] < offset or tail_digest(path, offset) != markers[name]['tail_sha256']:
+            raise IncrementalUnsupported(f"{name} réécrit (pas un simple ajout)")
+        appended[name] = offset
+
+    return appended
+
+
+def read_appended(path, offset, end):
+    """
+    Lit les lignes ajoutées entre ``offset`` et ``end`` (l'en-tête est relu
+    en tête de fichier)
+
+    Raises:
+        IncrementalUnsupported: L'ancien contenu ne se terminait pas par une fin de ligne
+    """
+    with open(path, 'rb') as f:
+        header = f.readline()
+        f.seek(offset - 1)
+        if f.read(1) != b'\n':
+            raise IncrementalUnsupported(f"{Path(path).name} : dernière ligne incomplète")
+        data = f.read(end - offset)
+    return pd.read_csv(io.BytesIO(header + data))
+
+
+# ===== FUSION =====
+def concat_aligned(base, new):
+    """
+    Concatène deux DataFrames en conservant les colonnes catégorielles
+
+    ``pd.concat`` convertit en ``object`` deux catégorielles de modalités
+    différentes : les modalités sont d'abord unifiées (triées, comme astype).
+    """
+    base, new = base.copy(deep=False), new[base.columns].copy(deep=False)
+    for col in base.columns:
+        a, b = base[col], new[col]
+        if isinstance(a.dtype, pd.CategoricalDtype) and isinstance(b.dtype, pd.CategoricalDtype) \
+                and not a.cat.ordered and not a.dtype == b.dtype:
+            categories = union_categoricals([a.array, b.array], sort_categories=True).categories
+            base[col] = a.cat.set_categories(categories)
+            new[col] = b.cat.set_categories(categories)
+    return pd.concat([base, new], ignore_index=True)
+
+
+def _check_new_orders(base, tables):
+    """Refuse les ajouts qui touchent des commandes déjà construites"""
+    new_ids = tables['orders']['order_id']
+    if new_ids.isin(base['order_id']).any() or new_ids.duplicated().any():
+        raise IncrementalUnsupported("commandes ajoutées déjà présentes")
+    for name in ORDER_CHILD_TABLES:
+        if not tables[name]['order_id'].isin(new_ids).all():
+            raise IncrementalUnsupported(f"{name} : lignes rattachées à d'anciennes commandes")
+    if not tables['customers']['customer_id'].is_unique:
+        raise IncrementalUnsupported("customers : client existant réécrit")
+
+
+def merge_appended(base, appended, sources, data_dir=DATA_DIR):
+    """
+    Construit les nouvelles commandes et les ajoute au dataset existant
+
+    Args:
+        base: Dataset enrichi de la version active
+        appended: {table: offset} (detect_appends)
+        sources: Instantané des CSV (snapshot_sources) : fin des lectures
+        data_dir: Dossier des CSV
+
+    Returns:
+        tuple: (dataset fusionné, nouvelles lignes enrichies)
+    """
+    data = {}
+    for name in TABLES:
+        path = Path(data_dir) / f'{name}.csv'
+        if name in ORDER_CHILD_TABLES or name == 'orders':
+            if name in appended:
+                raw = read_appended(path, appended[name], sources[name]['size'])
+            else:
+                raw = pd.read_csv(path, nrows=0)
+            data[name] = prepare_table(name, raw)
+        else:
+            data[name] = read_table(name, data_dir)  # table complète (petite)
+
+    _check_new_orders(base, data)
+
+    part = build_main_dataset(data, data_dir)
+    if len(part) == 0:
+        return base, part
+
+    merged = concat_aligned(base, part)
+    if len(base) and part['order_day_num'].min() < base['order_day_num'].max():
+        # Commandes antérieures au watermark : on retrie (tri stable)
+        merged = merged.sort_values('order_date', kind='stable', ignore_index=True)
+    return merged, part
+
+
+def incremental_build(data_dir=DATA_DIR, keep=3, log=print, on_append=None):
+    """
+    Met à jour la version active avec les lignes ajoutées aux CSV
+
+    Args:
+        data_dir: Dossier des CSV
+        keep: Nombre de versions conservées
+        log: Fonction d'affichage des messages
+        on_append: Fonction (version de départ, nouvelle version, nouvelles
+                   lignes enrichies) appelée après publication (ex. mise à
+                   jour du cube quotidien, voir update_cube)
+
+    Returns:
+        str: Version active à l'issue de la mise à jour
+
+    Raises:
+        IncrementalUnsupported: Build complet nécessaire
+    """
+    start = time.perf_counter()
+    version = current_version(data_dir)
+    if version is None:
+        raise IncrementalUnsupported("aucun build existant")
+    manifest = read_manifest(data_dir, version)
+    if manifest.get('pipeline_version') != CACHE_VERSION:
+        raise IncrementalUnsupported("build produit par une autre version du pipeline")
+
+    # Instantané avant toute lecture : seuls ces octets sont ingérés
+    sources = snapshot_sources(data_dir, TABLES, built=manifest['sources'])
+    markers = append_markers(data_dir, sources)
+    appended = detect_appends(manifest, data_dir, sources)
+    if not appended:
+        if sources != manifest['sources']:
+            # Contenu identique (touch, re-téléchargement) : la version reste
+            # servie, avec les empreintes courantes (voir load_current)
+            update_manifest(data_dir, version, sources=sources, append_markers=markers)
+        log(f"[INFO] Aucune ligne ajoutée : {version}")
+        return version
+
+    base, _ = load_current(data_dir, check_sources=False, pipeline_version=CACHE_VERSION)
+    if base is None:
+        raise IncrementalUnsupported("version active illisible")
+
+    merged, part = merge_appended(base, appended, sources, data_dir)
+
+    new_version = write_version(
+        merged, data_dir, sources,
+        extra={
+            'pipeline_version': CACHE_VERSION,
+            'append_markers': markers,
+            'incremental_from': version,
+            'appended_orders': len(part),
+        }
+    )
+    prune_versions(data_dir, keep=keep)
+
+    log(f"[✓] Version {new_version} publiée : +{len(part):,} commandes "
+        f"({', '.join(sorted(appended))}), {time.perf_counter() - start:.1f}s")
+    if on_append is not None:
+        on_append(version, new_version, part)
+    return new_version
+
+
+def update_cube(cube, part):
+    """
+    Cube quotidien mis à jour avec les nouvelles commandes, sans reparcourir
+    l'ancien dataset
+
+    Args:
+        cube: Cube de la version précédente
+        part: Nouvelles lignes enrichies (merge_appended)
+
+    Returns:
+        pd.DataFrame: Cube équivalent à build_daily_cube(dataset fusionné)
+    """
+    return merge_cubes(cube, build_daily_cube(part))
@@ -0,0 +1,146 @@
+"""
+Jointures par position pour la préparation du dataset
+
+Les jointures gauche du pipeline sont presque toutes « plusieurs vers un »
+(commande -> transport, client, produit, agrégats par commande). Au lieu
+d'un ``DataFrame.merge`` qui recopie tout le tableau de gauche à chaque
+étape, les clés sont converties une fois en positions int32 dans la table
+de droite, puis seules les colonnes ajoutées sont lues par ``take``.
+Plusieurs jointures sur la même clé de gauche (``order_id``) partagent un
+KeyIndex : les clés de gauche ne sont indexées qu'une fois.
+
+Résultat identique à ``merge(how='left')`` : ordre des lignes conservé,
+valeurs manquantes pour les clés absentes (entiers convertis en float,
+booléens en object, comme merge). Si la table de droite a des clés en
+double ou des colonnes homonymes, on revient à ``merge``.
+"""
+import numpy as np
+import pandas as pd
+from pandas.api.extensions import ExtensionDtype, take
+
+# Clés entières positives jusqu'à DENSE_KEY_RATIO x (lignes de droite) :
+# table de correspondance directe (tableau indexé par la clé) plutôt qu'une
+# table de hachage ; sa taille reste proportionnelle à la table de droite
+DENSE_KEY_RATIO = 4
+DENSE_KEY_MIN = 1 << 16
+
+
+# ===== POSITIONS =====
+def key_positions(keys, right_keys):
+    """
+    Position de chaque clé dans ``right_keys`` (-1 si absente)
+
+    Args:
+        keys: Clés de la table de gauche
+        right_keys: Clés uniques de la table de droite
+
+    Returns:
+        np.ndarray: Positions int32
+    """
+    keys = pd.Series(keys) if not isinstance(keys, pd.Series) else keys
+    right = pd.Index(right_keys)
+
+    if _dense_compatible(keys) and _dense_compatible(right) and len(keys) and len(right):
+        high = int(right.max())
+        if right.min() >= 0 and high <= max(DENSE_KEY_RATIO * len(right), DENSE_KEY_MIN):
+            lookup = np.full(high + 1, -1, dtype=np.int32)
+            lookup[right.to_numpy(dtype=np.int64)] = np.arange(len(right), dtype=np.int32)
+            values = keys.to_numpy(dtype=np.int64)
+            inside = (values >= 0) & (values <= high)
+            if inside.all():
+                return lookup[values]
+            return np.where(inside, lookup[np.clip(values, 0, high)], -1).astype(np.int32)
+
+    return right.get_indexer(keys).astype(np.int32)
+
+
+def _dense_compatible(values):
+    return pd.api.types.is_integer_dtype(values.dtype) and not values.hasnans
+
+
+class KeyIndex:
+    """
+    Clés de la table de gauche indexées une fois, pour plusieurs jointures
+
+    Les clés sont factorisées (``pd.factorize``) : chaque jointure ne
+    cherche ensuite que les clés de la table de droite parmi les valeurs
+    distinctes, en O(lignes de droite), au lieu de réindexer toute la
+    table de gauche.
+
+    Exemple:
+        orders = KeyIndex(df['order_id'])
+        df = join_lookup(df, claims, on='order_id', keys=orders)
+        df = join_lookup(df, product_agg, on='order_id', keys=orders)
+    """
+
+    def __init__(self, keys):
+        self.n_rows = len(keys)
+        self.codes, uniques = pd.factorize(keys)  # clé manquante : -1
+        self.uniques = pd.Index(uniques)
+
+    def positions(self, right_keys):
+        """
+        Position dans ``right_keys`` de chaque clé de gauche (-1 si absente)
+
+        Args:
+            right_keys: Clés uniques de la table de droite
+
+        Returns:
+            np.ndarray: Positions int32 (mêmes valeurs que key_positions)
+        """
+        right_keys = pd.Index(right_keys)
+        found = self.uniques.get_indexer(right_keys)
+        matched = found >= 0
+        # Dernière case (code -1) : clé manquante, qui retrouve celle de droite comme merge
+        lookup = np.full(len(self.uniques) + 1, -1, dtype=np.int32)
+        lookup[found[matched]] = np.arange(len(found), dtype=np.int32)[matched]
+        missing = np.flatnonzero(right_keys.isna())
+        if len(missing):
+            lookup[-1] = missing[0]
+        return lookup[self.codes]
+
+
+def take_column(values, positions):
+    """Valeurs aux ``positions`` (-1 -> valeur manquante, comme merge)"""
+    if isinstance(values, (pd.Series, pd.Index)):
+        values = values.array if isinstance(values.dtype, ExtensionDtype) else values.to_numpy()
+    if (positions < 0).any():
+        return take(values, positions, allow_fill=True)
+    return take(values, positions)
+
+
+# ===== JOINTURES =====
+def join_lookup(df, right, on, columns=None, keys=None):
+    """
+    ``df.merge(right[[on, *columns]], on=on, how='left')`` par positions
+
+    Args:
+        df: Table de gauche
+        right: Table de droite (``on`` en colonne) ou indexée par la clé
+        on: Nom de la clé
+        columns: Colonnes de ``right`` à ajouter (défaut : toutes sauf ``on``)
+        keys: KeyIndex de ``df[on]`` partagé entre plusieurs jointures
+
+    Returns:
+        pd.DataFrame: ``df`` complétée des colonnes de ``right``
+    """
+    right_keys = right[on] if on in right.columns else right.index
+    if columns is None:
+        columns = [col for col in right.columns if col != on]
+    columns = list(columns)
+
+    if not right_keys.is_unique or set(columns) & set(df.columns):
+        # Plusieurs lignes par clé (multiplie les lignes) ou suffixes _x/_y
+        # à produire : merge garde la sémantique attendue
+        right = right if on in right.columns else right.rename_axis(on).reset_index()
+        return df.merge(right[[on, *columns]], on=on, how='left')
+
+    if keys is not None and keys.n_rows == len(df):
+        positions = keys.positions(right_keys)
+    else:
+        positions = key_positions(df[on], right_keys)
+    added = {
+        col: pd.Series(take_column(right[col], positions), index=df.index, name=col)
+        for col in columns
+    }
+    return pd.concat([df, pd.DataFrame(added, index=df.index)], axis=1)
@@ -0,0 +1,163 @@
+"""
+Cache LRU des KPI, indexé par une signature de filtres
+
+``st.cache_data`` hache l'intégralité du DataFrame filtré passé en argument
+pour construire sa clé, ce qui peut coûter plus cher que le calcul lui-même.
+Ici la clé est la sélection de la sidebar (dates, transports, états triés)
+plus la version du dataset : quelques dizaines d'octets à hacher.
+"""
+import functools
+import sys
+import threading
+from collections import OrderedDict
+
+
+def filter_signature(filters, dataset_version=None):
+    """
+    Signature hachable d'une sélection sidebar
+
+    Args:
+        filters: Dictionnaire de render_sidebar (start_date, end_date,
+                 transport_filter, state_filter)
+        dataset_version: Identifiant du dataset (invalide les entrées
+                         calculées sur une ancienne version)
+
+    Returns:
+        tuple: (début, fin, transports triés, états triés, version)
+    """
+    return (
+        str(filters['start_date']),
+        str(filters['end_date']),
+        tuple(sorted(map(str, filters.get('transport_filter') or ()))),
+        tuple(sorted(map(str, filters.get('state_filter') or ()))),
+        dataset_version,
+    )
+
+
+def _entry_size(value):
+    """Taille approximative (octets) d'un résultat de KPI"""
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            sys.getsizeof(k) + sys.getsizeof(v) for k, v in value.items()
+        )
+    return sys.getsizeof(value)
+
+
+class KpiCache:
+    """
+    Cache LRU borné en nombre d'entrées et en octets, partagé entre sessions
+
+    Attributs:
+        maxsize: Nombre maximal d'entrées
+        max_bytes: Taille maximale cumulée (estimée) des résultats
+        sizeof: Fonction estimant la taille (octets) d'un résultat
+        hits, misses, evictions: Compteurs depuis le démarrage
+    """
+
+    def __init__(self, maxsize=256, max_bytes=8 * 1024 * 1024, sizeof=_entry_size):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # clé -> (valeur, taille)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, compute):
+        """
+        Résultat en cache pour ``key``, sinon ``compute()`` mis en cache
+
+        Args:
+            key: Clé hachable (voir filter_signature)
+            compute: Fonction sans argument produisant le résultat
+
+        Returns:
+            Résultat (le même objet pour tous les appelants : ne pas le modifier)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        # Calcul hors verrou : deux sessions peuvent calculer la même clé,
+        # la seconde écrase simplement la première
+        value = compute()
+        size = self.sizeof(value)
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            self._evict()
+        return value
+
+    def _evict(self):
+        """Retire les entrées les moins récemment utilisées au-delà des limites"""
+        while self._entries and (
+            len(self._entries) > self.maxsize or self._bytes > self.max_bytes
+        ):
+            _, (_, size) = self._entries.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+
+    def clear(self):
+        """Vide le cache (les compteurs sont conservés)"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """
+        Compteurs pour dimensionner le cache
+
+        Returns:
+            dict: hits, misses, evictions, hit_rate (%), entries, bytes
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / total * 100 if total else 0.0,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+            }
+
+
+# Cache partagé par les fonctions de KPI du dashboard
+KPI_CACHE = KpiCache()
+
+
+def cached_by_signature(cache=KPI_CACHE):
+    """
+    Décorateur : met en cache une fonction de KPI sur l'argument ``signature``
+
+    La fonction décorée accepte un mot-clé ``signature`` (filter_signature).
+    Sans signature, elle est simplement exécutée.
+
+    Exemple:
+        @cached_by_signature()
+        def compute_claims_kpis(df_orders_filt, df_customers_all, start_date, end_date): ...
+
+        compute_claims_kpis(df, df_customers, start, end,
+                            signature=filter_signature(filters, dataset.version))
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, signature=None, **kwargs):
+            if signature is None:
+                return func(*args, **kwargs)
+            return cache.get(
+                (func.__module__, func.__qualname__, signature),
+                lambda: func(*args, **kwargs)
+            )
+        return wrapper
+    return decorator
@@ -0,0 +1,281 @@
+"""
+Stockage versionné du dataset enrichi (sortie de prepare_main_dataset)
+
+Arborescence :
+    data/.build/CURRENT                  -> nom de la version active
+    data/.build/<version>/dataset.arrow  -> table Arrow IPC (mappable en mémoire)
+    data/.build/<version>/manifest.json  -> empreintes des CSV sources, lignes...
+
+Une version est écrite dans un dossier temporaire, renommée une fois complète,
+puis CURRENT est remplacé atomiquement : un worker ne lit jamais une version
+partielle.
+
+Le fichier Arrow est mappé en mémoire et converti sans copie pour les
+colonnes numériques, dates et catégories : tous les processus (sessions,
+répliques) qui ouvrent la même version partagent les mêmes pages du cache
+système. Ces colonnes sont en lecture seule.
+"""
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+
+import pyarrow as pa
+
+from utils.columnar_cache import file_fingerprint
+
+BUILD_DIRNAME = '.build'
+CURRENT_FILE = 'CURRENT'
+DATASET_FILE = 'dataset.arrow'
+MANIFEST_FILE = 'manifest.json'
+TAIL_BYTES = 64 * 1024
+
+
+def build_dir(data_dir):
+    """Dossier racine des versions construites"""
+    return Path(data_dir) / BUILD_DIRNAME
+
+
+# ===== EMPREINTES DES SOURCES =====
+def source_fingerprints(data_dir, tables, with_hash=False):
+    """
+    Empreintes des CSV sources d'un build
+
+    Args:
+        data_dir: Dossier des CSV
+        tables: Noms des tables
+        with_hash: Calculer aussi le sha256 (lecture complète des fichiers)
+
+    Returns:
+        dict: {table: {'size', 'mtime_ns', 'sha256'}}
+    """
+    return {
+        name: file_fingerprint(Path(data_dir) / f'{name}.csv', with_hash=with_hash)
+        for name in tables
+    }
+
+
+def tail_digest(path, size, tail_bytes=TAIL_BYTES):
+    """sha256 des ``tail_bytes`` octets qui précèdent l'offset ``size``"""
+    start = max(0, size - tail_bytes)
+    with open(path, 'rb') as f:
+        f.seek(start)
+        return hashlib.sha256(f.read(size - start)).hexdigest()
+
+
+def append_markers(data_dir, sources):
+    """
+    Marqueurs permettant de reconnaître un ajout en fin de fichier
+    (voir utils.incremental)
+
+    Args:
+        data_dir: Dossier des CSV
+        sources: Empreintes des CSV du build (source_fingerprints)
+
+    Returns:
+        dict: {table: {'size', 'tail_sha256'}}
+    """
+    return {
+        name: {
+            'size': fp['size'],
+            'tail_sha256': tail_digest(Path(data_dir) / f'{name}.csv', fp['size'])
+        }
+        for name, fp in sources.items()
+    }
+
+
+def sources_changed(manifest, data_dir):
+    """
+    Vrai si un CSV source a changé (taille ou mtime) depuis le build
+
+    La taille comparée est celle du fichier au moment du build
+    (``file_size``, voir incremental.snapshot_sources), qui peut dépasser
+    celle des octets ingérés quand une ligne était en cours d'écriture.
+    """
+    try:
+        current = source_fingerprints(data_dir, manifest['sources'])
+    except OSError:
+        return True
+    return any(
+        current[name]['size'] != fp.get('file_size', fp['size'])
+        or current[name]['mtime_ns'] != fp['mtime_ns']
+        for name, fp in manifest['sources'].items()
+    )
+
+
+# ===== LECTURE =====
+def current_version(data_dir):
+    """Nom de la version active, ou None si aucun build"""
+    try:
+        return (build_dir(data_dir) / CURRENT_FILE).read_text().strip() or None
+    except OSError:
+        return None
+
+
+def read_manifest(data_dir, version):
+    with open(build_dir(data_dir) / version / MANIFEST_FILE) as f:
+        return json.load(f)
+
+
+def open_table(data_dir, version):
+    """
+    Ouvre la table Arrow d'une version en mappage mémoire (sans copie disque -> RAM)
+
+    Returns:
+        pa.Table: Table dont les buffers pointent sur le fichier mappé
+    """
+    source = pa.memory_map(str(build_dir(data_dir) / version / DATASET_FILE), 'r')
+    return pa.ipc.open_file(source).read_all()
+
+
+def table_to_frame(table):
+    """
+    Conversion Arrow -> pandas en conservant les buffers mappés
+
+    ``split_blocks=True`` évite la consolidation en blocs 2D (qui copie) :
+    les colonnes numériques sans conversion restent des vues en lecture
+    seule sur le fichier. Les booléens et entiers nullables sont copiés.
+    """
+    return table.to_pandas(split_blocks=True)
+
+
+def load_current(data_dir, check_sources=True, pipeline_version=None):
+    """
+    Charge la version active du dataset enrichi
+
+    Args:
+        data_dir: Dossier des données
+        check_sources: Ignorer le build si un CSV a changé depuis
+        pipeline_version: Ignorer le build s'il a été produit par une autre
+                          version du pipeline de préparation
+
+    Returns:
+        tuple: (pd.DataFrame, manifest) ou (None, None) si aucun build utilisable
+    """
+    version = current_version(data_dir)
+    if version is None:
+        return None, None
+
+    try:
+        manifest = read_manifest(data_dir, version)
+        if pipeline_version is not None and manifest.get('pipeline_version') != pipeline_version:
+            return None, None
+        if check_sources and sources_changed(manifest, data_dir):
+            return None, None
+        df = table_to_frame(open_table(data_dir, version))
+    except (OSError, ValueError, KeyError, pa.ArrowInvalid):
+        return None, None
+
+    return df, manifest
+
+
+# ===== ÉCRITURE =====
+def make_version_name(sources):
+    """
+    Nom de version : horodatage + condensat des empreintes sources
+
+    Les empreintes complètes (tailles, mtime, sha256) sont condensées : le
+    sha256 d'une table complétée par un incrémental est inconnu (None).
+    """
+    digest = hashlib.sha256(json.dumps(sources, sort_keys=True).encode()).hexdigest()
+    stamp = datetime.now().strftime('%Y%m%dT%H%M%S')
+    return f"{stamp}-{digest[:8]}"
+
+
+def write_version(df, data_dir, sources, extra=None):
+    """
+    Écrit une nouvelle version puis la rend active atomiquement
+
+    Args:
+        df: Dataset enrichi
+        data_dir: Dossier des données
+        sources: Empreintes des CSV utilisés (source_fingerprints)
+        extra: Champs supplémentaires pour le manifest
+
+    Returns:
+        str: Nom de la version écrite
+    """
+    root = build_dir(data_dir)
+    root.mkdir(parents=True, exist_ok=True)
+
+    version = make_version_name(sources)
+    if (root / version).exists():
+        # Même seconde, mêmes sources (build forcé) : suffixe
+        version = f"{version}-{sum(1 for _ in root.glob(f'{version}*'))}"
+    tmp_dir = root / f'.tmp-{version}-{os.getpid()}'
+    tmp_dir.mkdir()
+
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        with pa.OSFile(str(tmp_dir / DATASET_FILE), 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+
+        manifest = {
+            'version': version,
+            'built_at': datetime.now().isoformat(timespec='seconds'),
+            'rows': len(df),
+            'columns': list(df.columns),
+            'sources': sources,
+            **(extra or {})
+        }
+        with open(tmp_dir / MANIFEST_FILE, 'w') as f:
+            json.dump(manifest, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.rename(tmp_dir, root / version)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    set_current(data_dir, version)
+    return version
+
+
+def update_manifest(data_dir, version, **fields):
+    """
+    Met à jour des champs du manifest d'une version publiée (remplacement
+    atomique), ex. empreintes des CSV après un ``touch`` sans changement
+    de contenu
+
+    Returns:
+        dict: Manifest mis à jour
+    """
+    manifest = {**read_manifest(data_dir, version), **fields}
+    path = build_dir(data_dir) / version / MANIFEST_FILE
+    tmp_path = path.with_name(f'.{MANIFEST_FILE}.{os.getpid()}.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return manifest
+
+
+def set_current(data_dir, version):
+    """Bascule atomiquement CURRENT sur une version existante"""
+    root = build_dir(data_dir)
+    tmp_path = root / f'.{CURRENT_FILE}.{os.getpid()}.tmp'
+    tmp_path.write_text(version)
+    os.replace(tmp_path, root / CURRENT_FILE)
+
+
+def prune_versions(data_dir, keep=3):
+    """
+    Supprime les anciennes versions (garde les ``keep`` plus récentes + l'active)
+
+    Un worker qui a encore une ancienne version mappée continue de la lire :
+    le fichier supprimé reste accessible tant qu'il est ouvert.
+    """
+    root = build_dir(data_dir)
+    active = current_version(data_dir)
+    versions = sorted(
+        p.name for p in root.iterdir()
+        if p.is_dir() and not p.name.startswith('.')
+    )
+    for name in versions[:-keep] if keep > 0 else versions:
+        if name != active:
+            shutil.rmtree(root / name, ignore_errors=True)
@@ -0,0 +1,157 @@
+"""
+Lecture parallèle des CSV
+
+Un gros CSV est découpé en plages d'octets alignées sur les fins de ligne ;
+chaque plage est analysée par un worker puis les morceaux sont concaténés
+dans l'ordre du fichier. Plusieurs fichiers sont lus en même temps par un
+pool de threads.
+
+Hypothèse : aucun champ ne contient de saut de ligne entre guillemets (vrai
+pour les exports du dashboard). Sinon, utiliser ``chunks=1``.
+
+Moteurs :
+    'pandas'  : pd.read_csv sur chaque plage (pool de processus conseillé,
+                le parseur pandas garde le GIL une partie du temps)
+    'pyarrow' : pyarrow.csv, multi-thread et sans GIL
+"""
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pandas as pd
+
+MIN_CHUNK_BYTES = 8 * 1024 * 1024
+CSV_ENGINES = ('pandas', 'pyarrow')
+
+
+def default_workers():
+    """Nombre de workers par défaut : un par cœur"""
+    return os.cpu_count() or 1
+
+
+# ===== DÉCOUPAGE =====
+def chunk_ranges(path, n_chunks, min_chunk_bytes=MIN_CHUNK_BYTES):
+    """
+    Plages [début, fin) d'octets couvrant les lignes de données du fichier
+
+    Args:
+        path: Chemin du CSV
+        n_chunks: Nombre de plages souhaité
+        min_chunk_bytes: Taille minimale d'une plage
+
+    Returns:
+        tuple: (ligne d'en-tête en bytes, liste de (début, fin))
+    """
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        header = f.readline()
+        data_start = f.tell()
+
+        n_chunks = max(1, min(n_chunks, (size - data_start) // max(min_chunk_bytes, 1)))
+        step = (size - data_start) // n_chunks
+
+        bounds = [data_start]
+        for i in range(1, n_chunks):
+            f.seek(data_start + i * step)
+            f.readline()  # aller au début de la ligne suivante
+            pos = f.tell()
+            if pos >= size:
+                break
+            if pos > bounds[-1]:
+                bounds.append(pos)
+        bounds.append(size)
+
+    return header, list(zip(bounds[:-1], bounds[1:]))
+
+
+def _read_bytes(path, start, end):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        return f.read(end - start)
+
+
+def read_csv_range(path, header, start, end, engine='pandas'):
+    """
+    Analyse une plage d'octets du CSV en la préfixant par l'en-tête
+
+    Returns:
+        pd.DataFrame: Lignes de la plage
+    """
+    data = header + _read_bytes(path, start, end)
+    if engine == 'pyarrow':
+        return _arrow_read(io.BytesIO(data))
+    return pd.read_csv(io.BytesIO(data))
+
+
+def _arrow_read(source):
+    import pyarrow.csv as pacsv
+
+    table = pacsv.read_csv(
+        source,
+        convert_options=pacsv.ConvertOptions(strings_can_be_null=True)
+    )
+    return table.to_pandas()
+
+
+# ===== LECTURE =====
+def read_csv_parallel(path, workers=None, engine='pandas', use_processes=False,
+                      min_chunk_bytes=MIN_CHUNK_BYTES):
+    """
+    Lit un CSV en analysant des plages d'octets en parallèle
+
+    Args:
+        path: Chemin du CSV
+        workers: Nombre de workers (défaut : nombre de cœurs)
+        engine: 'pandas' ou 'pyarrow'
+        use_processes: Pool de processus plutôt que de threads (moteur pandas)
+        min_chunk_bytes: En dessous, le fichier est lu d'un bloc
+
+    Returns:
+        pd.DataFrame: Contenu du CSV, lignes dans l'ordre du fichier
+    """
+    if engine not in CSV_ENGINES:
+        raise ValueError(f"Moteur CSV inconnu : {engine} (attendu : {', '.join(CSV_ENGINES)})")
+
+    workers = workers or default_workers()
+    if engine == 'pyarrow':
+        # pyarrow découpe et parallélise déjà la lecture en interne
+        return _arrow_read(str(path))
+
+    header, ranges = chunk_ranges(path, workers, min_chunk_bytes)
+    if len(ranges) <= 1:
+        return pd.read_csv(path)
+
+    pool_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    with pool_class(max_workers=min(workers, len(ranges))) as pool:
+        parts = list(pool.map(
+            read_csv_range,
+            [path] * len(ranges), [header] * len(ranges),
+            [start for start, _ in ranges], [end for _, end in ranges]
+        ))
+
+    # Les types inférés peuvent différer entre plages (int / float avec NaN...) :
+    # concat les unifie comme une lecture d'un bloc
+    return pd.concat(parts, ignore_index=True)
+
+
+def read_many(readers, workers=None):
+    """
+    Exécute plusieurs lectures de tables en parallèle (pool de threads)
+
+    Args:
+        readers: {nom: fonction sans argument renvoyant un DataFrame}
+        workers: Nombre de threads (défaut : nombre de cœurs)
+
+    Returns:
+        dict: {nom: DataFrame}, dans l'ordre de ``readers``
+
+    Raises:
+        La première exception levée par une lecture (dans l'ordre des noms)
+    """
+    workers = min(workers or default_workers(), len(readers)) or 1
+    if workers == 1:
+        return {name: read() for name, read in readers.items()}
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {name: pool.submit(read) for name, read in readers.items()}
+        return {name: future.result() for name, future in futures.items()}
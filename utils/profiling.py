@@ -0,0 +1,287 @@
+"""
+Chronométrage des étapes de rendu des pages
+
+Chaque page ouvre une exécution (``start_run``), entoure ses étapes
+(chargement, sidebar, filtres, KPI, agrégations, graphiques) de
+``with stage('nom'):`` puis la clôt (``end_run``). Les durées sont gardées
+en mémoire du processus sur une fenêtre glissante par (page, étape) pour
+calculer des percentiles.
+
+Sorties (toutes optionnelles) :
+    - panneau de debug en bas de page : ``?debug=1`` dans l'URL ou
+      LOGISTIXUP_DEBUG=1 ;
+    - journal JSONL, une ligne par exécution : LOGISTIXUP_PROFILE_LOG=chemin ;
+    - endpoint Prometheus (format texte) : LOGISTIXUP_METRICS_PORT=9101 puis
+      http://localhost:9101/metrics.
+
+Exemple:
+    start_run('overview')
+    with stage('load'):
+        dataset = get_dataset()
+    ...
+    end_run()
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+STAGE_WINDOW = 500                      # durées conservées par (page, étape)
+QUANTILES = (0.5, 0.9, 0.99)
+
+DEBUG_ENV = 'LOGISTIXUP_DEBUG'
+PROFILE_LOG_ENV = 'LOGISTIXUP_PROFILE_LOG'
+METRICS_PORT_ENV = 'LOGISTIXUP_METRICS_PORT'
+
+
+# ===== STATISTIQUES =====
+class StageStats:
+    """
+    Durées des étapes par (page, étape), partagées entre sessions
+
+    Les percentiles portent sur les ``window`` dernières mesures ; le
+    nombre d'appels et le temps cumulé couvrent toute la vie du processus.
+    """
+
+    def __init__(self, window=STAGE_WINDOW):
+        self.window = window
+        self._samples = {}   # (page, étape) -> deque de durées (s)
+        self._totals = {}    # (page, étape) -> [nombre, somme]
+        self._lock = threading.Lock()
+
+    def record(self, page, name, seconds):
+        key = (page, name)
+        with self._lock:
+            samples = self._samples.get(key)
+            if samples is None:
+                samples = self._samples[key] = deque(maxlen=self.window)
+                self._totals[key] = [0, 0.0]
+            samples.append(seconds)
+            totals = self._totals[key]
+            totals[0] += 1
+            totals[1] += seconds
+
+    def snapshot(self, quantiles=QUANTILES):
+        """
+        Statistiques courantes
+
+        Returns:
+            list: Un dict par (page, étape) : page, stage, count, total_s,
+            last_s et p50/p90/p99 (secondes)
+        """
+        with self._lock:
+            items = [(key, list(samples), list(self._totals[key]))
+                     for key, samples in self._samples.items()]
+
+        rows = []
+        for (page, name), samples, (count, total) in sorted(items):
+            values = np.quantile(samples, quantiles)
+            row = {'page': page, 'stage': name, 'count': count, 'total_s': total, 'last_s': samples[-1]}
+            row.update({f'p{round(q * 100)}': float(v) for q, v in zip(quantiles, values)})
+            rows.append(row)
+        return rows
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._totals.clear()
+
+
+STAGE_STATS = StageStats()
+
+
+# ===== EXÉCUTION COURANTE =====
+# Streamlit exécute chaque rerun dans son propre thread
+_current = threading.local()
+
+
+def start_run(page):
+    """
+    Début d'exécution d'une page (à appeler en tête de script)
+
+    Args:
+        page: Nom de la page (label des métriques)
+    """
+    _current.page = page
+    _current.stages = []
+    _current.start = time.perf_counter()
+    _ensure_metrics_server()
+
+
+def current_page():
+    return getattr(_current, 'page', None) or 'unknown'
+
+
+@contextmanager
+def stage(name):
+    """
+    Chronomètre un bloc comme étape de la page courante (utilisable aussi
+    en décorateur : ``@stage('kpis')``)
+
+    Args:
+        name: Nom de l'étape (ex. 'load', 'sidebar', 'chart:ca')
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_STATS.record(current_page(), name, elapsed)
+        stages = getattr(_current, 'stages', None)
+        if stages is not None:
+            stages.append((name, elapsed))
+
+
+def end_run():
+    """
+    Fin d'exécution (à appeler en fin de script) : durée totale, journal
+    JSONL et panneau de debug si activés
+
+    Returns:
+        list: Étapes de cette exécution [(nom, secondes)], None si aucune
+        exécution n'est en cours
+    """
+    stages = getattr(_current, 'stages', None)
+    if stages is None:
+        return None
+
+    total = time.perf_counter() - _current.start
+    page = current_page()
+    STAGE_STATS.record(page, 'total', total)
+
+    log_path = os.environ.get(PROFILE_LOG_ENV)
+    if log_path:
+        write_jsonl(log_path, page, stages, total)
+    if debug_enabled():
+        render_debug_panel(page, stages, total)
+
+    _current.stages = None
+    return stages
+
+
+# ===== SORTIES =====
+def write_jsonl(path, page, stages, total):
+    """Ajoute une ligne JSON décrivant une exécution"""
+    record = {
+        'ts': datetime.now().isoformat(timespec='milliseconds'),
+        'page': page,
+        'total_ms': round(total * 1000, 2),
+        'stages': [{'stage': name, 'ms': round(seconds * 1000, 2)} for name, seconds in stages],
+    }
+    with open(path, 'a') as f:
+        f.write(json.dumps(record) + '\n')
+
+
+def prometheus_text(stats=STAGE_STATS):
+    """
+    Statistiques au format d'exposition texte de Prometheus (summary)
+
+    Returns:
+        str: Corps de la réponse /metrics
+    """
+    lines = [
+        '# HELP logistixup_stage_seconds Durée des étapes de rendu des pages',
+        '# TYPE logistixup_stage_seconds summary',
+    ]
+    for row in stats.snapshot():
+        labels = f'page="{row["page"]}",stage="{row["stage"]}"'
+        for q in QUANTILES:
+            value = row[f'p{round(q * 100)}']
+            lines.append(f'logistixup_stage_seconds{{{labels},quantile="{q}"}} {value:.6f}')
+        lines.append(f'logistixup_stage_seconds_sum{{{labels}}} {row["total_s"]:.6f}')
+        lines.append(f'logistixup_stage_seconds_count{{{labels}}} {row["count"]}')
+    return '\n'.join(lines) + '\n'
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = prometheus_text().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_metrics_server = None
+_metrics_failed = False
+_metrics_lock = threading.Lock()
+
+
+def start_metrics_server(port, host='127.0.0.1'):
+    """
+    Démarre (une fois par processus) le serveur /metrics dans un thread
+
+    Returns:
+        ThreadingHTTPServer: Serveur en cours d'exécution
+    """
+    global _metrics_server
+    with _metrics_lock:
+        if _metrics_server is None:
+            _metrics_server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            threading.Thread(
+                target=_metrics_server.serve_forever, name='metrics-server', daemon=True
+            ).start()
+    return _metrics_server
+
+
+def _ensure_metrics_server():
+    global _metrics_failed
+    port = os.environ.get(METRICS_PORT_ENV)
+    if port and _metrics_server is None and not _metrics_failed:
+        try:
+            start_metrics_server(int(port))
+        except (OSError, ValueError):
+            # Port occupé ou invalide : le rendu des pages ne doit pas échouer
+            _metrics_failed = True
+
+
+def debug_enabled():
+    """Panneau de debug demandé (?debug=1 ou LOGISTIXUP_DEBUG=1)"""
+    if os.environ.get(DEBUG_ENV) == '1':
+        return True
+    import streamlit as st
+
+    try:
+        return st.query_params.get('debug') == '1'
+    except Exception:
+        return False
+
+
+def render_debug_panel(page, stages, total):
+    """Affiche les durées de l'exécution et les percentiles de la page"""
+    import pandas as pd
+    import streamlit as st
+
+    with st.expander(f"⏱️ Profilage : {total * 1000:.0f} ms", expanded=False):
+        st.caption("Cette exécution")
+        st.dataframe(
+            pd.DataFrame(
+                [(name, seconds * 1000) for name, seconds in stages], columns=['Étape', 'ms']
+            ).style.format({'ms': '{:.1f}'}),
+            hide_index=True, use_container_width=True
+        )
+        st.caption(f"Fenêtre glissante ({STAGE_WINDOW} dernières exécutions)")
+        stats = pd.DataFrame([row for row in STAGE_STATS.snapshot() if row['page'] == page])
+        if not stats.empty:
+            for col in ('last_s', 'p50', 'p90', 'p99'):
+                stats[col] = stats[col] * 1000
+            st.dataframe(
+                stats[['stage', 'count', 'last_s', 'p50', 'p90', 'p99']]
+                .rename(columns={'stage': 'Étape', 'count': 'Appels', 'last_s': 'Dernier (ms)',
+                                 'p50': 'p50 (ms)', 'p90': 'p90 (ms)', 'p99': 'p99 (ms)'})
+                .style.format(precision=1),
+                hide_index=True, use_container_width=True
+            )
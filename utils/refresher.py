@@ -0,0 +1,133 @@
+"""
+Rechargement du dataset en tâche de fond, sans redémarrage
+
+Un thread surveille les CSV de ``data/`` (taille, mtime). Quand ils ont
+changé et ne bougent plus depuis un cycle (copie terminée), il reconstruit
+le dataset hors du chemin des requêtes (incrémental si possible, sinon
+complet) avec ses objets dérivés (index des filtres, cube, moteur de KPI),
+puis remplace atomiquement le handle partagé (DatasetStore). Les
+sessions en cours gardent l'ancien handle jusqu'à leur prochain rerun.
+
+En cas d'échec, l'ancien dataset reste servi, l'erreur est signalée au
+store (affichée dans la sidebar) et la reconstruction est retentée, avec
+un délai doublé à chaque échec (au plus MAX_RETRY_DELAY) ; un nouveau
+changement des CSV relance un essai dès qu'ils sont stables.
+"""
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+REFRESH_INTERVAL = 60  # secondes
+MAX_RETRY_DELAY = 15 * 60  # secondes
+
+
+def sources_snapshot(data_dir, tables):
+    """
+    État des CSV sources : {table: (taille, mtime_ns)}, None si absent
+
+    Args:
+        data_dir: Dossier des CSV
+        tables: Noms des tables
+    """
+    snapshot = {}
+    for name in tables:
+        try:
+            stat = os.stat(Path(data_dir) / f'{name}.csv')
+            snapshot[name] = (stat.st_size, stat.st_mtime_ns)
+        except OSError:
+            snapshot[name] = None
+    return snapshot
+
+
+class DatasetRefresher(threading.Thread):
+    """
+    Thread de surveillance + reconstruction + remplacement du handle
+
+    Attributs:
+        refreshes: Nombre de rechargements réussis
+        failures: Nombre de reconstructions en échec
+        last_error: Dernière erreur (str) ou None
+        retry_at: Prochain essai après un échec (time.monotonic), 0 sinon
+    """
+
+    def __init__(self, store, data_dir, tables, rebuild, interval=REFRESH_INTERVAL):
+        """
+        Args:
+            store: DatasetStore à mettre à jour
+            data_dir: Dossier des CSV surveillé
+            tables: Noms des tables surveillées
+            rebuild: Fonction (handle courant) -> nouveau DatasetHandle, prêt
+                     à servir (objets dérivés déjà construits)
+            interval: Période de scrutation (secondes)
+        """
+        super().__init__(name='dataset-refresher', daemon=True)
+        self.store = store
+        self.data_dir = data_dir
+        self.tables = tables
+        self.rebuild = rebuild
+        self.interval = interval
+        self.refreshes = 0
+        self.failures = 0
+        self.last_error = None
+        self.retry_at = 0
+        self._consecutive_failures = 0
+        self._seen = sources_snapshot(data_dir, tables)
+        self._pending = None
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        """Arrête la surveillance (le thread se termine au prochain cycle)"""
+        self._stop_event.set()
+
+    def check(self):
+        """
+        Un cycle de surveillance
+
+        Returns:
+            bool: Vrai si le handle a été remplacé
+        """
+        snapshot = sources_snapshot(self.data_dir, self.tables)
+        if snapshot == self._seen:
+            self._pending = None
+            return False
+
+        # Fichiers encore en cours d'écriture : attendre un cycle stable
+        if snapshot != self._pending or None in snapshot.values():
+            self._pending = snapshot
+            self.retry_at = 0  # nouveau contenu : essai sans attendre le délai
+            return False
+
+        if time.monotonic() < self.retry_at:
+            return False
+
+        try:
+            handle = self.rebuild(self.store.current())
+        except Exception as e:
+            # _seen inchangé : la reconstruction sera retentée
+            self.failures += 1
+            self._consecutive_failures += 1
+            self.last_error = str(e)
+            delay = min(self.interval * 2 ** self._consecutive_failures, MAX_RETRY_DELAY)
+            self.retry_at = time.monotonic() + delay
+            self.store.report_error(self.last_error)
+            logger.exception("Rechargement du dataset en échec, ancienne version conservée "
+                             "(nouvel essai dans %.0fs)", delay)
+            return False
+
+        self.store.swap(handle)
+        self._seen = snapshot
+        self._pending = None
+        self.refreshes += 1
+        self.last_error = None
+        self.retry_at = 0
+        self._consecutive_failures = 0
+        logger.info("Dataset rechargé : %r", handle)
+        return True
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.check()
@@ -0,0 +1,153 @@
+"""
+Schéma de types par table (catégories, entiers réduits, float32, booléens)
+
+Appliqué au chargement, avant la mise en cache Parquet : les tables et le
+dataset enrichi occupent nettement moins de mémoire et les groupby sur les
+colonnes catégorielles sont plus rapides. Les montants restent en float64
+pour ne pas dégrader la précision des sommes.
+"""
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+TABLE_SCHEMAS = {
+    'orders': {
+        'order_id': 'int32',
+        'customer_id': 'int32',
+        'transport_id': 'Int8',
+        'delivery_status': 'category',
+        'payment_status': 'category',
+        'seasonal_period': 'category',
+        'state_code': 'category',
+        'claim_flag': 'bool',
+    },
+    'products': {
+        'product_id': 'int32',
+        'fragility_class': 'category',
+        'theft_attractiveness_score': 'float32',
+        'christmas_popularity_multiplier': 'float32',
+    },
+    'states_risk': {
+        'state_code': 'category',
+        'state_name': 'category',
+    },
+    'transport_mode': {
+        'transport_id': 'Int8',
+        'transport_type': 'category',
+        'cost_per_km': 'float32',
+        'co2_emission_per_km': 'float32',
+    },
+    'claims': {
+        'order_id': 'int32',
+        'claim_type': 'category',
+        'claim_status': 'category',
+        'resolution_time_days': 'Int16',
+    },
+    'customers': {
+        'customer_id': 'int32',
+        'subscription_type': 'category',
+        'churn_status': 'category',
+        'state_code': 'category',
+    },
+    'order_product': {
+        'order_id': 'int32',
+        'product_id': 'int32',
+        'quantity': 'Int16',
+        'return_flag': 'bool',
+    },
+    'order_route_leg': {
+        'order_id': 'int32',
+        'state_code': 'category',
+        'vandalism_incidents': 'Int16',
+        'theft_incident_flag': 'bool',
+        'distance_km': 'float32',
+        'leg_duration_hours': 'float32',
+    },
+}
+
+# Colonnes dérivées du dataset enrichi (prepare_main_dataset)
+MAIN_SCHEMA = {
+    'order_year': 'int16',
+    'order_month': 'int8',
+    'order_week': 'UInt8',
+    'order_day': 'int8',
+    'order_weekday': 'int8',
+    'order_quarter': 'int8',
+    'delivery_delay_days': 'float32',
+    'nb_states_crossed': 'int16',
+    'total_vandalism': 'int16',
+    'main_fragility_class': 'category',
+    'avg_speed_kmh': 'float32',
+    'transport_cost_estimate': 'float32',
+    'co2_emission_estimate': 'float32',
+}
+
+
+def memory_mb(df):
+    """Mémoire occupée par un DataFrame (Mo, chaînes comprises)"""
+    return df.memory_usage(deep=True).sum() / 1e6
+
+
+def _can_cast(series, dtype):
+    """
+    Vérifie qu'une conversion ne corrompt pas silencieusement les valeurs
+
+    - entiers : valeurs entières qui tiennent dans le type cible
+    - booléens : pas de NaN, et source déjà booléenne ou numérique
+      (``astype(bool)`` transformerait NaN et 'False' en True)
+    """
+    target = pd.api.types.pandas_dtype(dtype)
+
+    if pd.api.types.is_bool_dtype(target):
+        return pd.api.types.is_numeric_dtype(series) and not series.isna().any()
+
+    if not pd.api.types.is_integer_dtype(target) or not pd.api.types.is_numeric_dtype(series):
+        return True
+    if series.isna().all():
+        return True
+    if pd.api.types.is_float_dtype(series) and not (series.dropna() % 1 == 0).all():
+        return False
+    info = np.iinfo(target.numpy_dtype if hasattr(target, 'numpy_dtype') else target)
+    return info.min <= series.min() and series.max() <= info.max
+
+
+def apply_schema(df, schema, name=''):
+    """
+    Convertit les colonnes présentes selon le schéma
+
+    Une conversion impossible (ex. NaN dans une colonne déclarée 'int32' ou
+    'bool') laisse la colonne inchangée et est journalisée.
+
+    Args:
+        df: DataFrame à convertir (modifié en place)
+        schema: Dict {colonne: dtype}
+        name: Nom de la table (pour les logs)
+
+    Returns:
+        pd.DataFrame: Le même DataFrame, converti
+    """
+    # Mesure deep=True coûteuse (parcourt chaque chaîne) : seulement si journalisée
+    log_memory = logger.isEnabledFor(logging.INFO)
+    before = memory_mb(df) if log_memory else 0
+
+    for col, dtype in schema.items():
+        if col not in df.columns or df[col].dtype == dtype:
+            continue
+        if not _can_cast(df[col], dtype):
+            logger.warning("Schéma %s.%s -> %s ignoré : conversion non sûre", name, col, dtype)
+            continue
+        try:
+            df[col] = df[col].astype(dtype)
+        except (ValueError, TypeError) as e:
+            logger.warning("Schéma %s.%s -> %s ignoré : %s", name, col, dtype, e)
+
+    if log_memory:
+        after = memory_mb(df)
+        logger.info(
+            "Mémoire %s : %.1f Mo -> %.1f Mo (%+.0f%%)",
+            name or 'table', before, after, (after / before - 1) * 100 if before else 0
+        )
+    return df
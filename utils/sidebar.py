@@ -2,9 +2,13 @@
 Sidebar réutilisable pour toutes les pages du dashboard
 """
 import streamlit as st
+import numpy as np
 import pandas as pd
 from pathlib import Path
 
+from utils.data_loader import refresh_error
+from utils.helpers import add_download_button, day_number
+
 def render_sidebar(df):
     """
     Crée la sidebar avec logo et navigation
@@ -13,7 +17,7 @@ def render_sidebar(df):
         df: DataFrame principal (résultat de prepare_main_dataset())
     
     Returns:
-        dict: Dictionnaire vide (pour compatibilité)
+        dict: Filtres (start_date, end_date, transport_filter, state_filter)
     """
     logo_path = Path(__file__).parent.parent / "assets" / "logo1.png"
     
@@ -26,6 +30,16 @@ def render_sidebar(df):
         
         st.markdown("<hr/>", unsafe_allow_html=True)
         
+        # Rechargement en tâche de fond en échec : données servies périmées
+        error = refresh_error()
+        if error is not None:
+            message, failed_at = error
+            st.warning(
+                f"Données non mises à jour : le rechargement du {failed_at:%d/%m %H:%M} "
+                f"a échoué ({message}). Nouvel essai automatique.",
+                icon=":material/sync_problem:"
+            )
+        
         # ===== 🧭 SECTION NAVIGATION =====
         st.markdown("### Navigation")
         
@@ -131,40 +145,125 @@ def render_sidebar(df):
         
         st.markdown('<hr>', unsafe_allow_html=True)
 
+        filters = {
+            'start_date': st.session_state.start_date,  
+            'end_date': st.session_state.end_date,      
+            'transport_filter': transport_filter,
+            'state_filter': state_filter
+        }
+
         # a revoir uploader et downloader
         st.file_uploader("Importer un fichier CSV", type=["csv"])
-        st.download_button("Télécharger un modèle CSV", data=df.to_csv(index=False), file_name="modele.csv")
+        # Modèle = en-têtes + quelques lignes (pas de sérialisation du dataset à chaque rerun)
+        st.download_button("Télécharger un modèle CSV", data=df.head(5).to_csv(index=False), file_name="modele.csv")
+        render_export(df, filters)
         
         
         # Footer
         st.caption("Dashboard v1.0 | © 2025")
     
     # Retourner les filtres sous forme de dictionnaire
-    return {
-        'start_date': st.session_state.start_date,  
-        'end_date': st.session_state.end_date,      
-        'transport_filter': transport_filter,
-        'state_filter': state_filter
-    }
+    return filters
+
+
+def render_export(df, filters):
+    """
+    Export des données filtrées, généré uniquement à la demande
+    
+    Args:
+        df: DataFrame principal
+        filters: Filtres courants de la sidebar
+    """
+    add_download_button(
+        lambda: apply_filters(df, filters),
+        filename="export.csv",
+        label="Télécharger l'export CSV",
+        key='sidebar_export'
+    )
+
+
+def date_bounds(df, start_date, end_date, presorted=False):
+    """
+    Bornes [lo, hi) des lignes de la période sur un DataFrame trié par date
+    
+    Args:
+        df: DataFrame des commandes (trié, avec la colonne order_day_num)
+        start_date: Date de début (incluse)
+        end_date: Date de fin (incluse)
+        presorted: Ordre déjà vérifié (FilterIndex.date_sorted) : pas de
+                   contrôle O(n) du tri
+    
+    Returns:
+        tuple | None: (lo, hi), ou None si le DataFrame n'est pas trié
+    """
+    if 'order_day_num' not in df.columns:
+        return None
+    
+    day_nums = df['order_day_num'].to_numpy()
+    if not presorted and len(day_nums) > 1 and not (day_nums[1:] >= day_nums[:-1]).all():
+        return None
+    
+    lo, hi = np.searchsorted(
+        day_nums, [day_number(start_date), day_number(end_date) + 1], side='left'
+    )
+    return int(lo), int(hi)
+
+
+def slice_date_range(df, start_date, end_date):
+    """
+    Sélectionne les commandes dont order_date est dans [start_date, end_date]
+    
+    Sur le dataset principal (trié par date, colonne order_day_num), la
+    sélection est une recherche dichotomique suivie d'un découpage : aucun
+    objet Python par ligne, pas de masque booléen.
+    
+    Args:
+        df: DataFrame des commandes
+        start_date: Date de début (incluse)
+        end_date: Date de fin (incluse)
+    
+    Returns:
+        pd.DataFrame: Tranche du DataFrame
+    """
+    bounds = date_bounds(df, start_date, end_date)
+    if bounds is not None:
+        return df.iloc[bounds[0]:bounds[1]]
+    
+    # Repli : DataFrame non trié
+    return df[
+        (df['order_date'].dt.date >= start_date) &
+        (df['order_date'].dt.date <= end_date)
+    ]
 
 
-def apply_filters(df, filters):
+def apply_filters(df, filters, index=None):
     """
     Applique les filtres au DataFrame
     
     Args:
         df: DataFrame à filtrer
         filters: Dict retourné par render_sidebar()
+        index: FilterIndex construit sur df (optionnel) ; les filtres
+               transport / état combinent alors ses bitmaps au lieu de isin()
     
     Returns:
         pd.DataFrame: DataFrame filtré
     """
+    selections = {
+        'transport_type': filters['transport_filter'],
+        'state_code': filters['state_filter']
+    }
+    
+    # Chemin indexé : tranche de dates + masque issu des bitmaps
+    if (index is not None and index.date_sorted and index.covers(df)
+            and all(col in index.bitmaps for col in selections)):
+        lo, hi = date_bounds(df, filters['start_date'], filters['end_date'], presorted=True)
+        mask = index.mask(lo, hi, selections)
+        df_filtered = df.iloc[lo:hi]
+        return df_filtered if mask is None else df_filtered[mask]
+    
     # Filtre par date
-    df_filtered = df[
-        (df['order_date'].dt.date >= filters['start_date']) &  
-        (df['order_date'].dt.date <= filters['end_date'])      
-    ]
-
+    df_filtered = slice_date_range(df, filters['start_date'], filters['end_date'])
     
     # Filtre par mode de transport
     if filters['transport_filter']:
@@ -175,7 +274,3 @@ def apply_filters(df, filters):
         df_filtered = df_filtered[df_filtered['state_code'].isin(filters['state_filter'])]
     
     return df_filtered
-
-    
-        
-        
\ No newline at end of file
@@ -2,7 +2,11 @@ import plotly.graph_objects as go
 import plotly.express as px
 import pandas as pd
 
+from utils.charts import WEBGL_MIN_POINTS, chart_template, compact_values, scatter_trace
+from utils.figure_cache import cached_figure
+
 # ===== TIMELINE DUAL AXIS =====
+@cached_figure()
 def create_dual_axis_timeline(df, date_col='order_date', 
                                metric1='nb_orders', metric1_name='Commandes',
                                metric2='theft_rate', metric2_name='Taux de vol (%)',
@@ -12,20 +16,22 @@ def create_dual_axis_timeline(df, date_col='order_date',
     Utile pour : commandes vs taux de vol, livraisons vs réclamations
     """
     fig = go.Figure()
+    x = compact_values(df[date_col])
     
     # Barres
     fig.add_trace(go.Bar(
-        x=df[date_col],
-        y=df[metric1],
+        x=x,
+        y=compact_values(df[metric1]),
         name=metric1_name,
         marker_color='#055e82',
         yaxis='y'
     ))
     
     # Ligne
-    fig.add_trace(go.Scatter(
-        x=df[date_col],
-        y=df[metric2],
+    fig.add_trace(scatter_trace(
+        len(df),
+        x=x,
+        y=compact_values(df[metric2]),
         name=metric2_name,
         line=dict(color='#ffd447', width=3),
         yaxis='y2'
@@ -47,6 +53,7 @@ def create_dual_axis_timeline(df, date_col='order_date',
             )
     
     fig.update_layout(
+        template=chart_template(),
         xaxis_title="Date",
         yaxis=dict(title=metric1_name, side='left'),
         yaxis2=dict(title=metric2_name, overlaying='y', side='right'),
@@ -58,6 +65,7 @@ def create_dual_axis_timeline(df, date_col='order_date',
     return fig
 
 # ===== COMPARAISON MODES TRANSPORT =====
+@cached_figure()
 def create_transport_comparison(transport_stats, metric='delivery_rate',
                                  christmas_col='is_christmas'):
     """
@@ -88,6 +96,7 @@ def create_transport_comparison(transport_stats, metric='delivery_rate',
     ))
     
     fig.update_layout(
+        template=chart_template(),
         title="Performance par mode de transport",
         xaxis_title="Mode",
         yaxis_title=metric.replace('_', ' ').title() + " (%)",
@@ -100,6 +109,7 @@ def create_transport_comparison(transport_stats, metric='delivery_rate',
     return fig
 
 # ===== SCATTER RISQUE =====
+@cached_figure()
 def create_risk_scatter(states_risk_df, x='avg_distance', y='theft_rate',
                         size='nb_orders', color='transport_type'):
     """
@@ -120,6 +130,8 @@ def create_risk_scatter(states_risk_df, x='avg_distance', y='theft_rate',
         },
         title="Hotspots de risque : distance vs incidents",
         height=500,
+        template=chart_template(),
+        render_mode='webgl' if len(states_risk_df) > WEBGL_MIN_POINTS else 'svg',
         color_discrete_map={
             'road': '#055e82',
             'train': '#2b3d50',
@@ -134,6 +146,7 @@ def create_risk_scatter(states_risk_df, x='avg_distance', y='theft_rate',
     return fig
 
 # ===== GAUGE KPI =====
+@cached_figure()
 def create_gauge(value, title, max_value=100, threshold=80, color="#055e82"):
     """Jauge pour KPI principaux"""
     fig = go.Figure(go.Indicator(
@@ -156,10 +169,11 @@ def create_gauge(value, title, max_value=100, threshold=80, color="#055e82"):
         }
     ))
     
-    fig.update_layout(height=250, margin=dict(l=20, r=20, t=50, b=20))
+    fig.update_layout(height=250, margin=dict(l=20, r=20, t=50, b=20), template=chart_template())
     return fig
 
 # ===== HEATMAP ÉTATS =====
+@cached_figure()
 def create_state_heatmap(states_df, metric='theft_rate'):
     """
     Heatmap pour visualiser risque par État
@@ -183,6 +197,7 @@ def create_state_heatmap(states_df, metric='theft_rate'):
     ))
     
     fig.update_layout(
+        template=chart_template(),
         title=f"Risque par État et Mois",
         xaxis_title="Mois",
         yaxis_title="État",
@@ -204,6 +219,7 @@ import plotly.express as px
 import pandas as pd
 
 # ===== HEATMAP INCIDENTS =====
+@cached_figure()
 def create_incident_heatmap(df, row_dim='transport_type', col_dim='is_christmas',
                             metric='theft_count', title="Matrice d'Incidents"):
     """
@@ -235,6 +251,7 @@ def create_incident_heatmap(df, row_dim='transport_type', col_dim='is_christmas'
     ))
     
     fig.update_layout(
+        template=chart_template(),
         title=title,
         height=400,
         xaxis_title=col_dim.replace('_', ' ').title(),
@@ -245,6 +262,7 @@ def create_incident_heatmap(df, row_dim='transport_type', col_dim='is_christmas'
     return fig
 
 # ===== RADAR RISQUE =====
+@cached_figure()
 def create_risk_radar(risk_dimensions, title="Profil de Risque"):
     """
     Radar chart pour visualiser profil multi-critères
@@ -280,6 +298,7 @@ def create_risk_radar(risk_dimensions, title="Profil de Risque"):
     ))
     
     fig.update_layout(
+        template=chart_template(),
         polar=dict(
             radialaxis=dict(
                 visible=True,
@@ -296,6 +315,7 @@ def create_risk_radar(risk_dimensions, title="Profil de Risque"):
     return fig
 
 # ===== WATERFALL ÉCONOMIQUE =====
+@cached_figure()
 def create_economic_waterfall(economic_impact):
     """
     Graphique cascade pour décomposer l'impact économique
@@ -335,6 +355,7 @@ def create_economic_waterfall(economic_impact):
     ))
     
     fig.update_layout(
+        template=chart_template(),
         title="Impact Économique - Décomposition",
         yaxis_title="Montant (€)",
         height=450,
@@ -345,6 +366,7 @@ def create_economic_waterfall(economic_impact):
     return fig
 
 # ===== JAUGE PERFORMANCE =====
+@cached_figure()
 def create_performance_gauge(value, metric_name="Performance", 
                              target=90, unit="%"):
     """
@@ -392,6 +414,7 @@ def create_performance_gauge(value, metric_name="Performance",
     ))
     
     fig.update_layout(
+        template=chart_template(),
         height=300,
         margin=dict(l=20, r=20, t=60, b=20),
         font=dict(family="Inter")
@@ -400,6 +423,7 @@ def create_performance_gauge(value, metric_name="Performance",
     return fig
 
 # ===== COMPARAISON MULTI-RADAR =====
+@cached_figure()
 def create_multi_radar(data_dict, title="Comparaison Multi-critères"):
     """
     Radar avec plusieurs entités à comparer
@@ -428,6 +452,7 @@ def create_multi_radar(data_dict, title="Comparaison Multi-critères"):
         ))
     
     fig.update_layout(
+        template=chart_template(),
         polar=dict(radialaxis=dict(visible=True, range=[0, 100])),
         title=title,
         height=500,